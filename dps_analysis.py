@@ -0,0 +1,55 @@
+# --- Stat Sensitivity Analysis ---
+# Closed-form marginal values of each stat, computed for whole rosters with NumPy.
+#
+# With crit chance c and crit damage multiplier m as fractions:
+#     DPS = dmg * (1 + c * (m - 1)) / atk_speed
+# so every partial derivative has a closed form and no perturbed re-runs are needed.
+
+import numpy as np
+
+import dps_batch
+
+STATS = ("dmg", "atk_speed", "crit_chance", "crit_dmg")
+
+
+def sensitivity(dmg, atk_speed, crit_chance, crit_dmg):
+    """Marginal value of each stat for every unit (crit values in percent, as in the GUI)
+
+    Returns a dict of arrays:
+      "dps"                       average DPS including crits
+      "d_<stat>"                  DPS gained per +1 of the stat as entered in the GUI
+                                  (1 damage, 1 second of attack speed, 1 crit chance
+                                  point, 1 crit damage point). d_atk_speed is negative.
+      "elasticity_<stat>"         % DPS change per +1% relative change of the stat
+      "dmg_equivalent_<stat>"     damage points worth as much as +1 of the stat
+                                  (the break-even ratio d_<stat> / d_dmg)
+
+    Crit chance is capped at 100%: for units already at the cap one more point
+    is worth nothing, so its derivative (and break-even ratio) is 0.
+    """
+    dmg, atk_speed, crit_chance, crit_dmg = dps_batch.as_stat_arrays(dmg, atk_speed, crit_chance, crit_dmg)
+    c = crit_chance / 100.0
+    m = crit_dmg / 100.0
+    crit_factor = 1 + c * (m - 1)
+    dps = dmg * crit_factor / atk_speed
+
+    d_dmg = crit_factor / atk_speed
+    d_atk_speed = -dps / atk_speed
+    d_crit_chance = np.where(c < 1.0, dmg * (m - 1) / atk_speed / 100.0, 0.0)
+    d_crit_dmg = dmg * c / atk_speed / 100.0
+
+    result = {
+        "dps": dps,
+        "d_dmg": d_dmg,
+        "d_atk_speed": d_atk_speed,
+        "d_crit_chance": d_crit_chance,
+        "d_crit_dmg": d_crit_dmg,
+        "elasticity_dmg": np.ones_like(dps),
+        "elasticity_atk_speed": -np.ones_like(dps),
+        "elasticity_crit_chance": np.where(c < 1.0, c * (m - 1) / crit_factor, 0.0),
+        "elasticity_crit_dmg": c * m / crit_factor,
+    }
+    for stat in STATS:
+        result[f"dmg_equivalent_{stat}"] = result[f"d_{stat}"] / d_dmg
+    return result
+
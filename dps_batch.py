@@ -0,0 +1,84 @@
+# --- Batched DPS Evaluation ---
+# Scores many units against the whole modification table at once with NumPy.
+# Results match dps_engine.score_modifications exactly (same operations in the same order).
+
+import numpy as np
+
+import dps_catalog
+
+
+def modification_columns(modifications=None):
+    """Per-mod factor arrays (names, dmg_factor, cd_factor, cc_add, cdmg_add) of a table or compiled catalog"""
+    catalog = dps_catalog.as_catalog(modifications)
+    return (list(catalog.names), np.frombuffer(catalog.dmg_factor), np.frombuffer(catalog.cd_factor),
+            np.frombuffer(catalog.cc_add), np.frombuffer(catalog.cdmg_add))
+
+
+def as_stat_arrays(dmg, atk_speed, crit_chance, crit_dmg):
+    """Convert roster stats to float64 column arrays and validate them"""
+    dmg = np.asarray(dmg, dtype=np.float64).reshape(-1)
+    atk_speed = np.asarray(atk_speed, dtype=np.float64).reshape(-1)
+    crit_chance = np.asarray(crit_chance, dtype=np.float64).reshape(-1)
+    crit_dmg = np.asarray(crit_dmg, dtype=np.float64).reshape(-1)
+
+    if not (len(dmg) == len(atk_speed) == len(crit_chance) == len(crit_dmg)):
+        raise ValueError("All stat arrays must have the same length.")
+
+    for ok, message in _stat_checks(dmg, atk_speed, crit_chance, crit_dmg):
+        if not ok.all():
+            raise ValueError(f"Unit #{int(np.argmin(ok))}: {message}")
+    return dmg, atk_speed, crit_chance, crit_dmg
+
+
+def _stat_checks(dmg, atk_speed, crit_chance, crit_dmg):
+    """(ok mask, message) per rule of dps_engine.validate_stats"""
+    return [
+        (dmg > 0, "Base DMG must be positive."),
+        (atk_speed > 0, "Attack Speed must be positive."),
+        ((crit_chance / 100.0 >= 0) & (crit_chance / 100.0 <= 1), "Crit Chance must be between 0% and 100%."),
+        (crit_dmg > 0, "Crit Damage must be positive."),
+    ]
+
+
+def stat_problems(dmg, atk_speed, crit_chance, crit_dmg):
+    """Validate a roster without raising: returns (ok mask, {unit index: first failing message})"""
+    columns = [np.asarray(column, dtype=np.float64).reshape(-1) for column in (dmg, atk_speed, crit_chance, crit_dmg)]
+    valid = np.ones(len(columns[0]), dtype=bool)
+    problems = {}
+    for ok, message in _stat_checks(*columns):
+        for i in np.flatnonzero(valid & ~ok).tolist():
+            problems[i] = message
+        valid &= ok
+    return valid, problems
+
+
+def base_dps(dmg, atk_speed, crit_chance, crit_dmg):
+    """Return (no-crit DPS, with-crit DPS) arrays for a roster (crit values in percent)"""
+    dmg, atk_speed, crit_chance, crit_dmg = as_stat_arrays(dmg, atk_speed, crit_chance, crit_dmg)
+    c = crit_chance / 100.0
+    m = crit_dmg / 100.0
+    aps = 1 / atk_speed
+    no_crit = dmg * aps
+    with_crit = ((1 - c) * dmg + c * (dmg * m)) * aps
+    return no_crit, with_crit
+
+
+def score_matrix(dmg, atk_speed, crit_chance, crit_dmg, modifications=None):
+    """Score every unit against every modification
+
+    Stats are array-likes of equal length (crit values in percent, as in the GUI).
+    Returns (mod_names, dps) where dps has shape (units, modifications).
+    """
+    dmg, atk_speed, crit_chance, crit_dmg = as_stat_arrays(dmg, atk_speed, crit_chance, crit_dmg)
+    names, dmg_factor, cd_factor, cc_add, cdmg_add = modification_columns(modifications)
+
+    c = (crit_chance / 100.0)[:, None]
+    m = (crit_dmg / 100.0)[:, None]
+
+    temp_dmg = dmg[:, None] * dmg_factor
+    temp_atk_speed = atk_speed[:, None] * cd_factor
+    temp_crit_chance = np.minimum(c + cc_add, 1.0)
+    temp_crit_dmg = m + cdmg_add
+
+    dpa_avg = ((1 - temp_crit_chance) * temp_dmg) + (temp_crit_chance * (temp_dmg * temp_crit_dmg))
+    return names, dpa_avg * (1 / temp_atk_speed)
@@ -0,0 +1,431 @@
+# --- Benchmark Suite ---
+# Headless benchmarks for the DPS engine, tier assignment, roster queries, unit store and results view.
+#
+#   python dps_bench.py                           # run everything, print a table
+#   python dps_bench.py --quick --json out.json   # small sizes, machine-readable results
+#   python dps_bench.py --save-baseline bench_baseline.json
+#   python dps_bench.py --baseline bench_baseline.json   # exit code 1 on regressions
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dps_catalog
+import dps_engine
+import dps_metrics
+import dps_patch
+import dps_store
+import dps_tiers
+from dps_roster import MappedRoster, Roster, UnitStats, write_roster_file
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+QUICK_SIZES = (1000,)
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown versus the baseline before flagging a regression
+
+
+def make_units(count, seed=1234):
+    """Deterministic roster of `count` units in dps_units.json layout"""
+    rng = random.Random(seed)
+    return {
+        f"Unit {i} lvl {i % 50 + 1}": {
+            "dmg": round(rng.uniform(10, 400), 2),
+            "atk_speed": round(rng.uniform(0.02, 2.0), 3),
+            "crit_chance": round(rng.uniform(0, 100), 1),
+            "crit_dmg": round(rng.uniform(100, 300), 1),
+        }
+        for i in range(count)
+    }
+
+
+def measure(func, repeat=3):
+    """Best wall time of `repeat` runs of func() in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# --- Benchmarks ---
+# Each yields (name, seconds, items) so throughput can be reported as items/s.
+
+def bench_engine(sizes, repeat):
+    size = min(sizes[-1], 20000)  # The scalar engine is measured per unit, no need for huge rosters
+    units = list(make_units(size).values())
+    stats = [(u["dmg"], u["atk_speed"], u["crit_chance"], u["crit_dmg"]) for u in units]
+
+    yield "engine.score_modifications", measure(lambda: [dps_engine.score_modifications(*s) for s in stats], repeat), size
+    yield "engine.calculate", measure(lambda: [dps_engine.calculate(*s) for s in stats], repeat), size
+    catalog = dps_catalog.default_catalog()
+    yield "engine.calculate_compiled", measure(lambda: [dps_engine.calculate(*s, catalog) for s in stats], repeat), size
+
+    scored = [dps_engine.score_modifications(*s) for s in stats]
+    bases = [dps_engine.dps_with_crit(s[0], s[1], s[2] / 100.0, s[3] / 100.0) for s in stats]
+
+    def sort_and_tier():
+        for results, base in zip(scored, bases):
+            dps_engine.assign_tiers(sorted(results, key=lambda x: x["dps"], reverse=True), base)
+    yield "engine.sort_and_tier", measure(sort_and_tier, repeat), size
+
+    sorted_scored = [sorted(results, key=lambda x: x["dps"], reverse=True) for results in scored]
+
+    def natural_tiers():
+        for results, base in zip(sorted_scored, bases):
+            dps_engine.assign_tiers(results, base, tier_count=4)
+    yield "engine.natural_tiers[4]", measure(natural_tiers, repeat), size
+
+    # One long list: the divide-and-conquer DP is O(k n log n)
+    values = [u["dmg"] * u["atk_speed"] for u in units]
+    yield f"tiers.natural_breaks[{size}]", measure(lambda: dps_tiers.natural_breaks(values, len(dps_engine.TIERS)), repeat), size
+
+    cache = dps_engine.ResultCache(maxsize=size)
+    for s in stats:
+        cache.calculate(*s, catalog)
+    yield "engine.result_cache_hit", measure(lambda: [cache.calculate(*s, catalog) for s in stats], repeat), size
+
+
+def bench_batch(sizes, repeat):
+    try:
+        import dps_batch
+    except ImportError:
+        return  # NumPy not installed
+    import dps_decision
+    import dps_query
+    for size in sizes:
+        units = list(make_units(size).values())
+        columns = [[u[key] for u in units] for key in dps_store.STAT_KEYS]
+        yield f"batch.score_matrix[{size}]", measure(lambda: dps_batch.score_matrix(*columns), repeat), size
+
+        names, matrix = dps_batch.score_matrix(*columns)
+        costs = list(range(len(names)))
+        yield f"query.top_pairs[{size}]", measure(lambda: dps_query.top_pairs(matrix, 20), repeat), matrix.size
+        yield f"query.best_per_unit[{size}]", measure(lambda: dps_query.best_per_unit(matrix), repeat), matrix.size
+        yield f"query.pareto_pairs[{size}]", measure(lambda: dps_query.pareto_pairs(matrix, costs), repeat), matrix.size
+
+        decision_map = dps_decision.DecisionMap()
+        yield f"decision.lookup_many[{size}]", measure(lambda: decision_map.lookup_many(*columns), repeat), size
+    yield "decision.build", measure(lambda: dps_decision.DecisionMap(), repeat), 1
+
+
+def bench_store(sizes, repeat, workdir):
+    for size in sizes:
+        units = make_units(size)
+        json_path = os.path.join(workdir, f"units_{size}.json")
+        db_path = os.path.join(workdir, f"units_{size}.db")
+
+        def save_json():
+            with open(json_path, "w") as f:
+                json.dump(units, f, indent=4)
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                json.loads(f.read())
+
+        def stream_json():
+            for _ in dps_store.iter_units_json(json_path):
+                pass
+
+        def import_store():
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            store = dps_store.UnitStore(db_path)
+            store.import_json(json_path)
+            store.close()
+
+        yield f"store.json_save[{size}]", measure(save_json, repeat), size
+        yield f"store.json_load[{size}]", measure(load_json, repeat), size
+        yield f"store.json_stream[{size}]", measure(stream_json, repeat), size
+        yield f"store.sqlite_import[{size}]", measure(import_store, 1), size
+
+        roster_path = os.path.join(workdir, f"units_{size}.roster")
+        roster = Roster.from_items(units.items())
+        yield f"store.roster_write[{size}]", measure(lambda: write_roster_file(roster_path, roster), repeat), size
+
+        def open_roster():
+            mapped = MappedRoster(roster_path)
+            mapped.columns()
+            mapped.close()
+        yield f"store.roster_open[{size}]", measure(open_roster, repeat), size
+
+        store = dps_store.UnitStore(db_path)
+        try:
+            counter = iter(range(10 ** 9))
+
+            def save_one():
+                store[f"Bench unit {next(counter)}"] = {"dmg": 1.0, "atk_speed": 1.0, "crit_chance": 0.0, "crit_dmg": 100.0}
+                store.commit()
+            yield f"store.sqlite_save_one[{size}]", measure(save_one, repeat), 1
+
+            def open_first_page():
+                opened = dps_store.UnitStore(db_path)
+                opened.count("")
+                opened.search("", 50, 0)
+                opened.close()
+            yield f"store.sqlite_open_first_page[{size}]", measure(open_first_page, repeat), 1
+        finally:
+            store.close()
+        for path in (json_path, db_path, roster_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class _MockTree:
+    """Minimal stand-in for ttk.Treeview, used when no display is available"""
+
+    def __init__(self):
+        self.children = []
+
+    def configure(self, **kwargs):
+        pass
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid, tags, values):
+        self.children.insert(index, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def item(self, iid, **kwargs):
+        pass
+
+    def after_idle(self, func):
+        func()
+
+
+class _MockScrollbar:
+    def set(self, first, last):
+        pass
+
+
+def bench_treeview(repeat, use_tk):
+    try:
+        import dps_calculator
+    except ImportError:
+        return  # tkinter not available at all
+
+    root = None
+    if use_tk:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.withdraw()
+
+        def make_view():
+            tree = ttk.Treeview(root, columns=("tier", "modification", "total_dps", "percent_change"), show="headings")
+            return dps_calculator.ResultsTreeView(tree, ttk.Scrollbar(root))
+        layer = "tk"
+    else:
+        def make_view():
+            return dps_calculator.ResultsTreeView(_MockTree(), _MockScrollbar())
+        layer = "mock"
+
+    try:
+        for catalog_size in (9, 150, 1000):
+            modifications = {f"Mod {i}": {"type": ("DMG", "CD", "CC", "CDMG")[i % 4], "value": (i % 60) / 100.0}
+                             for i in range(catalog_size)}
+            first = dps_engine.calculate(145.0, 0.04, 30.0, 175.0, modifications)["results"]
+            second = dps_engine.calculate(129.0, 0.04, 60.0, 200.0, modifications)["results"]
+
+            def populate():
+                make_view().show(first)
+            yield f"treeview.{layer}.populate[{catalog_size}]", measure(populate, repeat), len(first)
+
+            view = make_view()
+            view.show(first)
+            flip = [second, first]
+
+            def update():
+                view.show(flip[0])
+                flip.reverse()
+            yield f"treeview.{layer}.update[{catalog_size}]", measure(update, repeat), len(first)
+    finally:
+        if root is not None:
+            root.destroy()
+
+
+def bench_metrics(repeat):
+    """Cost of an instrumented call site with recording off and on"""
+    calls = 100000
+    registry = dps_metrics.Metrics()
+
+    def plain():
+        return None
+    instrumented = registry.timed("bench")(plain)
+
+    def run_calls(func):
+        for _ in range(calls):
+            func()
+
+    def run_timer():
+        for _ in range(calls):
+            with registry.timer("bench"):
+                pass
+
+    yield "metrics.baseline", measure(lambda: run_calls(plain), repeat), calls
+    yield "metrics.timed_off", measure(lambda: run_calls(instrumented), repeat), calls
+    yield "metrics.timer_off", measure(run_timer, repeat), calls
+    registry.enabled = True
+    yield "metrics.timed_on", measure(lambda: run_calls(instrumented), repeat), calls
+    yield "metrics.timer_on", measure(run_timer, repeat), calls
+
+
+def bench_patch(sizes, repeat):
+    """Patch report (screened by crit profile) against re-scoring every unit under both catalogs"""
+    size = min(sizes[-1], 20000)
+    units = list(make_units(size).items())
+    old = dps_catalog.default_catalog()
+    patched = dict(dps_engine.DEFAULT_MODIFICATIONS, **{"Executor (+60% crit dmg)": {"type": "CDMG", "value": 0.65}})
+    new = dps_catalog.compile_catalog(patched)
+
+    def full():
+        for _, stats in units:
+            stats = tuple(UnitStats.from_dict(stats))
+            dps_engine.calculate(*stats, old)
+            dps_engine.calculate(*stats, new)
+    yield f"patch.full_rescore[{size}]", measure(full, repeat), size
+    yield f"patch.report[{size}]", measure(lambda: dps_patch.patch_report(units, old, new), repeat), size
+
+
+def bench_progression(sizes, repeat):
+    """Upgrade plans for a roster with 50 level snapshots per unit (memoized per unit and level)"""
+    import dps_progression
+    size = min(sizes[-1], 5000)
+    units = [(f"Unit {i // 50} lvl {i % 50 + 1}", stats) for i, stats in enumerate(make_units(size).values())]
+    tables = dps_progression.tables_from_units(units)
+    yield f"progression.plan_roster[{size}]", measure(lambda: dps_progression.plan_roster(units, 10, tables, slots=2), repeat), size
+
+
+def measure_memory(build):
+    """Bytes allocated by build() that are still alive while its result is held"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return allocated
+
+
+def bench_memory(sizes):
+    """Bytes per unit of each roster layout; yields (name, bytes per unit)"""
+    size = sizes[-1]
+    # Names are created up front (every layout needs them); stats are parsed from text
+    # like a JSON or SQLite load, so each layout pays for the float objects it keeps
+    rows = [(name, tuple(repr(stats[key]) for key in dps_store.STAT_KEYS)) for name, stats in make_units(size).items()]
+    layouts = {
+        "dict_of_dicts": lambda: {name: dict(zip(dps_store.STAT_KEYS, map(float, values))) for name, values in rows},
+        "unit_records": lambda: {name: UnitStats(*values) for name, values in rows},
+        "roster": lambda: Roster.from_items((name, UnitStats(*values)) for name, values in rows),
+    }
+    for layout, build in layouts.items():
+        yield f"memory.{layout}[{size}]", measure_memory(build) / size
+
+
+# --- Runner ---
+def run(sizes, repeat=3, use_tk=False):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        groups = [
+            bench_engine(sizes, repeat),
+            bench_batch(sizes, repeat),
+            bench_store(sizes, repeat, workdir),
+            bench_treeview(repeat, use_tk),
+            bench_metrics(repeat),
+            bench_patch(sizes, repeat),
+            bench_progression(sizes, repeat),
+        ]
+        for group in groups:
+            for name, seconds, items in group:
+                results[name] = {
+                    "seconds": seconds,
+                    "items": items,
+                    "items_per_s": items / seconds if seconds > 0 else None,
+                }
+                print(f"{name:<44}{seconds * 1000:>12.2f} ms", file=sys.stderr)
+    memory = {}
+    for name, bytes_per_unit in bench_memory(sizes):
+        memory[name] = {"bytes_per_unit": bytes_per_unit}
+        print(f"{name:<44}{bytes_per_unit:>12.0f} B/unit", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": list(sizes),
+            "repeat": repeat,
+        },
+        "results": results,
+        "memory": memory,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return (name, baseline s, current s, ratio) for every benchmark slower than baseline by more than tolerance"""
+    regressions = []
+    for name, entry in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["seconds"]:
+            continue
+        ratio = entry["seconds"] / base["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, base["seconds"], entry["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DPS engine, tier assignment, unit store and results view.")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Roster sizes (default: 1000 100000 1000000).")
+    parser.add_argument("--quick", action="store_true", help="Only run the 1k roster size.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best time is kept.")
+    parser.add_argument("--tk", action="store_true", help="Use a real Treeview (needs a display, e.g. Xvfb) instead of the mock.")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file ('-' for stdout).")
+    parser.add_argument("--save-baseline", help="Store the results as a baseline file.")
+    parser.add_argument("--baseline", help="Compare against a stored baseline and fail on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown ratio (default 0.25).")
+    args = parser.parse_args(argv)
+
+    sizes = tuple(args.sizes) if args.sizes else (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    current = run(sorted(sizes), args.repeat, args.tk)
+
+    if args.json_path == "-":
+        json.dump(current, sys.stdout, indent=4)
+        print()
+    elif args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# --- Persistent Result Cache ---
+# Keeps dps_engine.calculate results in an SQLite file (dps_results_cache.db)
+# so unchanged units are not re-scored after a restart.
+#
+# Entries are keyed by a hash of the unit's four stats plus the modification
+# catalog version, so editing a unit or the catalog simply misses and stale
+# entries age out through LRU eviction once the size limit is reached.
+#
+# Results are stored as compact binary rows (decoding JSON took as long as
+# recomputing): a header with the two base DPS values and the result count,
+# then mod-name indices, DPS values, percent changes and one tier character
+# per result. Mod names are stored once per catalog version. Arrays use the
+# native byte order, as the cache never leaves the machine that wrote it.
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+from array import array
+
+import dps_engine
+import dps_metrics
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICT_TO_RATIO = 0.9  # Evict down to this share of max_bytes so eviction does not run on every commit
+HEADER = struct.Struct("=2dI")  # base_dps_no_crit, base_dps_with_crit, result count
+
+
+def unit_hash(dmg, atk_speed, crit_chance, crit_dmg):
+    """Content hash of a unit's stats (-0.0 and 0.0 hash alike)"""
+    packed = struct.pack("<4d", *(float(v) + 0.0 for v in (dmg, atk_speed, crit_chance, crit_dmg)))
+    return hashlib.sha1(packed).hexdigest()[:16]
+
+
+class DiskResultCache:
+    """Result cache stored in SQLite with a byte limit and LRU eviction
+
+    Uses the same keys as dps_engine.ResultCache (four stats plus catalog
+    version) and can serve as its `backing` store. Writes become durable on
+    `commit()`, which also evicts least recently used entries when the stored
+    results exceed max_bytes. Hit/miss counters are kept in the file so
+    `stats()` reports the hit rate across runs.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, catalog TEXT NOT NULL, result BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS catalogs (version TEXT PRIMARY KEY, names TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+        self.total_bytes, self.clock = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM results"
+        ).fetchone()
+        self._catalog_names = {}  # version -> (names list, name -> index)
+
+    make_key = staticmethod(dps_engine.ResultCache.make_key)
+
+    @staticmethod
+    def _row_key(key):
+        return unit_hash(*key[:4]) + ":" + key[4]
+
+    def _tick(self):
+        self.clock += 1
+        return self.clock
+
+    def _names(self, version):
+        """Mod names of a catalog version and their index, loaded on first use"""
+        entry = self._catalog_names.get(version)
+        if entry is None:
+            row = self.conn.execute("SELECT names FROM catalogs WHERE version = ?", (version,)).fetchone()
+            names = json.loads(row[0]) if row else []
+            entry = self._catalog_names[version] = (names, {name: i for i, name in enumerate(names)})
+        return entry
+
+    def _encode(self, version, result):
+        rows = result["results"]
+        names, index = self._names(version)
+        new_names = [res["name"] for res in rows if res["name"] not in index]
+        if new_names:
+            for name in new_names:
+                index[name] = len(names)
+                names.append(name)
+            self.conn.execute("INSERT OR REPLACE INTO catalogs (version, names) VALUES (?, ?)",
+                              (version, json.dumps(names)))
+        return b"".join((
+            HEADER.pack(result["base_dps_no_crit"], result["base_dps_with_crit"], len(rows)),
+            array("I", [index[res["name"]] for res in rows]).tobytes(),
+            array("d", [res["dps"] for res in rows]).tobytes(),
+            array("d", [res["percent_change"] for res in rows]).tobytes(),
+            "".join(res["tier"] for res in rows).encode("utf-8"),
+        ))
+
+    def _decode(self, version, blob):
+        base_no_crit, base_with_crit, count = HEADER.unpack_from(blob)
+        offset = HEADER.size
+        columns = []
+        for typecode in ("I", "d", "d"):
+            column = array(typecode)
+            end = offset + count * column.itemsize
+            column.frombytes(blob[offset:end])
+            columns.append(column)
+            offset = end
+        names = self._names(version)[0]
+        return {
+            "base_dps_no_crit": base_no_crit,
+            "base_dps_with_crit": base_with_crit,
+            "results": [{"name": names[i], "dps": dps, "tier": tier, "percent_change": change}
+                        for i, dps, change, tier in zip(*columns, blob[offset:].decode("utf-8"))],
+        }
+
+    @dps_metrics.timed("cache.get")
+    def get(self, key):
+        """Return the cached result for key (or None), marking it as recently used"""
+        row_key = self._row_key(key)
+        row = self.conn.execute("SELECT result FROM results WHERE key = ?", (row_key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (self._tick(), row_key))
+        return self._decode(key[4], row[0])
+
+    @dps_metrics.timed("cache.put")
+    def put(self, key, result):
+        row_key = self._row_key(key)
+        blob = self._encode(key[4], result)
+        old = self.conn.execute("SELECT size FROM results WHERE key = ?", (row_key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, catalog, result, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (row_key, key[4], blob, len(blob), self._tick()),
+        )
+        self.total_bytes += len(blob) - (old[0] if old else 0)
+
+    def calculate(self, dmg, atk_speed, crit_chance, crit_dmg, modifications=None):
+        """Same as dps_engine.calculate, served from the cache when possible"""
+        key = self.make_key(dmg, atk_speed, crit_chance, crit_dmg, modifications)
+        result = self.get(key)
+        if result is None:
+            result = dps_engine.calculate(dmg, atk_speed, crit_chance, crit_dmg, modifications)
+            self.put(key, result)
+        return result
+
+    def evict_if_needed(self):
+        """Drop least recently used entries until the results fit in max_bytes; returns the count"""
+        if self.total_bytes <= self.max_bytes:
+            return 0
+        excess = self.total_bytes - int(self.max_bytes * EVICT_TO_RATIO)
+        doomed = []
+        for row_key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if excess <= 0:
+                break
+            doomed.append((row_key,))
+            excess -= size
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        return len(doomed)
+
+    def _add_counters(self):
+        """Fold this session's hits/misses into the totals stored in the file"""
+        self.conn.executemany(
+            "INSERT INTO meta (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (("hits", self.hits), ("misses", self.misses)),
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @dps_metrics.timed("cache.commit")
+    def commit(self):
+        self._add_counters()
+        self.evict_if_needed()
+        self.conn.commit()
+
+    def stats(self):
+        """Entry count, bytes, hit rate (all runs) and entries per catalog version"""
+        counters = dict(self.conn.execute("SELECT name, value FROM meta"))
+        hits = counters.get("hits", 0) + self.hits
+        misses = counters.get("misses", 0) + self.misses
+        file_bytes = sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+        return {
+            "entries": self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "result_bytes": self.total_bytes,
+            "file_bytes": file_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "catalogs": dict(self.conn.execute("SELECT catalog, COUNT(*) FROM results GROUP BY catalog")),
+        }
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        self.conn.execute("DELETE FROM results")
+        self.conn.execute("DELETE FROM catalogs")
+        self.conn.execute("DELETE FROM meta")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._catalog_names.clear()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -1,9 +1,20 @@
+import time
+_STARTUP_T0 = time.perf_counter() # Reference point for --profile-startup
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
 import os
+import sqlite3
 import ctypes # For DPI awareness on Windows
 import sys # Added for PyInstaller path handling
+from collections import deque
+
+import dps_cache
+import dps_catalog
+import dps_engine
+import dps_metrics
+import dps_store
+from dps_roster import DEFAULT_UNITS, UnitStats
 
 # --- DPI Awareness for Windows ---
 try:
@@ -38,10 +49,223 @@ class Tooltip:
             self.tw.destroy()
         self.tw = None
 
+# --- Startup Profiler ---
+class StartupProfiler:
+    """Collects per-phase startup timings for --profile-startup"""
+
+    def __init__(self, start=_STARTUP_T0):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        """Record the time spent since the previous mark under `phase`"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"{phase:<28}{seconds * 1000:>9.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<28}{(self.last - self.start) * 1000:>9.1f} ms")
+        return "\n".join(lines)
+
+    def as_dict(self):
+        return {
+            "frozen": bool(getattr(sys, 'frozen', False)),
+            "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in self.phases},
+            "total_ms": round((self.last - self.start) * 1000, 3),
+        }
+
+# --- Results Treeview Updater ---
+class ResultsTreeView:
+    """Keeps the results Treeview in sync with a sorted result list.
+
+    Rows use the modification name as iid, so a recalculation only moves or
+    edits rows that changed instead of rebuilding the whole list. Long lists
+    are paged, not virtualized: a new result shows its first page, and the
+    next page is appended whenever the user scrolls near the bottom, so the
+    Treeview holds every row scrolled past until the next result.
+    """
+    PAGING_THRESHOLD = 200  # Lists longer than this are rendered page by page
+    PAGE_SIZE = 100
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = []  # All (iid, values) pairs of the current result list
+        self.row_state = {}  # iid -> (values, tags) currently in the Treeview
+        self.materialized = 0
+        self.page_pending = False
+        self.tree.configure(yscrollcommand=self.on_yscroll)
+
+    def show(self, results):
+        """Display results (sorted dicts from dps_engine.calculate)"""
+        self.rows = [(res["name"], (
+            res["tier"],
+            res["name"],
+            f"{res['dps']:.2f}",
+            f"{res['percent_change']:>+8.2f}%"
+        )) for res in results]
+        if len(self.rows) <= self.PAGING_THRESHOLD:
+            count = len(self.rows)
+        else:
+            count = self.PAGE_SIZE  # Start over, or every recalculation re-renders all pages scrolled through so far
+        self.sync(count)
+
+    def clear(self):
+        self.rows = []
+        self.sync(0)
+
+    @dps_metrics.timed("gui.tree_sync")
+    def sync(self, count):
+        """Make the Treeview show exactly the first `count` rows"""
+        wanted = self.rows[:count]
+        wanted_iids = {iid for iid, _ in wanted}
+
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted_iids]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self.row_state.pop(iid, None)
+
+        order = list(self.tree.get_children())
+        for index, (iid, values) in enumerate(wanted):
+            tags = ("evenrow" if index % 2 == 0 else "oddrow",)
+            if iid not in self.row_state:
+                self.tree.insert("", index, iid=iid, tags=tags, values=values)
+                order.insert(index, iid)
+            else:
+                if order[index] != iid:
+                    self.tree.move(iid, "", index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+                if self.row_state[iid] != (values, tags):
+                    self.tree.item(iid, values=values, tags=tags)
+            self.row_state[iid] = (values, tags)
+        self.materialized = count
+
+    def on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Materialize the next page once the user gets near the bottom
+        if float(last) >= 0.9 and self.materialized < len(self.rows) and not self.page_pending:
+            self.page_pending = True
+            self.tree.after_idle(self.load_next_page)
+
+    def load_next_page(self):
+        self.page_pending = False
+        self.sync(min(len(self.rows), self.materialized + self.PAGE_SIZE))
+
+# --- Metrics Debug Panel ---
+class MetricsPanel:
+    """Debug window (F12) listing the dps_metrics timers and counters, refreshed every second"""
+    REFRESH_MS = 1000
+    RECORDING_OFF = "Recording is off"
+
+    def __init__(self, master, dump_path):
+        self.dump_path = dump_path
+        self.window = tk.Toplevel(master)
+        self.window.title("Metrics")
+        self.window.geometry("640x420")
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=5, pady=5)
+        self.enabled_var = tk.BooleanVar(value=dps_metrics.metrics.enabled)
+        ttk.Checkbutton(controls, text="Record", variable=self.enabled_var, command=self.toggle).pack(side="left")
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side="left", padx=5)
+        ttk.Button(controls, text="Save JSON", command=self.save).pack(side="left")
+        self.status_label = ttk.Label(controls, text="")
+        self.status_label.pack(side="right")
+
+        columns = ("count", "mean", "p50", "p99", "max")
+        self.tree = ttk.Treeview(self.window, columns=columns, height=12)
+        self.tree.heading("#0", text="Metric")
+        self.tree.column("#0", width=200, anchor="w")
+        for column, title in zip(columns, ("Count", "Mean ms", "p50 ms", "p99 ms", "Max ms")):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=80, anchor="e")
+        self.tree.pack(fill="both", expand=True, padx=5)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_histogram())
+
+        # Recent-sample histogram of the selected timer, one text bar per bucket
+        self.histogram_label = ttk.Label(self.window, text="", font=("Consolas", 9), justify="left", anchor="w")
+        self.histogram_label.pack(fill="x", padx=5, pady=5)
+        self.snapshot = {}
+        self.refresh()
+
+    def toggle(self):
+        dps_metrics.metrics.enabled = self.enabled_var.get()
+        self.show_recording_status(dps_metrics.metrics.enabled)
+
+    def reset(self):
+        dps_metrics.metrics.reset()
+        self.refresh(reschedule=False)
+
+    def save(self):
+        try:
+            dps_metrics.metrics.dump(self.dump_path)
+            self.status_label.config(text=f"Saved {os.path.basename(self.dump_path)}")
+        except OSError as e:
+            messagebox.showerror("Save Error", f"Could not save metrics: {e}", parent=self.window)
+
+    def refresh(self, reschedule=True):
+        if not self.window.winfo_exists():
+            return
+        self.snapshot = dps_metrics.metrics.snapshot()
+        fmt = lambda value: f"{value:.3f}" if value is not None else ""
+        rows = [(f"timer:{name}", (entry["count"], fmt(entry["mean_ms"]), fmt(entry["p50_ms"]), fmt(entry["p99_ms"]), fmt(entry["max_ms"])))
+                for name, entry in self.snapshot["timers"].items()]
+        rows += [(f"counter:{name}", (value, "", "", "", "")) for name, value in self.snapshot["counters"].items()]
+        wanted = {iid for iid, _ in rows}
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+        for index, (iid, values) in enumerate(rows):
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", index, iid=iid, text=iid.partition(":")[2], values=values)
+        self.show_recording_status(self.snapshot["enabled"])
+        self.show_histogram()
+        if reschedule:
+            self.window.after(self.REFRESH_MS, self.refresh)
+
+    def show_recording_status(self, enabled):
+        """Show "Recording is off" while disabled; clear it (but not a save message) once enabled"""
+        if not enabled:
+            self.status_label.config(text=self.RECORDING_OFF)
+        elif self.status_label.cget("text") == self.RECORDING_OFF:
+            self.status_label.config(text="")
+
+    def show_histogram(self):
+        selection = self.tree.selection()
+        entry = self.snapshot.get("timers", {}).get(selection[0].partition(":")[2]) if selection else None
+        if entry is None or not entry["window"]:
+            self.histogram_label.config(text="Select a timer to see its recent distribution.")
+            return
+        counts = entry["histogram"]
+        bounds = self.snapshot["buckets_ms"]
+        labels = [f"<= {bound:g} ms" for bound in bounds] + [f"> {bounds[-1]:g} ms"]
+        peak = max(counts)
+        self.histogram_label.config(text="\n".join(
+            f"{label:>12} {'#' * round(40 * count / peak):<40} {count}" for label, count in zip(labels, counts) if count
+        ))
+
 # --- Main Application Class ---
 class DPSCalculatorApp:
-    def __init__(self, master):
+    UNIT_PAGE_SIZE = 50  # Units listed per page in the unit selector
+    UNIT_SEARCH_DELAY_MS = 200
+
+    # Live recalculation while typing
+    LIVE_DEBOUNCE_MS = 150  # Quiet time after the last keystroke before recalculating
+    LIVE_MAX_WAIT_MS = 500  # Upper bound on keystroke-to-calculation delay during continuous typing
+    FRAME_BUDGET_S = 0.016  # Calculations slower than one frame run off the Tk main loop
+    CATALOG_POLL_MS = 2000  # How often modifications.json is checked for changes
+    TIER_MODES = ["0.01 steps"] + [f"{count} tiers" for count in range(2, len(dps_engine.TIERS) + 1)]
+
+    def __init__(self, master, profiler=None):
         self.master = master
+        self.profiler = profiler
+        self.mark = profiler.mark if profiler else (lambda phase: None)
         master.title("DPS Calculator")
         master.geometry("580x700") # Changed default window size to 580x700
 
@@ -68,32 +292,16 @@ class DPSCalculatorApp:
 
         master.configure(bg=self.themes[self.current_theme]["root_bg"])
 
-        self.modifications = {
-            "Powerful (+50% damage)": {"type": "DMG", "value": 0.50},
-            "Lightning (-35% cooldown)": {"type": "CD", "value": 0.35},
-            "Executor (+60% crit dmg)": {"type": "CDMG", "value": 0.60},
-            "Assassin (+35% crit chance)": {"type": "CC", "value": 0.35},
-            "Trickster (-20% cooldown)": {"type": "CD", "value": 0.20},
-            "BodyBuilder (+25% damage)": {"type": "DMG", "value": 0.25},
-            "Accurate (+20% crit chance)": {"type": "CC", "value": 0.20},
-            "Strong (+10% damage)": {"type": "DMG", "value": 0.10},
-            "Fast (-10% cooldown)": {"type": "CD", "value": 0.10},
-        }
+        self.modifications = dps_catalog.default_catalog()
+        self.result_cache = dps_engine.ResultCache()
+        self.displayed_result_key = None  # (cache key, tier count) of the results currently shown in the Treeview
+        self.last_calc_seconds = 0.0
 
-        self.default_units_config = {
-            "Medusa lvl 25": {
-                "dmg": 145.0,
-                "atk_speed": 0.04,
-                "crit_chance": 30.0,
-                "crit_dmg": 175.0
-            },
-            "Beachcomber lvl 25": {
-                "dmg": 129.0,
-                "atk_speed": 0.04,
-                "crit_chance": 60.0,
-                "crit_dmg": 200.0
-            },
-        }
+        self.live_after_id = None
+        self.live_burst_start = None
+        self.live_generation = 0
+        self.live_executor = None
+        self.live_latencies_ms = deque(maxlen=100)
 
         # Determine the correct base path for read/write files when bundled by PyInstaller
         if getattr(sys, 'frozen', False):
@@ -101,21 +309,34 @@ class DPSCalculatorApp:
         else:
             self.app_dir = os.path.dirname(__file__)
 
-        self.units_file = os.path.join(self.app_dir, "dps_units.json")
+        self.units_file = os.path.join(self.app_dir, "dps_units.json")  # Legacy format, imported on first run
+        self.units_db_file = os.path.join(self.app_dir, "dps_units.db")
+        self.results_cache_file = os.path.join(self.app_dir, "dps_results_cache.db")
+        # Optional custom modification catalog; replaces the built-in table while present
+        self.catalog_file = os.path.join(self.app_dir, "modifications.json")
+        self.catalog_watcher = dps_catalog.CatalogWatcher(self.catalog_file)
+        self.reload_catalog(show_errors=True)
+        self.mark("app setup")
         self.load_units()
+        self.mark("load_units")
+        self.load_result_cache()
+        self.mark("load_result_cache")
         
         # --- CRITICAL: create_widgets() must be called BEFORE functions that use the widgets ---
         self.create_widgets()
+        self.mark("create_widgets")
         self.load_last_settings()
+        self.mark("load_last_settings")
         
         # Add window close handler
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        self.ensure_default_units()
-        self.save_units()
-        self.update_unit_combobox()
         self.apply_theme()
+        self.mark("apply_theme")
         self.calculate_dps()
+        self.mark("calculate_dps")
+        # Unit list upkeep is not needed for the first frame; run it once the window is drawn
+        self.master.after_idle(self.finish_startup)
         
         # Keyboard shortcuts
         self.master.bind('<Control-s>', lambda e: self.save_current_unit())
@@ -123,6 +344,60 @@ class DPSCalculatorApp:
         self.master.bind('<Control-d>', lambda e: self.delete_selected_unit())
         self.master.bind('<Return>', lambda e: self.calculate_dps())
         self.master.bind('<Escape>', lambda e: self.clear_fields())
+        self.master.bind('<F12>', lambda e: self.open_metrics_panel())
+        self.metrics_panel = None
+
+    def finish_startup(self):
+        """Deferred startup work, run after the first paint"""
+        self.master.update_idletasks() # Flush pending geometry and redraws so the first frame is complete
+        self.mark("first paint")
+        self.ensure_default_units()
+        self.mark("ensure_default_units")
+        self.update_unit_combobox()
+        self.mark("update_unit_combobox")
+        self.master.after(self.CATALOG_POLL_MS, self.poll_catalog)
+        if self.profiler:
+            self.report_startup_profile()
+
+    def report_startup_profile(self):
+        """Print the startup timings, save them as JSON next to the app and exit"""
+        report = self.profiler.report()
+        if sys.stderr:  # None in the windowed PyInstaller build
+            print(report, file=sys.stderr)
+        try:
+            with open(os.path.join(self.app_dir, "startup_profile.json"), "w", encoding='utf-8') as f:
+                json.dump(self.profiler.as_dict(), f, indent=4)
+        except OSError:
+            pass
+        self.on_closing()
+
+    def open_metrics_panel(self):
+        if self.metrics_panel is not None and self.metrics_panel.window.winfo_exists():
+            self.metrics_panel.window.lift()
+        else:
+            self.metrics_panel = MetricsPanel(self.master, os.path.join(self.app_dir, "metrics.json"))
+
+    def reload_catalog(self, show_errors=False):
+        """Hot-swap the compiled modification catalog if modifications.json changed; returns True on swap"""
+        try:
+            catalog = self.catalog_watcher.poll()
+        except (ValueError, OSError) as e:
+            if show_errors:
+                messagebox.showwarning("Catalog Warning",
+                                       f"Could not load {os.path.basename(self.catalog_file)}. Keeping the current modifications.\nError: {e}")
+            return False
+        if catalog is None:
+            return False
+        if self.catalog_watcher.removed and show_errors:
+            messagebox.showinfo("Catalog",
+                                f"{os.path.basename(self.catalog_file)} was removed. Using the built-in modifications.")
+        self.modifications = catalog
+        return True
+
+    def poll_catalog(self):
+        if self.reload_catalog(show_errors=True):
+            self.calculate_dps() # New catalog version means a new cache key, so this redraws
+        self.master.after(self.CATALOG_POLL_MS, self.poll_catalog)
 
     def validate_numeric_input(self, value):
         """Validate that input is a valid number"""
@@ -137,6 +412,11 @@ class DPSCalculatorApp:
     def on_closing(self):
         """Handle window closing"""
         self.save_last_settings()
+        self.units.close()
+        if self.result_cache.backing is not None:
+            self.result_cache.backing.close()
+        if self.live_executor is not None:
+            self.live_executor.shutdown(wait=False)
         self.master.destroy()
 
     def create_widgets(self):
@@ -179,26 +459,62 @@ class DPSCalculatorApp:
         self.clear_button = ttk.Button(self.stats_frame, text="Clear Fields", command=self.clear_fields, style="TButton")
         self.clear_button.grid(row=len(labels_texts)+1, column=0, columnspan=2, pady=5, sticky="ew")
 
+        self.live_var = tk.BooleanVar(value=False)
+        self.live_checkbutton = ttk.Checkbutton(self.stats_frame, text="Live update", variable=self.live_var, style="TCheckbutton")
+        self.live_checkbutton.grid(row=len(labels_texts)+2, column=0, sticky="w")
+        Tooltip(self.live_checkbutton, "Recalculate automatically while typing.")
+        self.live_status_label = ttk.Label(self.stats_frame, text="", font=self.info_label_font, anchor="e")
+        self.live_status_label.grid(row=len(labels_texts)+2, column=1, sticky="e")
+        for var in (self.dmg_var, self.atk_speed_var, self.crit_chance_var, self.crit_dmg_var):
+            var.trace_add("write", self.on_stat_changed)
+
+        self.tier_mode_label = ttk.Label(self.stats_frame, text="Tiers:", font=self.label_font)
+        self.tier_mode_label.grid(row=len(labels_texts)+3, column=0, sticky="w", pady=2)
+        self.tier_mode_combobox = ttk.Combobox(self.stats_frame, values=self.TIER_MODES, width=13, font=self.label_font,
+                                               state="readonly", style="TCombobox")
+        self.tier_mode_combobox.set(self.TIER_MODES[0])
+        self.tier_mode_combobox.grid(row=len(labels_texts)+3, column=1, sticky="ew", pady=2)
+        self.tier_mode_combobox.bind("<<ComboboxSelected>>", lambda e: self.calculate_dps())
+        Tooltip(self.tier_mode_combobox, "0.01 steps: a new tier wherever DPS changes.\nA number: split the list into that many natural tiers.")
+
         # --- Section 2: Unit Selector ---
         self.units_frame = tk.LabelFrame(self.master, text="Unit Selector", font=self.header_font, padx=10, pady=10)
         self.units_frame.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
 
-        ttk.Label(self.units_frame, text="Select Unit:", font=self.label_font).grid(row=0, column=0, sticky="w", pady=2)
+        ttk.Label(self.units_frame, text="Search:", font=self.label_font).grid(row=0, column=0, sticky="w", pady=2)
+        self.unit_search_var = tk.StringVar()
+        self.unit_search_entry = ttk.Entry(self.units_frame, textvariable=self.unit_search_var, width=25, font=self.label_font, style="TEntry")
+        self.unit_search_entry.grid(row=0, column=1, sticky="ew", pady=2)
+        Tooltip(self.unit_search_entry, "Type the beginning of a unit name to filter the list.")
+        self.unit_search_after_id = None
+        self.unit_page = 0
+        self.unit_search_var.trace_add("write", self.on_unit_search_changed)
+
+        ttk.Label(self.units_frame, text="Select Unit:", font=self.label_font).grid(row=1, column=0, sticky="w", pady=2)
         self.unit_combobox = ttk.Combobox(self.units_frame, width=23, font=self.label_font, state="readonly", style="TCombobox")
-        self.unit_combobox.grid(row=0, column=1, sticky="ew", pady=2)
+        self.unit_combobox.grid(row=1, column=1, sticky="ew", pady=2)
         self.unit_combobox.bind("<<ComboboxSelected>>", self.on_unit_select)
 
-        ttk.Label(self.units_frame, text="Unit Name:", font=self.label_font).grid(row=1, column=0, sticky="w", pady=2)
+        self.unit_pager_frame = tk.Frame(self.units_frame)
+        self.unit_pager_frame.grid(row=2, column=0, sticky="w", pady=2)
+        self.unit_prev_button = ttk.Button(self.unit_pager_frame, text="<", width=3, command=lambda: self.change_unit_page(-1), style="TButton")
+        self.unit_prev_button.pack(side="left")
+        self.unit_next_button = ttk.Button(self.unit_pager_frame, text=">", width=3, command=lambda: self.change_unit_page(1), style="TButton")
+        self.unit_next_button.pack(side="left", padx=(2, 0))
+        self.unit_page_label = ttk.Label(self.units_frame, text="", font=self.info_label_font, anchor="e")
+        self.unit_page_label.grid(row=2, column=1, sticky="e", pady=2)
+
+        ttk.Label(self.units_frame, text="Unit Name:", font=self.label_font).grid(row=3, column=0, sticky="w", pady=2)
         self.unit_name_entry = ttk.Entry(self.units_frame, width=25, font=self.label_font, style="TEntry")
-        self.unit_name_entry.grid(row=1, column=1, sticky="ew", pady=2)
+        self.unit_name_entry.grid(row=3, column=1, sticky="ew", pady=2)
         Tooltip(self.unit_name_entry, "Enter a name to save current stats as a new unit configuration.")
 
         #self.load_unit_button = ttk.Button(self.units_frame, text="Load Unit", command=self.load_selected_unit, style="TButton")
         #self.load_unit_button.grid(row=2, column=0, columnspan=2, pady=5, sticky="ew")
         self.save_unit_button =self.save_unit_button = ttk.Button(self.units_frame, text="Save Custom Unit", command=self.save_current_unit, style="TButton")
-        self.save_unit_button.grid(row=2, column=0, columnspan=2, pady=5, sticky="ew")
+        self.save_unit_button.grid(row=4, column=0, columnspan=2, pady=5, sticky="ew")
         self.delete_unit_button = ttk.Button(self.units_frame, text="Delete Selected Unit", command=self.delete_selected_unit, style="TButton")
-        self.delete_unit_button.grid(row=3, column=0, columnspan=2, pady=5, sticky="ew")
+        self.delete_unit_button.grid(row=5, column=0, columnspan=2, pady=5, sticky="ew")
 
         self.units_frame.grid_columnconfigure(1, weight=1)
         self.units_frame.grid_columnconfigure(0, weight=0)
@@ -243,7 +559,8 @@ class DPSCalculatorApp:
         # --- Dynamic Scrollbars ---
         vsb = ttk.Scrollbar(self.results_frame, orient="vertical", command=self.results_tree.yview)
         hsb = ttk.Scrollbar(self.results_frame, orient="horizontal", command=self.results_tree.xview)
-        self.results_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.results_tree.configure(xscrollcommand=hsb.set)
+        self.results_view = ResultsTreeView(self.results_tree, vsb)
 
         self.results_tree.pack(side="left", fill="both", expand=True)
 
@@ -261,6 +578,7 @@ class DPSCalculatorApp:
         self.results_frame.grid_columnconfigure(0, weight=1)
         self.results_frame.grid_rowconfigure(0, weight=1)
 
+    @dps_metrics.timed("gui.check_scrollbars")
     def check_scrollbars(self, event=None):
         """Dynamically show/hide scrollbars based on content"""
         # Vertical scrollbar
@@ -300,6 +618,7 @@ class DPSCalculatorApp:
             if self.hsb_widget.winfo_ismapped():
                 self.hsb_widget.pack_forget()
 
+    @dps_metrics.timed("gui.apply_theme")
     def apply_theme(self):
         theme_colors = self.themes[self.current_theme]
 
@@ -308,13 +627,17 @@ class DPSCalculatorApp:
         for frame in [self.stats_frame, self.units_frame, self.results_frame]:
             frame.config(bg=theme_colors["frame_bg"], fg=theme_colors["fg_color"])
 
-        for label in self.stat_labels:
+        for label in self.stat_labels + [self.tier_mode_label]:
             label.config(background=theme_colors["frame_bg"], foreground=theme_colors["fg_color"])
         for widget in self.units_frame.winfo_children():
             if isinstance(widget, ttk.Label):
                 widget.config(background=theme_colors["frame_bg"], foreground=theme_colors["fg_color"])
+        self.unit_page_label.config(foreground=theme_colors["info_text_fg"])
+        self.unit_pager_frame.config(bg=theme_colors["frame_bg"])
         
         self.results_info_label.config(background=theme_colors["frame_bg"], foreground=theme_colors["info_text_fg"])
+        self.live_status_label.config(background=theme_colors["frame_bg"], foreground=theme_colors["info_text_fg"])
+        self.style.configure('TCheckbutton', background=theme_colors["frame_bg"], foreground=theme_colors["fg_color"], font=self.label_font)
         self.base_dps_no_crit_label.config(background=theme_colors["frame_bg"], foreground=theme_colors["fg_color"])
         self.base_dps_with_crit_label.config(background=theme_colors["frame_bg"], foreground=theme_colors["fg_color"])
         self.base_dps_header_container.config(bg=theme_colors["frame_bg"])
@@ -326,6 +649,7 @@ class DPSCalculatorApp:
         for entry in self.stat_entries:
             entry.update_idletasks()
         self.unit_name_entry.update_idletasks()
+        self.unit_search_entry.update_idletasks()
 
         self.style.configure('TButton',
                              background=theme_colors["button_bg"],
@@ -370,8 +694,6 @@ class DPSCalculatorApp:
         self.style.configure("Horizontal.TScrollbar", background=theme_colors["button_bg"], troughcolor=theme_colors["frame_bg"], bordercolor=theme_colors["frame_bg"])
         self.style.map("Horizontal.TScrollbar", background=[('active', theme_colors["tree_selected_bg"])])
 
-        self.calculate_dps()
-
     def clear_fields(self):
         self.dmg_var.set(0.0)
         self.atk_speed_var.set(0.0)
@@ -379,31 +701,64 @@ class DPSCalculatorApp:
         self.crit_dmg_var.set(0.0)
         self.base_dps_no_crit_label.config(text="")
         self.base_dps_with_crit_label.config(text="")
-        self.results_tree.delete(*self.results_tree.get_children())
+        self.results_view.clear()
+        self.displayed_result_key = None
 
+    @dps_metrics.timed("store.load_units")
     def load_units(self):
-        """Load units from JSON file with better error handling"""
-        if os.path.exists(self.units_file):
+        """Open the unit store, importing dps_units.json the first time
+
+        Only the store is opened here; unit names are fetched one page at a
+        time by the selector and stats are read when a unit is loaded.
+        """
+        first_run = not os.path.exists(self.units_db_file)
+        store = None
+        try:
+            store = dps_store.UnitStore(self.units_db_file)
+            store.conn.execute("SELECT 1 FROM units LIMIT 1")
+        except sqlite3.DatabaseError as e:
+            if store is not None:
+                store.conn.close()  # Windows cannot rename a file that is still open
+            message = f"Could not load saved units. Starting fresh.\nError: {e}"
+            # Keep the corrupted file as a backup and start a new store
+            backup_file = self.units_db_file + ".backup"
             try:
-                with open(self.units_file, "r", encoding='utf-8') as f:
-                    content = f.read()
-                    if content.strip():  # Check if file is not empty
-                        self.units = json.loads(content)
-                    else:
-                        self.units = {}
+                os.replace(self.units_db_file, backup_file)
+                self.units = dps_store.UnitStore(self.units_db_file)
+            except (OSError, sqlite3.DatabaseError) as rename_error:
+                # The damaged file is still in the way, so units live in memory for this session
+                message += (f"\n\nThe damaged file could not be moved to {os.path.basename(backup_file)}: {rename_error}"
+                            "\nUnits saved in this session will not be kept.")
+                self.units = dps_store.UnitStore(":memory:")
+            messagebox.showwarning("Load Warning", message)
+            return
+        self.units = store
+
+        if first_run and os.path.exists(self.units_file):
+            skipped = []
+            try:
+                self.units.import_json(self.units_file, skipped)
             except (json.JSONDecodeError, IOError) as e:
                 messagebox.showwarning("Load Warning", 
-                                     f"Could not load saved units. Starting fresh.\nError: {e}")
-                self.units = {}
-                # Create backup of corrupted file
-                try:
-                    import shutil
-                    backup_path = self.units_file + ".backup"
-                    shutil.copy2(self.units_file, backup_path)
-                except:
-                    pass
-        else:
-            self.units = {}
+                                     f"Could not import saved units from {os.path.basename(self.units_file)}.\nError: {e}")
+            if skipped:
+                shown = "\n".join(f"{name}: {error}" for name, error in skipped[:10])
+                more = f"\n...and {len(skipped) - 10} more" if len(skipped) > 10 else ""
+                messagebox.showwarning("Load Warning",
+                                       f"Skipped {len(skipped)} malformed units in {os.path.basename(self.units_file)}:\n{shown}{more}")
+
+    @dps_metrics.timed("cache.open")
+    def load_result_cache(self):
+        """Back the in-memory result cache with dps_results_cache.db so results survive restarts"""
+        try:
+            self.result_cache.backing = dps_cache.DiskResultCache(self.results_cache_file)
+        except sqlite3.DatabaseError:
+            # The cache only saves work; a damaged file is discarded and rebuilt
+            try:
+                os.remove(self.results_cache_file)
+                self.result_cache.backing = dps_cache.DiskResultCache(self.results_cache_file)
+            except (OSError, sqlite3.DatabaseError):
+                self.result_cache.backing = None
 
     def save_last_settings(self):
         """Save current settings for next app launch"""
@@ -412,7 +767,8 @@ class DPSCalculatorApp:
             "last_atk_speed": self.atk_speed_var.get(),
             "last_crit_chance": self.crit_chance_var.get(),
             "last_crit_dmg": self.crit_dmg_var.get(),
-            "last_selected_unit": self.unit_combobox.get() if hasattr(self, 'unit_combobox') else ""
+            "last_selected_unit": self.unit_combobox.get() if hasattr(self, 'unit_combobox') else "",
+            "tier_mode": self.tier_mode_combobox.get() if hasattr(self, 'tier_mode_combobox') else ""
         }
         settings_file = os.path.join(self.app_dir, "last_settings.json")
         try:
@@ -432,51 +788,72 @@ class DPSCalculatorApp:
                     self.atk_speed_var.set(settings.get("last_atk_speed", 0.04))
                     self.crit_chance_var.set(settings.get("last_crit_chance", 30.0))
                     self.crit_dmg_var.set(settings.get("last_crit_dmg", 175.0))
+                    if settings.get("tier_mode") in self.TIER_MODES:
+                        self.tier_mode_combobox.set(settings["tier_mode"])
                     if hasattr(self, 'unit_combobox') and settings.get("last_selected_unit"):
                         if settings["last_selected_unit"] in self.units:
                             self.unit_combobox.set(settings["last_selected_unit"])
             except:
                 pass  # Use defaults if can't load
 
+    @dps_metrics.timed("store.save_units")
     def save_units(self):
-        with open(self.units_file, "w") as f:
-            json.dump(self.units, f, indent=4)
+        """Commit pending unit changes (only the changed rows are written)"""
+        self.units.commit()
 
     def ensure_default_units(self):
-        default_units_to_ensure = {
-            "Medusa lvl 25": {
-                "dmg": 145.0,
-                "atk_speed": 0.04,
-                "crit_chance": 30.0,
-                "crit_dmg": 175.0
-            },
-            "Beachcomber lvl 25": {
-                "dmg": 129.0,
-                "atk_speed": 0.04,
-                "crit_chance": 60.0,
-                "crit_dmg": 200.0
-            },
-        }
-
         changes_made = False
-        for unit_name, unit_stats in default_units_to_ensure.items():
+        for unit_name, unit_stats in DEFAULT_UNITS.items():
             if unit_name not in self.units:
                 self.units[unit_name] = unit_stats
                 changes_made = True
         
         if changes_made:
             self.save_units()
-            self.update_unit_combobox()
 
     def update_unit_combobox(self):
-        self.unit_combobox['values'] = list(self.units.keys())
-        if self.units:
-            if "Medusa lvl 25" in self.units:
-                self.unit_combobox.set("Medusa lvl 25")
-            elif list(self.units.keys()):
-                self.unit_combobox.set(list(self.units.keys())[0])
-            else:
-                self.unit_combobox.set("")
+        self.unit_page = 0
+        self.refresh_unit_page()
+        if "Medusa lvl 25" in self.units:
+            self.unit_combobox.set("Medusa lvl 25")
+        elif self.unit_combobox['values']:
+            self.unit_combobox.set(self.unit_combobox['values'][0])
+        else:
+            self.unit_combobox.set("")
+
+    def refresh_unit_page(self):
+        """Show the current page of units matching the search text"""
+        prefix = self.unit_search_var.get().strip()
+        total = self.units.count(prefix)
+        last_page = max(0, (total - 1) // self.UNIT_PAGE_SIZE)
+        self.unit_page = min(max(self.unit_page, 0), last_page)
+        first = self.unit_page * self.UNIT_PAGE_SIZE
+        names = self.units.search(prefix, self.UNIT_PAGE_SIZE, first)
+        self.unit_combobox['values'] = names
+
+        if total:
+            self.unit_page_label.config(text=f"{first + 1}-{first + len(names)} of {total}")
+        else:
+            self.unit_page_label.config(text="No units found")
+        self.unit_prev_button.state(["!disabled"] if self.unit_page > 0 else ["disabled"])
+        self.unit_next_button.state(["!disabled"] if self.unit_page < last_page else ["disabled"])
+
+    def change_unit_page(self, step):
+        self.unit_page += step
+        self.refresh_unit_page()
+
+    def on_unit_search_changed(self, *args):
+        if self.unit_search_after_id is not None:
+            self.master.after_cancel(self.unit_search_after_id)
+        self.unit_search_after_id = self.master.after(self.UNIT_SEARCH_DELAY_MS, self.apply_unit_search)
+
+    def apply_unit_search(self):
+        self.unit_search_after_id = None
+        self.unit_page = 0
+        self.refresh_unit_page()
+        names = self.unit_combobox['values']
+        if self.unit_search_var.get().strip() and names:
+            self.unit_combobox.set(names[0])
 
     def on_unit_select(self, event):
         self.load_selected_unit()
@@ -485,10 +862,10 @@ class DPSCalculatorApp:
         unit_name = self.unit_combobox.get()
         if unit_name in self.units:
             stats = self.units[unit_name]
-            self.dmg_var.set(stats.get("dmg", 0.0))
-            self.atk_speed_var.set(stats.get("atk_speed", 0.0))
-            self.crit_chance_var.set(stats.get("crit_chance", 0.0))
-            self.crit_dmg_var.set(stats.get("crit_dmg", 0.0))
+            self.dmg_var.set(stats.dmg)
+            self.atk_speed_var.set(stats.atk_speed)
+            self.crit_chance_var.set(stats.crit_chance)
+            self.crit_dmg_var.set(stats.crit_dmg)
             self.calculate_dps()
         else:
             messagebox.showerror("Error", "Please select a unit to load.")
@@ -500,13 +877,7 @@ class DPSCalculatorApp:
             return
 
         try:
-            current_stats = {
-                "dmg": self.dmg_var.get(),
-                "atk_speed": self.atk_speed_var.get(),
-                "crit_chance": self.crit_chance_var.get(),
-                "crit_dmg": self.crit_dmg_var.get()
-            }
-            self.units[unit_name] = current_stats
+            self.units[unit_name] = UnitStats(*self.read_stats())
             self.save_units()
             self.update_unit_combobox()
             self.unit_name_entry.delete(0, tk.END)          
@@ -516,9 +887,8 @@ class DPSCalculatorApp:
     def delete_selected_unit(self):
         unit_name = self.unit_combobox.get()
         
-        # List of protected default units
-        protected_units = ["Medusa lvl 25", "Beachcomber lvl 25"]
-        if unit_name in protected_units:
+        # The default units are protected
+        if unit_name in DEFAULT_UNITS:
             messagebox.showwarning("Warning", f"The default unit '{unit_name}' cannot be deleted.")
             return
 
@@ -531,91 +901,115 @@ class DPSCalculatorApp:
         else:
             messagebox.showerror("Error", "Please select a unit to delete.")
 
+    def read_stats(self):
+        return (self.dmg_var.get(), self.atk_speed_var.get(),
+                self.crit_chance_var.get(), self.crit_dmg_var.get())
+
+    def selected_tier_count(self):
+        """None for the 0.01 threshold tiers, otherwise the chosen number of natural tiers"""
+        index = self.TIER_MODES.index(self.tier_mode_combobox.get())
+        return index + 1 if index else None
+
+    @dps_metrics.timed("gui.show_result")
+    def show_result(self, key, result):
+        """Render a dps_engine.calculate result"""
+        tier_count = self.selected_tier_count()
+        result = dps_engine.retier(result, tier_count)  # Cached results keep threshold tiers
+        self.base_dps_no_crit_label.config(text=f"Base DPS (without crit): {result['base_dps_no_crit']:.2f}")
+        self.base_dps_with_crit_label.config(text=f"Base DPS (with crit): {result['base_dps_with_crit']:.2f} (Avg. DPS including critical hit frequency)")
+
+        row_count = len(self.results_tree.get_children())
+        self.results_view.show(result["results"])
+
+        self.displayed_result_key = (key, tier_count)
+        if len(self.results_tree.get_children()) != row_count:
+            self.master.after(100, self.check_scrollbars)
+
+    @staticmethod
+    def timed_calculate(stats, modifications):
+        start = time.perf_counter()
+        result = dps_engine.calculate(*stats, modifications)
+        elapsed = time.perf_counter() - start
+        dps_metrics.observe("engine.calculate", elapsed)
+        return result, elapsed
+
+    def on_stat_changed(self, *args):
+        """Debounce keystrokes into one live recalculation"""
+        if not self.live_var.get():
+            return
+        now = time.perf_counter()
+        if self.live_burst_start is None:
+            self.live_burst_start = now
+        if self.live_after_id is not None:
+            self.master.after_cancel(self.live_after_id)
+        waited_ms = (now - self.live_burst_start) * 1000
+        delay = int(max(0, min(self.LIVE_DEBOUNCE_MS, self.LIVE_MAX_WAIT_MS - waited_ms)))
+        self.live_after_id = self.master.after(delay, self.run_live_calculation)
+
+    def run_live_calculation(self):
+        self.live_after_id = None
+        burst_start = self.live_burst_start
+        self.live_burst_start = None
+        try:
+            stats = self.read_stats()
+            dps_engine.validate_stats(*stats)
+        except (tk.TclError, ValueError):
+            return  # Incomplete input while typing, no error popups in live mode
+
+        key = self.result_cache.make_key(*stats, self.modifications)
+        if (key, self.selected_tier_count()) == self.displayed_result_key:
+            return
+        self.live_generation += 1
+
+        result = self.result_cache.get(key)
+        dps_metrics.count("result_cache.miss" if result is None else "result_cache.hit")
+        if result is not None:
+            self.show_live_result(key, result, burst_start)
+        elif self.last_calc_seconds > self.FRAME_BUDGET_S:
+            # Too slow for the main loop: calculate in the background and poll for the result
+            if self.live_executor is None:
+                from concurrent.futures import ThreadPoolExecutor # Deferred: only needed for slow catalogs
+                self.live_executor = ThreadPoolExecutor(max_workers=1)
+            future = self.live_executor.submit(self.timed_calculate, stats, self.modifications)
+            self.master.after(10, self.poll_live_result, future, self.live_generation, key, burst_start)
+        else:
+            result, self.last_calc_seconds = self.timed_calculate(stats, self.modifications)
+            self.result_cache.put(key, result)
+            self.show_live_result(key, result, burst_start)
+
+    def poll_live_result(self, future, generation, key, burst_start):
+        if not future.done():
+            self.master.after(10, self.poll_live_result, future, generation, key, burst_start)
+            return
+        try:
+            result, self.last_calc_seconds = future.result()
+        except ValueError:
+            return
+        self.result_cache.put(key, result)
+        if generation == self.live_generation:  # Drop results superseded by newer keystrokes
+            self.show_live_result(key, result, burst_start)
+
+    def show_live_result(self, key, result, burst_start):
+        self.show_result(key, result)
+        latency_ms = (time.perf_counter() - burst_start) * 1000
+        self.live_latencies_ms.append(latency_ms)
+        dps_metrics.observe("gui.live_latency", latency_ms / 1000)
+        self.live_status_label.config(text=f"Updated in {latency_ms:.0f} ms")
+
+    @dps_metrics.timed("gui.calculate_dps")
     def calculate_dps(self):
+        self.live_generation += 1  # A live result still computing in the background must not replace this one
         try:
-            base_dmg = self.dmg_var.get()
-            atk_speed = self.atk_speed_var.get()
-            crit_chance = self.crit_chance_var.get() / 100.0
-            crit_dmg_multiplier = self.crit_dmg_var.get() / 100.0
-
-            if base_dmg <= 0: raise ValueError("Base DMG must be positive.")
-            if atk_speed <= 0: raise ValueError("Attack Speed must be positive.")
-            if not (0 <= crit_chance <= 1): raise ValueError("Crit Chance must be between 0% and 100%.")
-            if crit_dmg_multiplier <= 0: raise ValueError("Crit Damage must be positive.")
-
-            aps_base = 1 / atk_speed
-            dps_base_no_crit = base_dmg * aps_base
-            crit_dmg_value_base = base_dmg * crit_dmg_multiplier
-            dpa_avg_base = ((1 - crit_chance) * base_dmg) + (crit_chance * crit_dmg_value_base)
-            dps_base_with_crit = dpa_avg_base * aps_base
-
-            results = []
-
-            for mod_name, mod_data in self.modifications.items():
-                temp_dmg = base_dmg
-                temp_atk_speed = atk_speed
-                temp_crit_chance = crit_chance
-                temp_crit_dmg_multiplier = crit_dmg_multiplier
-
-                mod_type = mod_data["type"]
-                mod_value = mod_data["value"]
-
-                if mod_type == "DMG":
-                    temp_dmg *= (1 + mod_value)
-                elif mod_type == "CD":
-                    temp_atk_speed *= (1 - mod_value)
-                elif mod_type == "CC":
-                    temp_crit_chance += mod_value
-                    if temp_crit_chance > 1.0: temp_crit_chance = 1.0
-                elif mod_type == "CDMG":
-                    temp_crit_dmg_multiplier += mod_value
-                
-                current_aps = 1 / temp_atk_speed
-                current_crit_dmg_value = temp_dmg * temp_crit_dmg_multiplier
-                current_dpa_avg = ((1 - temp_crit_chance) * temp_dmg) + (temp_crit_chance * current_crit_dmg_value)
-                current_dps = current_dpa_avg * current_aps
-                
-                results.append({"name": mod_name, "dps": current_dps})
-
-            results.append({"name": "No Modification", "dps": dps_base_with_crit})
-
-            results_sorted = sorted(results, key=lambda x: x["dps"], reverse=True)
-
-            self.base_dps_no_crit_label.config(text=f"Base DPS (without crit): {dps_base_no_crit:.2f}")
-            self.base_dps_with_crit_label.config(text=f"Base DPS (with crit): {dps_base_with_crit:.2f} (Avg. DPS including critical hit frequency)")
-
-            self.results_tree.delete(*self.results_tree.get_children())
-
-            tiers = ["S", "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O"]
-
-            current_tier_index = 0
-            previous_dps = None
-
-            for i, res in enumerate(results_sorted):
-                mod_name = res["name"]
-                dps = res["dps"]
-    
-                if dps_base_with_crit == 0:
-                    percentage_change = 0.0
-                else:
-                    percentage_change = ((dps - dps_base_with_crit) / dps_base_with_crit) * 100
-    
-                # Check if DPS is different from previous result
-                if previous_dps is not None and abs(dps - previous_dps) > 0.01:  # 0.01 tolerance for floating point comparison
-                    current_tier_index += 1  # Move to next tier only when DPS changes
-    
-                tier_to_display = tiers[current_tier_index] if current_tier_index < len(tiers) else "-"
-                previous_dps = dps
-                
-                tag = "evenrow" if i % 2 == 0 else "oddrow"
-                self.results_tree.insert("", "end", iid=i, tags=(tag,), values=(
-                    tier_to_display,
-                    mod_name,
-                    f"{dps:.2f}",
-                    f"{percentage_change:>+8.2f}%"
-                ))
-            
-            self.master.after(100, self.check_scrollbars)
+            stats = self.read_stats()
+            key = self.result_cache.make_key(*stats, self.modifications)
+            if (key, self.selected_tier_count()) == self.displayed_result_key:
+                return  # Same inputs as the current tier list, nothing to redraw
+            result = self.result_cache.get(key)
+            dps_metrics.count("result_cache.miss" if result is None else "result_cache.hit")
+            if result is None:
+                result, self.last_calc_seconds = self.timed_calculate(stats, self.modifications)
+                self.result_cache.put(key, result)
+            self.show_result(key, result)
 
         except ValueError as e:
             messagebox.showerror("Data Input Error", str(e))
@@ -626,6 +1020,18 @@ class DPSCalculatorApp:
 
 # --- Run the application ---
 if __name__ == "__main__":
+    profiler = None
+    if sys.argv[1:] == ["--profile-startup"]:
+        profiler = StartupProfiler()
+        profiler.mark("imports")
+    elif len(sys.argv) > 1:
+        import multiprocessing
+        import dps_cli
+        multiprocessing.freeze_support()
+        sys.exit(dps_cli.main(sys.argv[1:]))
+
     root = tk.Tk()
-    app = DPSCalculatorApp(root)
+    if profiler:
+        profiler.mark("Tk()")
+    app = DPSCalculatorApp(root, profiler)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,212 @@
+# --- Modification Catalog ---
+# Loads a modification catalog from a JSON file, validates it once and compiles
+# it into a compact evaluation plan for dps_engine.
+#
+# Accepted file layouts:
+#   {"Powerful (+50% damage)": {"type": "DMG", "value": 0.5}, ...}        (same as the built-in table)
+#   {"Berserker": {"effects": [{"type": "DMG", "value": 0.3}, {"type": "CD", "value": 0.1}]}, ...}
+#   {"modifications": [{"name": "...", "type": "...", "value": ...} or {"name": "...", "effects": [...]}, ...]}
+# Any modification may also carry an optional "cost" and "rarity" (non-negative
+# numbers, default 0) used by the Pareto queries in dps_query.
+
+import json
+import math
+import os
+from array import array
+from collections.abc import Mapping
+
+import dps_engine
+
+EFFECT_TYPES = ("DMG", "CD", "CC", "CDMG")
+
+
+class CompiledCatalog:
+    """Validated modification catalog compiled into parallel arrays
+
+    Every effect of a modification is folded into four per-modification
+    columns, so evaluating a mod is two multiplications and two additions:
+      dmg_factor  product of (1 + value) over DMG effects
+      cd_factor   product of (1 - value) over CD effects
+      cc_add      sum of CC values (crit chance is capped at 100% afterwards,
+                  as in dps_engine.apply_mod_data)
+      cdmg_add    sum of CDMG values
+    For single-effect mods this is exactly the arithmetic of
+    dps_engine.apply_modification. Costs and rarities are kept as two more
+    columns (0 when not given).
+    """
+    __slots__ = ("names", "effects", "dmg_factor", "cd_factor", "cc_add", "cdmg_add", "cost", "rarity", "version")
+
+    def __init__(self, names, effects, costs=None, rarities=None):
+        self.names = tuple(names)
+        self.effects = tuple(tuple(mod_effects) for mod_effects in effects)
+        self.cost = array("d", costs if costs is not None else [0.0] * len(self.names))
+        self.rarity = array("d", rarities if rarities is not None else [0.0] * len(self.names))
+        self.dmg_factor = array("d")
+        self.cd_factor = array("d")
+        self.cc_add = array("d")
+        self.cdmg_add = array("d")
+        for mod_effects in self.effects:
+            dmg_factor, cd_factor, cc_add, cdmg_add = 1.0, 1.0, 0.0, 0.0
+            for mod_type, value in mod_effects:
+                if mod_type == "DMG":
+                    dmg_factor *= (1 + value)
+                elif mod_type == "CD":
+                    cd_factor *= (1 - value)
+                elif mod_type == "CC":
+                    cc_add += value
+                elif mod_type == "CDMG":
+                    cdmg_add += value
+            self.dmg_factor.append(dmg_factor)
+            self.cd_factor.append(cd_factor)
+            self.cc_add.append(cc_add)
+            self.cdmg_add.append(cdmg_add)
+        self.version = dps_engine.modifications_version(self.to_dict())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def to_dict(self):
+        """Modification table in the built-in dict format (multi-effect mods use "effects")"""
+        table = {}
+        for name, mod_effects, cost, rarity in zip(self.names, self.effects, self.cost, self.rarity):
+            if len(mod_effects) == 1:
+                entry = {"type": mod_effects[0][0], "value": mod_effects[0][1]}
+            else:
+                entry = {"effects": [{"type": t, "value": v} for t, v in mod_effects]}
+            if cost:
+                entry["cost"] = cost
+            if rarity:
+                entry["rarity"] = rarity
+            table[name] = entry
+        return table
+
+
+def _parse_effect(name, effect):
+    if not isinstance(effect, Mapping):
+        raise ValueError(f"Modification '{name}': each effect must be an object with 'type' and 'value'.")
+    mod_type = effect.get("type")
+    value = effect.get("value")
+    if mod_type not in EFFECT_TYPES:
+        raise ValueError(f"Modification '{name}': unknown effect type {mod_type!r} (expected one of {', '.join(EFFECT_TYPES)}).")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"Modification '{name}': effect value must be a finite number.")
+    if mod_type == "CD" and value >= 1:
+        raise ValueError(f"Modification '{name}': cooldown reduction must be below 100%.")
+    if mod_type == "DMG" and value <= -1:
+        raise ValueError(f"Modification '{name}': damage reduction must be above -100%.")
+    if mod_type in ("CC", "CDMG") and value < 0:
+        raise ValueError(f"Modification '{name}': {mod_type} value must not be negative.")
+    return (mod_type, float(value))
+
+
+def _parse_weight(name, data, key):
+    """Optional non-negative "cost"/"rarity" of a modification"""
+    value = data.get(key, 0.0)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+        raise ValueError(f"Modification '{name}': {key} must be a non-negative number.")
+    return float(value)
+
+
+def _parse_modification(name, data):
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Every modification needs a non-empty name.")
+    if name == dps_engine.NO_MODIFICATION:
+        raise ValueError(f"'{dps_engine.NO_MODIFICATION}' is reserved and cannot be used as a modification name.")
+    if not isinstance(data, Mapping):
+        raise ValueError(f"Modification '{name}' must be an object.")
+    if "effects" in data:
+        effects = data["effects"]
+        if not isinstance(effects, list) or not effects:
+            raise ValueError(f"Modification '{name}': 'effects' must be a non-empty list.")
+        return [_parse_effect(name, effect) for effect in effects]
+    return [_parse_effect(name, data)]
+
+
+def compile_catalog(source):
+    """Validate a catalog (any accepted layout, already parsed from JSON) and compile it"""
+    if isinstance(source, CompiledCatalog):
+        return source
+    if isinstance(source, Mapping) and isinstance(source.get("modifications"), list):
+        items = []
+        for entry in source["modifications"]:
+            if not isinstance(entry, Mapping):
+                raise ValueError("Each entry of 'modifications' must be an object.")
+            items.append((entry.get("name"), entry))
+    elif isinstance(source, Mapping):
+        items = list(source.items())
+    else:
+        raise ValueError("A modification catalog must be a JSON object.")
+
+    names = []
+    effects = []
+    costs = []
+    rarities = []
+    seen = set()
+    for name, data in items:
+        mod_effects = _parse_modification(name, data)
+        if name in seen:
+            raise ValueError(f"Duplicate modification name '{name}'.")
+        seen.add(name)
+        names.append(name)
+        effects.append(mod_effects)
+        costs.append(_parse_weight(name, data, "cost"))
+        rarities.append(_parse_weight(name, data, "rarity"))
+    if not names:
+        raise ValueError("The modification catalog is empty.")
+    return CompiledCatalog(names, effects, costs, rarities)
+
+
+def load_catalog(path):
+    """Read, validate and compile a catalog file (raises ValueError or OSError)"""
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            source = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {os.path.basename(path)}: {e}") from e
+    return compile_catalog(source)
+
+
+def default_catalog():
+    return compile_catalog(dps_engine.DEFAULT_MODIFICATIONS)
+
+
+def as_catalog(modifications=None):
+    """Compiled catalog for a dict, a catalog or None (the built-in table)"""
+    if modifications is None:
+        return default_catalog()
+    return compile_catalog(modifications)
+
+
+class CatalogWatcher:
+    """Detects changes to a catalog file so it can be recompiled and hot-swapped"""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.removed = False  # True after a poll that found the file deleted
+
+    def _current_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self):
+        """Return a freshly compiled catalog if the file changed since the last poll, else None
+
+        If a file seen before was deleted, `removed` is set and the built-in
+        catalog is returned. Raises ValueError/OSError for an invalid file; the
+        change is still recorded so the same broken file is reported only once.
+        """
+        signature = self._current_signature()
+        if signature == self.signature:
+            return None
+        self.signature = signature
+        self.removed = signature is None
+        if self.removed:
+            return default_catalog()
+        return load_catalog(self.path)
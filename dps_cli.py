@@ -0,0 +1,715 @@
+# --- Command-Line Tools ---
+# Headless entry points: python dps_calculator.py <command> ... (or python dps_cli.py <command> ...)
+
+import argparse
+import collections
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+import dps_catalog
+import dps_engine
+import dps_metrics
+import dps_store
+from dps_roster import Roster, UnitStats, is_roster_file
+
+REPORT_HEADER = "unit,rank,tier,modification,dps,percent_change\n"
+
+
+def _csv_field(text):
+    if "," in text or '"' in text or "\n" in text or "\r" in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_report(name, result):
+    """Report lines for one unit's dps_engine.calculate result"""
+    unit = _csv_field(name)
+    return "".join(
+        f"{unit},{rank},{res['tier']},{_csv_field(res['name'])},{res['dps']:.4f},{res['percent_change']:.4f}\n"
+        for rank, res in enumerate(result["results"], start=1)
+    )
+
+
+def score_unit(name, stats, modifications=None):
+    """Return the report lines for one unit (or raise ValueError for invalid stats)"""
+    return format_report(name, dps_engine.calculate(*UnitStats.from_dict(stats), modifications))
+
+
+_worker_catalog = None  # Compiled catalog used by _score_shard, set per process
+_worker_tier_count = None  # Natural tier count for the report (None: 0.01 threshold tiers)
+_worker_keep_results = False  # Send computed results back (only when a cache will store them)
+
+
+def _init_worker(catalog, tier_count=None, keep_results=False):
+    global _worker_catalog, _worker_tier_count, _worker_keep_results
+    _worker_catalog = catalog
+    _worker_tier_count = tier_count
+    _worker_keep_results = keep_results
+
+
+def _score_shard(shard):
+    """Worker: score a list of (name, stats, cached result or None)
+
+    Returns (report text, error messages, count of units scored, [(stats, result)]
+    for the units that had to be computed). The computed results are only
+    collected when the worker keeps results for a cache; otherwise the list is
+    empty and the pool does not pickle them back.
+    """
+    lines = []
+    errors = []
+    computed = []
+    for name, stats, result in shard:
+        try:
+            if result is None:
+                stats = tuple(UnitStats.from_dict(stats))
+                result = dps_engine.calculate(*stats, _worker_catalog)
+                if _worker_keep_results:
+                    computed.append((stats, result))
+            # Results (and the cache) keep threshold tiers; natural tiers are applied to the report only
+            lines.append(format_report(name, dps_engine.retier(result, _worker_tier_count)))
+        except (ValueError, TypeError, AttributeError, ZeroDivisionError) as e:
+            errors.append(f"Skipping unit '{name}': {e}")
+    return "".join(lines), errors, len(lines), computed
+
+
+def _shards(units, shard_size):
+    iterator = iter(units)
+    while True:
+        shard = list(itertools.islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def _with_cached_results(shard, cache, version):
+    """Attach each unit's cached result (or None) to a shard of (name, stats)"""
+    if cache is None:
+        return [(name, stats, None) for name, stats in shard]
+    return [
+        (name, stats, cache.get(cache.make_key(*stats, version=version)) if isinstance(stats, UnitStats) else None)
+        for name, stats in shard
+    ]
+
+
+def score_roster(units_file, out, workers=None, shard_size=500, log=sys.stderr, catalog=None, cache=None, tier_count=None):
+    """Score every unit in units_file against every modification and write a ranked CSV report
+
+    Shards are scored in a process pool but written in input order, so the
+    report is identical for any number of workers. With a dps_cache.DiskResultCache
+    only units missing from the cache are computed; new results are added to
+    it. tier_count switches the report to that many natural tiers per unit.
+    Returns the number of units scored; invalid units are skipped and reported.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    scored = skipped = 0
+    out.write(REPORT_HEADER)
+
+    catalog = dps_catalog.as_catalog(catalog)
+    version = catalog.version  # Catalog part of every cache key
+    # Cache lookups stay in this process (SQLite connections are not shared with workers)
+    shards = (_with_cached_results(shard, cache, version) for shard in _shards(dps_store.iter_units(units_file), shard_size))
+    if workers <= 1:
+        _init_worker(catalog, tier_count, cache is not None)
+        results = map(_score_shard, shards)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(catalog, tier_count, cache is not None))
+        results = _ordered_map(pool, _score_shard, shards, max_pending=2 * workers)
+    try:
+        for text, errors, count, computed in results:
+            out.write(text)
+            dps_metrics.count("score.units", count)
+            # Without a cache every scored unit was computed
+            dps_metrics.count("score.computed", len(computed) if cache is not None else count)
+            dps_metrics.count("score.skipped", len(errors))
+            for message in errors:
+                print(message, file=log)
+            if cache is not None:
+                for stats, result in computed:
+                    cache.put(cache.make_key(*stats, version=version), result)
+            scored += count
+            skipped += len(errors)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {scored} units in {elapsed:.2f} s ({rate:.0f} units/s, {workers} worker(s))"
+          f"{f', skipped {skipped} invalid' if skipped else ''}", file=log)
+    return scored
+
+
+def _ordered_map(pool, func, items, max_pending):
+    """Like pool.imap, but pulls items from the calling thread with at most max_pending in flight"""
+    pending = collections.deque()
+    for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _load_catalog_arg(args):
+    """Compiled catalog from --catalog, or None for the built-in modifications"""
+    if not args.catalog:
+        return None
+    try:
+        return dps_catalog.load_catalog(args.catalog)
+    except (ValueError, OSError) as e:
+        raise SystemExit(f"Could not load catalog {args.catalog}: {e}")
+
+
+def _open_cache(path, max_mb):
+    import dps_cache
+    max_bytes = int(max_mb * 1024 * 1024) if max_mb is not None else dps_cache.DEFAULT_MAX_BYTES
+    return dps_cache.DiskResultCache(path, max_bytes)
+
+
+def cmd_score(args):
+    catalog = _load_catalog_arg(args)
+    if args.tiers is not None and not 1 <= args.tiers <= len(dps_engine.TIERS):
+        raise SystemExit(f"--tiers must be between 1 and {len(dps_engine.TIERS)}.")
+    cache = _open_cache(args.cache, args.cache_max_mb) if args.cache else None
+    try:
+        if args.output == "-":
+            score_roster(args.units_file, sys.stdout, args.workers, args.shard_size, catalog=catalog, cache=cache, tier_count=args.tiers)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                score_roster(args.units_file, out, args.workers, args.shard_size, catalog=catalog, cache=cache, tier_count=args.tiers)
+    finally:
+        if cache is not None:
+            print(f"Result cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+            cache.close()
+    return 0
+
+
+def cmd_cache_stats(args):
+    cache = _open_cache(args.cache_file, args.max_mb)
+    try:
+        if args.clear:
+            cache.clear()
+        elif args.max_mb is not None:
+            cache.commit()  # Applies the new limit
+        stats = cache.stats()
+    finally:
+        cache.close()
+    print(f"Cache file:   {args.cache_file}")
+    print(f"Entries:      {stats['entries']}")
+    print(f"Results:      {stats['result_bytes'] / 1024:.1f} KiB (limit {stats['max_bytes'] / 1024 / 1024:.1f} MiB)")
+    print(f"On disk:      {stats['file_bytes'] / 1024:.1f} KiB")
+    print(f"Hit rate:     {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+    for version, count in stats["catalogs"].items():
+        print(f"Catalog {version}: {count} entries")
+    return 0
+
+
+def _valid_units(units, log=sys.stderr):
+    """Yield (name, UnitStats) pairs whose stats pass dps_engine.validate_stats, reporting the rest"""
+    for name, stats in units:
+        try:
+            stats = UnitStats.from_dict(stats)
+            dps_engine.validate_stats(*stats)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping unit '{name}': {e}", file=log)
+            continue
+        yield name, stats
+
+
+@dps_metrics.timed("cli.load_roster")
+def _batch_roster(units_file, log=sys.stderr):
+    """(names, stat columns) of the valid units in units_file, for the NumPy-based commands
+
+    A .roster file stays memory-mapped and goes to NumPy without copying; when
+    it holds invalid units only the stat columns of the others are copied.
+    """
+    if not is_roster_file(units_file):
+        roster = Roster.from_items(_valid_units(dps_store.iter_units(units_file), log))
+        return roster.names, roster.columns()
+    import numpy as np
+    import dps_batch
+
+    roster = dps_store.load_roster(units_file)
+    valid, problems = dps_batch.stat_problems(*roster.columns())
+    if not problems:
+        return roster.names, roster.columns()
+    for i, message in sorted(problems.items()):
+        print(f"Skipping unit '{roster.names[i]}': {message}", file=log)
+    rows = valid.nonzero()[0]
+    return roster.names.take(rows), tuple(np.asarray(column)[rows] for column in roster.columns())
+
+
+def write_sensitivity(units_file, out, shard_size=100000):
+    """Write per-unit marginal stat values (see dps_analysis.sensitivity) as CSV; returns the unit count"""
+    import dps_analysis # Needs NumPy, only imported for this command
+
+    columns = ["dps"] + [f"d_{stat}" for stat in dps_analysis.STATS] + \
+              [f"dmg_equivalent_{stat}" for stat in dps_analysis.STATS[1:]]
+    out.write("unit," + ",".join(columns) + "\n")
+    names, stats = _batch_roster(units_file)
+    for start in range(0, len(names), shard_size):
+        end = start + shard_size
+        result = dps_analysis.sensitivity(*(column[start:end] for column in stats))
+        for i, name in enumerate(names[start:end]):
+            out.write(_csv_field(name) + "," + ",".join(f"{result[col][i]:.6g}" for col in columns) + "\n")
+    return len(names)
+
+
+def cmd_sensitivity(args):
+    if args.output == "-":
+        write_sensitivity(args.units_file, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_sensitivity(args.units_file, out)
+    return 0
+
+
+def write_query(units_file, out, query, k=20, catalog=None, log=sys.stderr):
+    """Score the roster with dps_batch and write a top-k, best-per-unit or Pareto report as CSV
+
+    query is "top" (k best unit+mod pairs), "best" (k best mods of every unit),
+    "pareto-cost" or "pareto-rarity" (DPS vs. the modification's cost/rarity).
+    Returns the number of report rows.
+    """
+    import dps_batch # Needs NumPy, only imported for this command
+    import dps_query
+
+    catalog = dps_catalog.as_catalog(catalog)
+    unit_names, stats = _batch_roster(units_file, log)
+    mod_names, matrix = dps_batch.score_matrix(*stats, catalog)
+
+    start = time.perf_counter()
+    rows = []
+    if query == "top":
+        out.write("rank,unit,modification,dps\n")
+        units, mods, dps = dps_query.top_pairs(matrix, k)
+        for rank, (unit, mod, value) in enumerate(zip(units, mods, dps), start=1):
+            rows.append(f"{rank},{_csv_field(unit_names[unit])},{_csv_field(mod_names[mod])},{value:.4f}\n")
+    elif query == "best":
+        out.write("unit,rank,modification,dps\n")
+        mods, dps = dps_query.best_per_unit(matrix, k)
+        for unit, name in enumerate(unit_names):
+            unit_field = _csv_field(name)
+            for rank, (mod, value) in enumerate(zip(mods[unit], dps[unit]), start=1):
+                rows.append(f"{unit_field},{rank},{_csv_field(mod_names[mod])},{value:.4f}\n")
+    else:
+        weight = query.split("-", 1)[1]
+        weights = getattr(catalog, weight)
+        out.write(f"modification,{weight},unit,dps\n")
+        units, mods, dps = dps_query.pareto_pairs(matrix, weights)
+        for unit, mod, value in zip(units, mods, dps):
+            rows.append(f"{_csv_field(mod_names[mod])},{weights[mod]:g},{_csv_field(unit_names[unit])},{value:.4f}\n")
+    elapsed = time.perf_counter() - start
+    out.write("".join(rows))
+    print(f"Queried {matrix.size} unit+mod pairs in {elapsed * 1000:.1f} ms", file=log)
+    return len(rows)
+
+
+def cmd_query(args):
+    catalog = _load_catalog_arg(args)
+    k = args.k if args.k is not None else (20 if args.query == "top" else 1)
+    if args.output == "-":
+        write_query(args.units_file, sys.stdout, args.query, k, catalog)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_query(args.units_file, out, args.query, k, catalog)
+    return 0
+
+
+def write_best_mods(units_file, out, catalog=None, log=sys.stderr):
+    """Write each unit's best and runner-up modification from the decision map as CSV; returns the unit count"""
+    import dps_decision # Needs NumPy, only imported for this command
+
+    start = time.perf_counter()
+    decision_map = dps_decision.decision_map(catalog)
+    built = time.perf_counter()
+    unit_names, stats = _batch_roster(units_file, log)
+    winners, runners_up, from_map = decision_map.lookup_many(*stats)
+    looked_up = time.perf_counter()
+
+    names = decision_map.names
+    out.write("unit,best,runner_up,source\n")
+    for unit, winner, runner_up, mapped in zip(unit_names, winners.tolist(), runners_up.tolist(), from_map.tolist()):
+        out.write(f"{_csv_field(unit)},{_csv_field(names[winner])},{_csv_field(names[runner_up])},{'map' if mapped else 'exact'}\n")
+    print(f"Decision map built in {(built - start) * 1000:.1f} ms ({decision_map.coverage():.1%} of cells resolved); "
+          f"{len(unit_names)} units looked up in {(looked_up - built) * 1000:.1f} ms, "
+          f"{int(from_map.sum())} from the map", file=log)
+    return len(unit_names)
+
+
+def write_decision_grid(out, catalog=None):
+    """Write the decision map as a crit chance x crit damage grid (CSV, one row per cell center)"""
+    import dps_decision
+
+    out.write("crit_chance,crit_dmg,best,runner_up,boundary\n")
+    for crit_chance, crit_dmg, winner, runner_up, boundary in dps_decision.decision_map(catalog).grid_rows():
+        out.write(f"{crit_chance:g},{crit_dmg:g},{_csv_field(winner)},{_csv_field(runner_up)},{int(boundary)}\n")
+
+
+def cmd_best_mod(args):
+    if not (args.units_file or args.stats or args.grid):
+        raise SystemExit("best-mod needs a units file, --stats or --grid.")
+    catalog = _load_catalog_arg(args)
+    if args.grid:
+        with open(args.grid, "w", encoding="utf-8", newline="") as out:
+            write_decision_grid(out, catalog)
+    if args.stats:
+        import dps_decision
+
+        try:
+            winner, runner_up, _ = dps_decision.decision_map(catalog).lookup(*args.stats)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"Best: {winner}\nRunner-up: {runner_up}")
+    elif args.units_file:
+        if args.output == "-":
+            write_best_mods(args.units_file, sys.stdout, catalog)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                write_best_mods(args.units_file, out, catalog)
+    return 0
+
+
+PATCH_HEADER = "unit,modification,old_rank,new_rank,old_tier,new_tier,old_dps,new_dps,dps_change,percent_change\n"
+
+
+def _optional(value, spec=""):
+    return "" if value is None else format(value, spec)
+
+
+def write_patch_report(units_file, out, old_catalog, new_catalog, log=sys.stderr):
+    """Write the tier moves and DPS changes between two catalogs as CSV (see dps_patch); returns the moved unit count"""
+    import dps_patch
+
+    start = time.perf_counter()
+    report = dps_patch.patch_report(_valid_units(dps_store.iter_units(units_file), log), old_catalog, new_catalog)
+    out.write(PATCH_HEADER)
+    for unit in report["moved"]:
+        name = _csv_field(unit["name"])
+        for move in unit["moves"]:
+            old_dps, new_dps = move["old_dps"], move["new_dps"]
+            change = new_dps - old_dps if old_dps is not None and new_dps is not None else None
+            percent = change / old_dps * 100 if change is not None and old_dps else None
+            out.write(f"{name},{_csv_field(move['modification'])},{_optional(move['old_rank'])},{_optional(move['new_rank'])},"
+                      f"{_optional(move['old_tier'])},{_optional(move['new_tier'])},{_optional(old_dps, '.4f')},"
+                      f"{_optional(new_dps, '.4f')},{_optional(change, '.4f')},{_optional(percent, '.4f')}\n")
+
+    elapsed = time.perf_counter() - start
+    touched = [f"{len(report[kind])} {kind}" for kind in ("changed", "added", "removed") if report[kind]]
+    print(f"Patch: {', '.join(touched) or 'no effect changes'}; {report['units']} units in {report['profiles']} crit profiles, "
+          f"{report['recomputed']} recomputed, {len(report['moved'])} with ranking or tier moves ({elapsed:.2f} s)", file=log)
+    return len(report["moved"])
+
+
+def cmd_patch_diff(args):
+    try:
+        old_catalog = dps_catalog.load_catalog(args.old) if args.old else None
+        new_catalog = dps_catalog.load_catalog(args.new)
+    except (ValueError, OSError) as e:
+        raise SystemExit(f"Could not load catalog: {e}")
+    if args.output == "-":
+        write_patch_report(args.units_file, sys.stdout, old_catalog, new_catalog)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_patch_report(args.units_file, out, old_catalog, new_catalog)
+    return 0
+
+
+def _unit_stats_from_args(args):
+    """(dmg, atk_speed, crit_chance, crit_dmg) from --stats or from --unit in --units-file"""
+    if args.stats:
+        return tuple(args.stats)
+    for name, stats in dps_store.iter_units(args.units_file):
+        if name == args.unit:
+            return tuple(UnitStats.from_dict(stats))
+    raise SystemExit(f"Unit '{args.unit}' not found in {args.units_file}")
+
+
+def cmd_simulate(args):
+    import json
+    import dps_simulation # Needs NumPy, only imported for this command
+
+    report = dps_simulation.simulate(*_unit_stats_from_args(args), _load_catalog_arg(args), hp=args.hp, window_attacks=args.window,
+                                     max_samples=args.max_samples, rel_tol=args.rel_tol,
+                                     seed=args.seed, workers=args.workers)
+    json.dump(report, sys.stdout, indent=4)
+    print()
+    print(f"Drew {report['samples']} samples (DPS windows and fights) in {report['seconds']:.2f} s "
+          f"({report['samples_per_s']:.0f} samples/s)", file=sys.stderr)
+    return 0
+
+
+def _read_pool(args):
+    """Pool counts from --pool entries and/or a --pool-file ({name: count} or a list of names)"""
+    import json
+    import dps_team
+
+    entries = list(args.pool or [])
+    pool = {}
+    try:
+        if args.pool_file:
+            with open(args.pool_file, "r", encoding="utf-8") as f:
+                pool = dps_team.parse_pool(json.load(f))
+        for name, count in dps_team.parse_pool(entries).items():
+            pool[name] = pool.get(name, 0) + count
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        raise SystemExit(f"Could not read the modification pool: {e}")
+    return pool
+
+
+def cmd_team(args):
+    import json
+    import dps_team
+
+    pool = _read_pool(args)
+    if not pool:
+        raise SystemExit("team needs a modification pool (--pool or --pool-file).")
+    wanted = set(args.units) if args.units else None
+    try:
+        units = [(name, stats) for name, stats in dps_store.iter_units(args.units_file) if wanted is None or name in wanted]
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Could not read {args.units_file}: {e}")
+    missing = wanted - {name for name, _ in units} if wanted else set()
+    if missing:
+        raise SystemExit(f"Units not found in {args.units_file}: {', '.join(sorted(missing))}")
+
+    start = time.perf_counter()
+    try:
+        report = dps_team.assign_team(units, pool, args.slots, _load_catalog_arg(args), method=args.method)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise SystemExit(str(e))
+    json.dump(report, sys.stdout, indent=4)
+    print()
+    print(f"Assigned {sum(pool.values()) - sum(report['unused'].values())} of {sum(pool.values())} mods to {len(units)} units "
+          f"in {time.perf_counter() - start:.3f} s (team DPS {report['base_team_dps']:.2f} -> {report['team_dps']:.2f})"
+          f"{'' if report['exact'] else '; search limits hit, not proven optimal'}", file=sys.stderr)
+    return 0
+
+
+def cmd_plan(args):
+    import json
+    import dps_progression
+
+    try:
+        units = list(_valid_units(dps_store.iter_units(args.units_file)))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Could not read {args.units_file}: {e}")
+    try:
+        # Without a progression file every "NAME lvl N" snapshot in the file becomes a table row
+        tables = dps_progression.load_tables(args.progression) if args.progression else dps_progression.tables_from_units(units)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Could not load progression tables: {e}")
+    if args.save_progression:
+        dps_progression.save_tables(args.save_progression, tables)
+    if args.units:
+        wanted = set(args.units)
+        missing = wanted - {name for name, _ in units}
+        if missing:
+            raise SystemExit(f"Units not found in {args.units_file}: {', '.join(sorted(missing))}")
+        units = [(name, stats) for name, stats in units if name in wanted]
+
+    start = time.perf_counter()
+    try:
+        plans, skipped = dps_progression.plan_roster(units, args.budget, tables, _load_catalog_arg(args), args.slots)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    for name, reason in skipped:
+        print(f"Skipping unit '{name}': {reason}", file=sys.stderr)
+    json.dump(plans, sys.stdout, indent=4)
+    print()
+    print(f"Planned {len(plans)} units with a budget of {args.budget:g} each in {time.perf_counter() - start:.3f} s", file=sys.stderr)
+    return 0
+
+
+def cmd_import_units(args):
+    store = dps_store.UnitStore(args.db_file)
+    skipped = []
+    try:
+        count = store.import_units(args.json_file, skipped)
+        store.compact()
+    finally:
+        store.close()
+    for name, error in skipped:
+        print(f"Skipping unit '{name}': {error}", file=sys.stderr)
+    print(f"Imported {count} units into {args.db_file}", file=sys.stderr)
+    return 0
+
+
+def cmd_export_units(args):
+    store = dps_store.UnitStore(args.db_file)
+    try:
+        store.export_json(args.json_file)
+    finally:
+        store.close()
+    return 0
+
+
+def cmd_convert_units(args):
+    start = time.perf_counter()
+    try:
+        count = dps_store.convert_units(args.src, args.dst)
+    except (ValueError, TypeError, AttributeError, OSError) as e:
+        raise SystemExit(f"Could not convert {args.src}: {e}")
+    print(f"Converted {count} units to {args.dst} in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    return 0
+
+
+def cmd_serve(args):
+    import asyncio
+    import json
+    import dps_service # Needs NumPy, only imported for this command
+
+    options = dict(modifications=_load_catalog_arg(args), max_batch=args.max_batch,
+                   batch_window=args.batch_window_ms / 1000.0, max_concurrency=args.max_concurrency)
+    if args.self_test:
+        stats = asyncio.run(dps_service.self_test(args.self_test, args.clients, **options))
+        json.dump(stats, sys.stdout, indent=4)
+        print()
+        return 0
+    try:
+        asyncio.run(dps_service.serve(args.host, args.port, log=sys.stderr, **options))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dps_calculator", description="Headless DPS Calculator tools.")
+    parser.add_argument("--metrics", metavar="FILE", help="Record timers and counters and write them as JSON to FILE ('-' for stderr) on exit.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="Score every saved unit against every modification.")
+    score.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    score.add_argument("-o", "--output", default="-", help="Report file (CSV). Defaults to stdout.")
+    score.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    score.add_argument("--shard-size", type=int, default=500, help="Units per work item.")
+    score.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    score.add_argument("--cache", help="Result cache file (e.g. dps_results_cache.db); only changed units are recomputed.")
+    score.add_argument("--tiers", type=int, default=None, metavar="COUNT",
+                       help="Split each unit's list into COUNT natural tiers (default: a new tier at every DPS step above 0.01).")
+    score.add_argument("--cache-max-mb", type=float, default=None, help="Size limit of the result cache (default 64 MiB).")
+    score.set_defaults(func=cmd_score)
+
+    cache_stats = commands.add_parser("cache-stats", help="Show entries, size on disk and hit rate of a result cache.")
+    cache_stats.add_argument("cache_file", nargs="?", default="dps_results_cache.db")
+    cache_stats.add_argument("--max-mb", type=float, default=None, help="Apply a new size limit, evicting old entries.")
+    cache_stats.add_argument("--clear", action="store_true", help="Remove all entries and reset the counters.")
+    cache_stats.set_defaults(func=cmd_cache_stats)
+
+    sensitivity = commands.add_parser("sensitivity", help="Marginal DPS value of each stat for every saved unit.")
+    sensitivity.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    sensitivity.add_argument("-o", "--output", default="-", help="Report file (CSV). Defaults to stdout.")
+    sensitivity.set_defaults(func=cmd_sensitivity)
+
+    query = commands.add_parser("query", help="Top unit+mod pairs, best mods per unit or the DPS/cost Pareto front.")
+    query.add_argument("query", choices=("top", "best", "pareto-cost", "pareto-rarity"))
+    query.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    query.add_argument("-k", type=int, default=None, help="Pairs to list for 'top' (default 20) or mods per unit for 'best' (default 1).")
+    query.add_argument("-o", "--output", default="-", help="Report file (CSV). Defaults to stdout.")
+    query.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    query.set_defaults(func=cmd_query)
+
+    best_mod = commands.add_parser("best-mod", help="Best and runner-up modification from the precomputed crit chance x crit damage map.")
+    best_mod.add_argument("units_file", nargs="?", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    best_mod.add_argument("--stats", type=float, nargs=4, metavar=("DMG", "ATK_SPEED", "CRIT_CHANCE", "CRIT_DMG"),
+                          help="Look up a single unit instead of a file.")
+    best_mod.add_argument("-o", "--output", default="-", help="Report file (CSV). Defaults to stdout.")
+    best_mod.add_argument("--grid", help="Also export the map as a CSV grid (cell centers) for plotting.")
+    best_mod.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    best_mod.set_defaults(func=cmd_best_mod)
+
+    patch_diff = commands.add_parser("patch-diff", help="Tier moves and DPS changes per unit between two modification catalogs.")
+    patch_diff.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    patch_diff.add_argument("--new", required=True, help="Catalog file after the patch.")
+    patch_diff.add_argument("--old", help="Catalog file before the patch (default: built-in modifications).")
+    patch_diff.add_argument("-o", "--output", default="-", help="Report file (CSV). Defaults to stdout.")
+    patch_diff.set_defaults(func=cmd_patch_diff)
+
+    simulate = commands.add_parser("simulate", help="Monte Carlo DPS spread and time-to-kill for one unit (JSON output).")
+    unit = simulate.add_mutually_exclusive_group(required=True)
+    unit.add_argument("--stats", type=float, nargs=4, metavar=("DMG", "ATK_SPEED", "CRIT_CHANCE", "CRIT_DMG"),
+                      help="Unit stats as entered in the GUI.")
+    unit.add_argument("--unit", help="Name of a saved unit (see --units-file).")
+    simulate.add_argument("--units-file", default="dps_units.db", help="Unit store used with --unit.")
+    simulate.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    simulate.add_argument("--hp", type=float, default=None, help="Target HP for time-to-kill.")
+    simulate.add_argument("--window", type=int, default=100, help="Attacks per DPS sample window.")
+    simulate.add_argument("--max-samples", type=int, default=1000000, help="Upper bound on samples per modification.")
+    simulate.add_argument("--rel-tol", type=float, default=0.001, help="Stop once the 95%% CI is within this fraction of the mean.")
+    simulate.add_argument("--seed", type=int, default=0)
+    simulate.add_argument("-w", "--workers", type=int, default=1, help="Processes to spread modifications over.")
+    simulate.set_defaults(func=cmd_simulate)
+
+    team = commands.add_parser("team", help="Assign a limited pool of modifications to a squad for the highest total DPS (JSON output).")
+    team.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    team.add_argument("--units", nargs="+", metavar="NAME", help="Squad members (default: every unit in the file).")
+    team.add_argument("--pool", nargs="+", metavar="MOD[=COUNT]", help="Available modifications, e.g. \"Powerful (+50%% damage)=2\".")
+    team.add_argument("--pool-file", help="JSON file with the pool: {\"mod name\": count} or a list of mod names.")
+    team.add_argument("--slots", type=int, default=1, help="Modifications per unit (default 1).")
+    team.add_argument("--method", choices=("auto", "hungarian", "search", "brute"), default="auto",
+                      help="auto: Hungarian for one slot, bounded search otherwise; brute is for verification only.")
+    team.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    team.set_defaults(func=cmd_team)
+
+    plan = commands.add_parser("plan", help="Best level-ups and mods within a resource budget, and the order to buy them in (JSON output).")
+    plan.add_argument("units_file", help="Path to a dps_units.json file, dps_units.db store or .roster file.")
+    plan.add_argument("--budget", type=float, required=True, help="Resources each unit may spend on level-ups and mods.")
+    plan.add_argument("--units", nargs="+", metavar="NAME", help="Units to plan, e.g. \"Medusa lvl 10\" (default: every unit in the file).")
+    plan.add_argument("--slots", type=int, default=1, help="Modifications per unit (default 1).")
+    plan.add_argument("--progression", help="Progression file with stats and costs per level (default: built from the 'NAME lvl N' units in units_file, one resource per level).")
+    plan.add_argument("--save-progression", metavar="FILE", help="Also write the progression tables used to FILE.")
+    plan.add_argument("--catalog", help="Modification catalog file; mod prices come from its \"cost\" values (default: built-in modifications, free).")
+    plan.set_defaults(func=cmd_plan)
+
+    convert_units = commands.add_parser("convert-units", help="Convert units between .json, .db and binary .roster files.")
+    convert_units.add_argument("src")
+    convert_units.add_argument("dst", help="Output file; the format follows the extension (.json, .db or .roster).")
+    convert_units.set_defaults(func=cmd_convert_units)
+
+    import_units = commands.add_parser("import-units", help="Import a dps_units.json (or .roster) file into a unit store.")
+    import_units.add_argument("json_file")
+    import_units.add_argument("db_file")
+    import_units.set_defaults(func=cmd_import_units)
+
+    export_units = commands.add_parser("export-units", help="Export a unit store to dps_units.json format.")
+    export_units.add_argument("db_file")
+    export_units.add_argument("json_file")
+    export_units.set_defaults(func=cmd_export_units)
+
+    serve = commands.add_parser("serve", help="Local HTTP/JSON service for tier lists and roster scoring (127.0.0.1 only).")
+    serve.add_argument("--host", default="127.0.0.1", help="Loopback address to listen on.")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--catalog", help="Modification catalog file (default: built-in modifications).")
+    serve.add_argument("--max-concurrency", type=int, default=64, help="Scoring jobs (tier list batches or /score requests) run at once; others wait.")
+    serve.add_argument("--max-batch", type=int, default=256, help="Most tier list requests scored together.")
+    serve.add_argument("--batch-window-ms", type=float, default=2.0, help="How long a tier list request waits for others to batch with.")
+    serve.add_argument("--self-test", type=int, metavar="REQUESTS", help="Start on a free port, send REQUESTS from local clients, print /stats and exit.")
+    serve.add_argument("--clients", type=int, default=64, help="Concurrent clients for --self-test.")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.metrics:
+        return args.func(args)
+    dps_metrics.metrics.enabled = True
+    try:
+        with dps_metrics.timer(f"cli.{args.command}"):
+            return args.func(args)
+    finally:
+        dps_metrics.metrics.dump(args.metrics)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# --- Best Modification Map ---
+# Precomputed winner/runner-up map over (crit chance, crit damage).
+#
+# With the catalog folded into factors (see dps_catalog.CompiledCatalog) a
+# modification's DPS is
+#     dmg / atk_speed * dmg_factor / cd_factor * (1 + min(c + cc_add, 1) * (m + cdmg_add - 1))
+# so dmg / atk_speed scales every mod alike and the ranking depends on the
+# crit chance c and crit damage multiplier m only. Between the crit chance
+# caps (c = 1 - cc_add) the difference of two mods is bilinear in (c, m), and a
+# bilinear function is smallest at a corner of any rectangle. A grid cell
+# whose four corners all agree on the winner and runner-up (by a safe margin)
+# therefore has that winner and runner-up everywhere inside; every other cell
+# lies on a crossover boundary and is evaluated exactly.
+
+import numpy as np
+
+import dps_catalog
+import dps_engine
+
+CRIT_CHANCE_CELLS = 100       # 1% steps over 0-100%
+CRIT_DMG_RANGE = (0.0, 1000.0)  # Crit damage (percent) covered by the map; units outside fall back to exact
+CRIT_DMG_CELLS = 200          # 5% steps
+MARGIN = 1e-9                 # Relative DPS gap required at every corner (far above rounding noise)
+CORNER_CHUNK = 4096           # Grid corners scored per block (bounds memory for large catalogs)
+
+
+class DecisionMap:
+    """Winner and runner-up modification for every cell of a crit chance x crit damage grid
+
+    `winner` and `runner_up` hold indices into `names` (the catalog's mods
+    followed by dps_engine.NO_MODIFICATION), -1 for cells on a crossover
+    boundary. Lookups return the same two names as dps_engine.calculate.
+    """
+
+    def __init__(self, modifications=None, crit_dmg_range=CRIT_DMG_RANGE,
+                 crit_chance_cells=CRIT_CHANCE_CELLS, crit_dmg_cells=CRIT_DMG_CELLS):
+        self.catalog = dps_catalog.as_catalog(modifications)
+        self.version = self.catalog.version
+        self.names = list(self.catalog.names) + [dps_engine.NO_MODIFICATION]
+        self.cc_edges = np.linspace(0.0, 1.0, crit_chance_cells + 1)
+        self.cdmg_edges = np.linspace(crit_dmg_range[0] / 100.0, crit_dmg_range[1] / 100.0, crit_dmg_cells + 1)
+        self._c_axis = (float(self.cc_edges[0]), float(self.cc_edges[-1]), crit_chance_cells)
+        self._m_axis = (float(self.cdmg_edges[0]), float(self.cdmg_edges[-1]), crit_dmg_cells)
+        self.winner, self.runner_up = self._build()
+
+    def _groups(self):
+        """Entries with identical effect lists, as lists of entry indices in catalog order
+
+        Such entries tie everywhere and the engine's stable sort keeps them in
+        catalog order, so the map ranks one representative per group.
+        Entries that only fold to the same factors (e.g. CD 0.2 and DMG 0.25)
+        are scored by different arithmetic in the engine, which may order them
+        either way; they stay separate, so their exact tie on the grid leaves
+        those cells to the engine.
+        Returns (groups, scale, cc_add, cdmg_add) with one factor per group.
+        """
+        catalog = self.catalog
+        factors = list(zip(
+            [dmg / cd for dmg, cd in zip(catalog.dmg_factor, catalog.cd_factor)] + [1.0],
+            list(catalog.cc_add) + [0.0],
+            list(catalog.cdmg_add) + [0.0],
+        ))
+        groups = {}
+        for index, (key, effects) in enumerate(zip(factors, list(catalog.effects) + [()])):
+            groups.setdefault((key, effects), []).append(index)
+        scale, cc_add, cdmg_add = (np.array(column) for column in zip(*(key for key, _ in groups)))
+        return list(groups.values()), scale, cc_add, cdmg_add
+
+    def _build(self):
+        groups, scale, cc_add, cdmg_add = self._groups()
+        c, m = np.meshgrid(self.cc_edges, self.cdmg_edges, indexing="ij")
+        c = c.ravel()
+        m = m.ravel()
+
+        # Best, second and third score at every grid corner
+        top = np.empty((3, len(c)), dtype=np.intp)
+        gaps = np.empty((2, len(c)))
+        for start in range(0, len(c), CORNER_CHUNK):
+            end = start + CORNER_CHUNK
+            scores = scale[:, None] * (1 + np.minimum(c[None, start:end] + cc_add[:, None], 1.0)
+                                       * (m[None, start:end] + cdmg_add[:, None] - 1))
+            order = np.argsort(-scores, axis=0, kind="stable")[:3]
+            ranked = np.take_along_axis(scores, order, axis=0)
+            if len(ranked) < 3:
+                ranked = np.vstack([ranked, np.full((3 - len(ranked), ranked.shape[1]), -np.inf)])
+            top[:len(order), start:end] = order
+            top[len(order):, start:end] = 0
+            tolerance = MARGIN * np.abs(ranked[0])
+            gaps[0, start:end] = ranked[0] - ranked[1] - tolerance
+            gaps[1, start:end] = ranked[1] - ranked[2] - tolerance
+
+        # A winning group with several entries supplies the runner-up itself
+        shared = np.array([len(group) > 1 for group in groups])[top[0]]
+        first_entry = np.array([group[0] for group in groups])
+        second_entry = np.array([group[1] if len(group) > 1 else -1 for group in groups])
+
+        shape = (len(self.cc_edges), len(self.cdmg_edges))
+        best = first_entry[top[0]].reshape(shape)
+        second = np.where(shared, second_entry[top[0]], first_entry[top[1]]).reshape(shape)
+        clear = ((gaps[0] > 0) & (shared | (gaps[1] > 0))).reshape(shape)
+
+        def corners(grid):
+            return grid[:-1, :-1], grid[1:, :-1], grid[:-1, 1:], grid[1:, 1:]
+
+        confident = np.logical_and.reduce(corners(clear))
+        for grid in (best, second):
+            first, *others = corners(grid)
+            for other in others:
+                confident &= first == other
+
+        # Crit chance caps bend the score surface; cells they cross are not bilinear
+        for kink in 1.0 - cc_add:
+            confident[(self.cc_edges[:-1] < kink) & (kink < self.cc_edges[1:]), :] = False
+
+        winner = np.where(confident, best[:-1, :-1], -1).astype(np.int32)
+        runner_up = np.where(confident, second[:-1, :-1], -1).astype(np.int32)
+        # Plain lists for scalar lookups, which would otherwise be dominated by NumPy call overhead
+        self._winner_rows = winner.tolist()
+        self._runner_up_rows = runner_up.tolist()
+        return winner, runner_up
+
+    def coverage(self):
+        """Share of cells answered from the map (the rest lie on crossover boundaries)"""
+        return float((self.winner >= 0).mean())
+
+    def _cells(self, crit_chance, crit_dmg):
+        """Cell indices for stats in percent (-1 outside the map)"""
+        c = np.asarray(crit_chance, dtype=np.float64) / 100.0
+        m = np.asarray(crit_dmg, dtype=np.float64) / 100.0
+        cc_edges, cdmg_edges = self.cc_edges, self.cdmg_edges
+        i = np.floor((c - cc_edges[0]) / (cc_edges[1] - cc_edges[0])).astype(np.intp)
+        j = np.floor((m - cdmg_edges[0]) / (cdmg_edges[1] - cdmg_edges[0])).astype(np.intp)
+        # The upper edge of the map belongs to the last cell
+        i = np.where(c == cc_edges[-1], len(cc_edges) - 2, i)
+        j = np.where(m == cdmg_edges[-1], len(cdmg_edges) - 2, j)
+        inside = (i >= 0) & (i < len(cc_edges) - 1) & (j >= 0) & (j < len(cdmg_edges) - 1)
+        return np.where(inside, i, -1), np.where(inside, j, -1)
+
+    def _exact(self, dmg, atk_speed, crit_chance, crit_dmg):
+        results = dps_engine.score_modifications(dmg, atk_speed, crit_chance, crit_dmg, self.catalog)
+        ranked = sorted(results, key=lambda x: x["dps"], reverse=True)
+        return ranked[0]["name"], ranked[1]["name"] if len(ranked) > 1 else None
+
+    def lookup(self, dmg, atk_speed, crit_chance, crit_dmg):
+        """(winner, runner-up, from_map) for one unit (crit values in percent)"""
+        dps_engine.validate_stats(dmg, atk_speed, crit_chance, crit_dmg)
+        cell = self._cell(crit_chance / 100.0, crit_dmg / 100.0)
+        if cell is not None:
+            i, j = cell
+            winner = self._winner_rows[i][j]
+            if winner >= 0:
+                return self.names[winner], self.names[self._runner_up_rows[i][j]], True
+        return (*self._exact(dmg, atk_speed, crit_chance, crit_dmg), False)
+
+    def _cell(self, c, m):
+        """(row, column) of the cell containing fractions c and m, or None outside the map"""
+        c_lo, c_hi, c_cells = self._c_axis
+        m_lo, m_hi, m_cells = self._m_axis
+        if not (c_lo <= c <= c_hi and m_lo <= m <= m_hi):
+            return None
+        i = min(int((c - c_lo) / (c_hi - c_lo) * c_cells), c_cells - 1)
+        j = min(int((m - m_lo) / (m_hi - m_lo) * m_cells), m_cells - 1)
+        return i, j
+
+    def lookup_many(self, dmg, atk_speed, crit_chance, crit_dmg):
+        """Vectorized lookup for a roster: (winner index, runner-up index, from_map) arrays
+
+        Indices refer to `names`. Units in boundary cells or outside the map
+        are scored exactly with dps_batch.
+        """
+        import dps_batch
+
+        dmg, atk_speed, crit_chance, crit_dmg = dps_batch.as_stat_arrays(dmg, atk_speed, crit_chance, crit_dmg)
+        i, j = self._cells(crit_chance, crit_dmg)
+        inside = i >= 0
+        winner = np.full(len(dmg), -1, dtype=np.int32)
+        runner_up = np.full(len(dmg), -1, dtype=np.int32)
+        winner[inside] = self.winner[i[inside], j[inside]]
+        runner_up[inside] = self.runner_up[i[inside], j[inside]]
+
+        exact = winner < 0
+        if exact.any():
+            _, scores = dps_batch.score_matrix(dmg[exact], atk_speed[exact], crit_chance[exact], crit_dmg[exact], self.catalog)
+            _, base = dps_batch.base_dps(dmg[exact], atk_speed[exact], crit_chance[exact], crit_dmg[exact])
+            # Same tie order as the engine's stable sort: catalog order, No Modification last
+            order = np.argsort(-np.column_stack([scores, base]), axis=1, kind="stable")
+            winner[exact] = order[:, 0]
+            runner_up[exact] = order[:, 1] if order.shape[1] > 1 else -1
+        return winner, runner_up, ~exact
+
+    def grid_rows(self):
+        """Yield (crit_chance, crit_dmg, winner, runner_up, boundary) at every cell center (percent)
+
+        Boundary cells (a crossover passes through them) report the exact
+        ranking at their center.
+        """
+        cc_centers = (self.cc_edges[:-1] + self.cc_edges[1:]) * 50.0
+        cdmg_centers = (self.cdmg_edges[:-1] + self.cdmg_edges[1:]) * 50.0
+        for i, crit_chance in enumerate(cc_centers.tolist()):
+            for j, crit_dmg in enumerate(cdmg_centers.tolist()):
+                if self.winner[i, j] >= 0:
+                    yield crit_chance, crit_dmg, self.names[self.winner[i, j]], self.names[self.runner_up[i, j]], False
+                else:
+                    yield (crit_chance, crit_dmg, *self._exact(1.0, 1.0, crit_chance, crit_dmg), True)
+
+
+_cached_map = None
+
+
+def decision_map(modifications=None):
+    """The DecisionMap for a catalog, rebuilt only when the catalog version changes"""
+    global _cached_map
+    catalog = dps_catalog.as_catalog(modifications)
+    if _cached_map is None or _cached_map.version != catalog.version:
+        _cached_map = DecisionMap(catalog)
+    return _cached_map
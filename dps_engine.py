@@ -0,0 +1,282 @@
+# --- Headless DPS Engine ---
+# Pure computation used by the GUI and by scripts/batch tooling.
+# This module must not import tkinter so it can run on machines without a display.
+
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import dps_tiers
+
+DEFAULT_MODIFICATIONS = {
+    "Powerful (+50% damage)": {"type": "DMG", "value": 0.50},
+    "Lightning (-35% cooldown)": {"type": "CD", "value": 0.35},
+    "Executor (+60% crit dmg)": {"type": "CDMG", "value": 0.60},
+    "Assassin (+35% crit chance)": {"type": "CC", "value": 0.35},
+    "Trickster (-20% cooldown)": {"type": "CD", "value": 0.20},
+    "BodyBuilder (+25% damage)": {"type": "DMG", "value": 0.25},
+    "Accurate (+20% crit chance)": {"type": "CC", "value": 0.20},
+    "Strong (+10% damage)": {"type": "DMG", "value": 0.10},
+    "Fast (-10% cooldown)": {"type": "CD", "value": 0.10},
+}
+
+TIERS = ["S", "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O"]
+
+NO_MODIFICATION = "No Modification"
+
+
+def validate_stats(dmg, atk_speed, crit_chance, crit_dmg):
+    """Raise ValueError if the stats (crit values in percent) are not usable"""
+    if dmg <= 0: raise ValueError("Base DMG must be positive.")
+    if atk_speed <= 0: raise ValueError("Attack Speed must be positive.")
+    if not (0 <= crit_chance / 100.0 <= 1): raise ValueError("Crit Chance must be between 0% and 100%.")
+    if crit_dmg <= 0: raise ValueError("Crit Damage must be positive.")
+
+
+def dps_no_crit(dmg, atk_speed):
+    """DPS ignoring critical hits"""
+    return dmg * (1 / atk_speed)
+
+
+def dps_with_crit(dmg, atk_speed, crit_chance, crit_dmg_multiplier):
+    """Average DPS including crit frequency (crit values as fractions, e.g. 0.3 and 1.75)"""
+    aps = 1 / atk_speed
+    crit_dmg_value = dmg * crit_dmg_multiplier
+    dpa_avg = ((1 - crit_chance) * dmg) + (crit_chance * crit_dmg_value)
+    return dpa_avg * aps
+
+
+def apply_modification(dmg, atk_speed, crit_chance, crit_dmg_multiplier, mod_type, mod_value):
+    """Return the (dmg, atk_speed, crit_chance, crit_dmg_multiplier) tuple after one modification"""
+    if mod_type == "DMG":
+        dmg *= (1 + mod_value)
+    elif mod_type == "CD":
+        atk_speed *= (1 - mod_value)
+    elif mod_type == "CC":
+        crit_chance += mod_value
+        if crit_chance > 1.0: crit_chance = 1.0
+    elif mod_type == "CDMG":
+        crit_dmg_multiplier += mod_value
+    return dmg, atk_speed, crit_chance, crit_dmg_multiplier
+
+
+def apply_mod_data(dmg, atk_speed, crit_chance, crit_dmg_multiplier, mod_data):
+    """Apply one modification table entry ({"type", "value"} or {"effects": [...]})
+
+    As in a compiled catalog, CC effects are summed and crit chance is capped
+    at 100% once, after all effects.
+    """
+    stats = (dmg, atk_speed, crit_chance, crit_dmg_multiplier)
+    cc_add = 0.0
+    for effect in mod_data.get("effects", (mod_data,)):
+        if effect["type"] == "CC":
+            cc_add += effect["value"]
+        else:
+            stats = apply_modification(*stats, effect["type"], effect["value"])
+    dmg, atk_speed, crit_chance, crit_dmg_multiplier = stats
+    crit_chance += cc_add
+    if crit_chance > 1.0: crit_chance = 1.0
+    return dmg, atk_speed, crit_chance, crit_dmg_multiplier
+
+
+def modified_stats(dmg, atk_speed, crit_chance, crit_dmg_multiplier, modifications=None):
+    """Yield (mod_name, stats) for every modification (crit values as fractions)
+
+    modifications is either a dict table like DEFAULT_MODIFICATIONS or a
+    compiled catalog (dps_catalog.CompiledCatalog), whose precomputed factor
+    arrays are applied without any per-mod dict lookups or type dispatch.
+    """
+    if modifications is None:
+        modifications = DEFAULT_MODIFICATIONS
+    if isinstance(modifications, Mapping):
+        for mod_name, mod_data in modifications.items():
+            yield mod_name, apply_mod_data(dmg, atk_speed, crit_chance, crit_dmg_multiplier, mod_data)
+        return
+    for mod_name, dmg_factor, cd_factor, cc_add, cdmg_add in zip(
+            modifications.names, modifications.dmg_factor, modifications.cd_factor,
+            modifications.cc_add, modifications.cdmg_add):
+        temp_crit_chance = crit_chance + cc_add
+        if temp_crit_chance > 1.0: temp_crit_chance = 1.0
+        yield mod_name, (dmg * dmg_factor, atk_speed * cd_factor, temp_crit_chance, crit_dmg_multiplier + cdmg_add)
+
+
+def score_modifications(dmg, atk_speed, crit_chance, crit_dmg, modifications=None):
+    """Return unsorted [{"name", "dps"}] for every modification plus 'No Modification'"""
+    crit_chance = crit_chance / 100.0
+    crit_dmg_multiplier = crit_dmg / 100.0
+
+    results = [{"name": mod_name, "dps": dps_with_crit(*stats)}
+               for mod_name, stats in modified_stats(dmg, atk_speed, crit_chance, crit_dmg_multiplier, modifications)]
+
+    results.append({"name": NO_MODIFICATION, "dps": dps_with_crit(dmg, atk_speed, crit_chance, crit_dmg_multiplier)})
+    return results
+
+
+def assign_tiers(results_sorted, base_dps, tier_count=None):
+    """Add "tier" and "percent_change" to results already sorted by descending DPS
+
+    With tier_count=None a new tier starts wherever neighbouring DPS values
+    differ by more than 0.01 ("-" once the letters run out). Otherwise the
+    results are split into at most tier_count natural tiers (see dps_tiers).
+    """
+    if tier_count is not None:
+        return _assign_natural_tiers(results_sorted, base_dps, tier_count)
+    current_tier_index = 0
+    previous_dps = None
+
+    for res in results_sorted:
+        dps = res["dps"]
+
+        if base_dps == 0:
+            res["percent_change"] = 0.0
+        else:
+            res["percent_change"] = ((dps - base_dps) / base_dps) * 100
+
+        # Move to the next tier only when DPS changes (0.01 tolerance for floating point comparison)
+        if previous_dps is not None and abs(dps - previous_dps) > 0.01:
+            current_tier_index += 1
+
+        res["tier"] = TIERS[current_tier_index] if current_tier_index < len(TIERS) else "-"
+        previous_dps = dps
+    return results_sorted
+
+
+def _assign_natural_tiers(results_sorted, base_dps, tier_count):
+    if not 1 <= tier_count <= len(TIERS):
+        raise ValueError(f"Tier count must be between 1 and {len(TIERS)}.")
+    tiers = dps_tiers.natural_breaks([res["dps"] for res in results_sorted], tier_count)
+    for res, tier in zip(results_sorted, tiers):
+        res["percent_change"] = ((res["dps"] - base_dps) / base_dps) * 100 if base_dps != 0 else 0.0
+        res["tier"] = TIERS[tier]
+    return results_sorted
+
+
+def retier(result, tier_count):
+    """A calculate result with its tiers recomputed for tier_count (None: the 0.01 threshold tiers)
+
+    Results from calculate (and the caches) use threshold tiers, so with None
+    the result is returned as is; otherwise a copy is made and the original
+    is left untouched.
+    """
+    if tier_count is None:
+        return result
+    rows = [dict(res) for res in result["results"]]
+    assign_tiers(rows, result["base_dps_with_crit"], tier_count)
+    return dict(result, results=rows)
+
+
+def calculate(dmg, atk_speed, crit_chance, crit_dmg, modifications=None, tier_count=None):
+    """Full tier list for one unit (crit values in percent, as entered in the GUI)
+
+    Returns a dict with "base_dps_no_crit", "base_dps_with_crit" and "results",
+    a list of {"name", "dps", "tier", "percent_change"} sorted by descending DPS.
+    tier_count selects natural tiers instead of the 0.01 threshold (see assign_tiers).
+    """
+    validate_stats(dmg, atk_speed, crit_chance, crit_dmg)
+
+    base_no_crit = dps_no_crit(dmg, atk_speed)
+    base_with_crit = dps_with_crit(dmg, atk_speed, crit_chance / 100.0, crit_dmg / 100.0)
+
+    results = score_modifications(dmg, atk_speed, crit_chance, crit_dmg, modifications)
+    results_sorted = sorted(results, key=lambda x: x["dps"], reverse=True)
+    assign_tiers(results_sorted, base_with_crit, tier_count)
+
+    return {
+        "base_dps_no_crit": base_no_crit,
+        "base_dps_with_crit": base_with_crit,
+        "results": results_sorted,
+    }
+
+
+def modifications_version(modifications=None):
+    """Short content hash of a modification table, used to invalidate cached results"""
+    if modifications is None:
+        modifications = DEFAULT_MODIFICATIONS
+    if not isinstance(modifications, Mapping):
+        return modifications.version  # Compiled catalogs hash their table once
+    payload = json.dumps(modifications, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# --- Result Cache ---
+class ResultCache:
+    """Bounded LRU cache of full `calculate` results
+
+    Entries are keyed by the four stats (normalized to floats) plus the version
+    hash of the modification table. Cached results are shared, so callers must
+    treat them as read-only.
+
+    An optional `backing` store with the same get/put interface (e.g.
+    dps_cache.DiskResultCache) is consulted on a miss and receives every put.
+    """
+
+    def __init__(self, maxsize=256, backing=None):
+        self.maxsize = maxsize
+        self.backing = backing
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(dmg, atk_speed, crit_chance, crit_dmg, modifications=None, version=None):
+        """Cache key for one unit
+
+        Hashing a dict table costs far more than the key itself, so callers
+        keying many units pass its modifications_version once as `version`
+        (or a compiled catalog, which carries it).
+        """
+        # "+ 0.0" folds -0.0 into 0.0 so equal stats always share an entry
+        stats = tuple(float(v) + 0.0 for v in (dmg, atk_speed, crit_chance, crit_dmg))
+        return stats + (version if version is not None else modifications_version(modifications),)
+
+    def get(self, key):
+        """Return the cached result for key (or None), updating the counters"""
+        result = self._entries.get(key)
+        if result is None and self.backing is not None:
+            result = self.backing.get(key)
+            if result is not None:
+                self._remember(key, result)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.backing is not None:
+            self.backing.put(key, result)
+
+    def calculate(self, dmg, atk_speed, crit_chance, crit_dmg, modifications=None, key=None):
+        """Same as `calculate`, served from the cache when possible"""
+        if key is None:
+            key = self.make_key(dmg, atk_speed, crit_chance, crit_dmg, modifications)
+        result = self.get(key)
+        if result is None:
+            result = calculate(dmg, atk_speed, crit_chance, crit_dmg, modifications)
+            self.put(key, result)
+        return result
+
+    def info(self):
+        """Hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,221 @@
+# --- Multi-Modification Loadout Optimizer ---
+# Finds the best N-slot loadouts (mods may repeat) for a unit.
+#
+# A loadout only matters through four aggregates: the product of DMG factors,
+# the product of CD factors, the summed crit chance and the summed crit damage.
+# DPS never decreases when any aggregate improves, so:
+#   * mods of the same type and value are collapsed into one candidate,
+#   * each type contributes a lazily generated, best-first list of multisets,
+#   * the lists are merged best-first over (slot split, list positions), so
+#     only loadouts that can still reach the top-k are ever evaluated.
+# method="brute" enumerates every combination and is kept for verification.
+
+import heapq
+import itertools
+import math
+
+import dps_catalog
+import dps_engine
+
+EFFECT_TYPES = ("DMG", "CD", "CC", "CDMG")
+
+
+def loadout_dps(dmg, atk_speed, crit_chance, crit_dmg, mod_names, modifications=None):
+    """DPS of a unit (crit values in percent) with every modification in mod_names applied"""
+    modifications = _as_table(modifications)
+    stats = (dmg, atk_speed, crit_chance / 100.0, crit_dmg / 100.0)
+    for name in mod_names:
+        stats = dps_engine.apply_mod_data(*stats, modifications[name])
+    return dps_engine.dps_with_crit(*stats)
+
+
+def _as_table(modifications):
+    if modifications is None:
+        return dps_engine.DEFAULT_MODIFICATIONS
+    if isinstance(modifications, dps_catalog.CompiledCatalog):
+        return modifications.to_dict()
+    return modifications
+
+
+def best_loadouts(dmg, atk_speed, crit_chance, crit_dmg, slots, modifications=None, top_k=5, method="pruned"):
+    """Return the top_k loadouts as [{"mods": [names], "dps": float}], best first
+
+    Loadouts with identical effects are listed once, using the first matching
+    mod names from the catalog.
+
+    method is "pruned" (default) or "brute". The pruned search needs every mod to
+    have a single effect that helps the unit (non-negative value, cooldown below
+    100%, crit damage of at least 100%); otherwise it falls back to brute force.
+    """
+    modifications = _as_table(modifications)
+    dps_engine.validate_stats(dmg, atk_speed, crit_chance, crit_dmg)
+    if slots < 0: raise ValueError("Number of slots cannot be negative.")
+    if top_k <= 0 or not modifications:
+        return []
+
+    if method not in ("pruned", "brute"):
+        raise ValueError(f"Unknown optimizer method: {method}")
+    if method == "brute" or not _is_monotone(crit_dmg, modifications):
+        return _brute_force(dmg, atk_speed, crit_chance, crit_dmg, slots, modifications, top_k)
+    return _pruned_search(dmg, atk_speed, crit_chance, crit_dmg, slots, modifications, top_k)
+
+
+def _is_monotone(crit_dmg, modifications):
+    if crit_dmg < 100:
+        return False  # Below 1x crit damage, more crit chance lowers DPS
+    for mod_data in modifications.values():
+        if "effects" in mod_data:
+            return False  # Multi-effect mods do not collapse into a single stat
+        value = mod_data["value"]
+        if value < 0:
+            return False
+        if mod_data["type"] == "CD" and value >= 1:
+            return False
+    return True
+
+
+def _effect_key(mod_data):
+    effects = mod_data.get("effects", (mod_data,))
+    return tuple(sorted((e["type"], e["value"]) if e["type"] in EFFECT_TYPES else ("", 0.0) for e in effects))
+
+
+def _brute_force(dmg, atk_speed, crit_chance, crit_dmg, slots, modifications, top_k):
+    scored = []
+    seen = set()
+    for combo in itertools.combinations_with_replacement(list(modifications.keys()), slots):
+        # Loadouts with identical effects are reported once, like in the pruned search
+        key = tuple(sorted(_effect_key(modifications[name]) for name in combo))
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            dps = loadout_dps(dmg, atk_speed, crit_chance, crit_dmg, combo, modifications)
+        except ZeroDivisionError:
+            continue
+        scored.append({"mods": list(combo), "dps": dps})
+    return heapq.nlargest(top_k, scored, key=lambda x: x["dps"])
+
+
+class _MultisetStream:
+    """Multisets of a fixed size drawn (with repetition) from values sorted best-first,
+    generated lazily in order of decreasing aggregate"""
+
+    def __init__(self, weights, size):
+        # weights are log-scale or additive gains, sorted descending; aggregate = sum
+        self.weights = weights
+        self.size = size
+        self.items = []
+        start = (0,) * size
+        self.heap = [(-self._score(start), start)]
+        self.seen = {start}
+
+    def _score(self, idx):
+        return sum(self.weights[i] for i in idx)
+
+    def get(self, position):
+        """Return (aggregate, index tuple) at the given rank, or None when exhausted"""
+        while len(self.items) <= position and self.heap:
+            neg_score, idx = heapq.heappop(self.heap)
+            self.items.append((-neg_score, idx))
+            for p in range(self.size):
+                # Keep index tuples non-decreasing so each multiset has one representation
+                if idx[p] + 1 < len(self.weights) and (p == self.size - 1 or idx[p] + 1 <= idx[p + 1]):
+                    nxt = idx[:p] + (idx[p] + 1,) + idx[p + 1:]
+                    if nxt not in self.seen:
+                        self.seen.add(nxt)
+                        heapq.heappush(self.heap, (-self._score(nxt), nxt))
+        return self.items[position] if position < len(self.items) else None
+
+
+def _pruned_search(dmg, atk_speed, crit_chance, crit_dmg, slots, modifications, top_k):
+    # Collapse mods with the same effect; unknown types have no effect and share one group
+    groups = {}
+    for name, mod_data in modifications.items():
+        mod_type = mod_data["type"] if mod_data["type"] in EFFECT_TYPES else None
+        value = mod_data["value"] if mod_type else 0.0
+        groups.setdefault(mod_type, {}).setdefault(value, []).append(name)
+
+    group_keys = list(groups.keys())
+    group_values = {}
+    group_weights = {}
+    for key in group_keys:
+        values = list(groups[key].keys())
+        if key == "DMG":
+            weights = [math.log1p(v) for v in values]
+        elif key == "CD":
+            weights = [-math.log1p(-v) for v in values]
+        else:
+            weights = list(values)
+        order = sorted(range(len(values)), key=lambda i: weights[i], reverse=True)
+        group_values[key] = [values[i] for i in order]
+        group_weights[key] = [weights[i] for i in order]
+
+    c = crit_chance / 100.0
+    m = crit_dmg / 100.0
+    streams = {}
+
+    def entry(split, g, position):
+        count = split[g]
+        if count == 0:
+            return (0.0, ()) if position == 0 else None
+        key = (g, count)
+        if key not in streams:
+            streams[key] = _MultisetStream(group_weights[group_keys[g]], count)
+        return streams[key].get(position)
+
+    def evaluate(split, positions):
+        totals = {}
+        chosen = []
+        for g, position in enumerate(positions):
+            item = entry(split, g, position)
+            if item is None:
+                return None
+            key = group_keys[g]
+            values = [group_values[key][i] for i in item[1]]
+            chosen.extend(groups[key][v][0] for v in values)
+            totals[key] = values
+        d = dmg
+        for v in totals.get("DMG", []):
+            d *= (1 + v)
+        s = atk_speed
+        for v in totals.get("CD", []):
+            s *= (1 - v)
+        cc = min(c + sum(totals.get("CC", [])), 1.0)
+        cm = m + sum(totals.get("CDMG", []))
+        return {"mods": chosen, "dps": dps_engine.dps_with_crit(d, s, cc, cm)}
+
+    heap = []
+    seen = set()
+    counter = itertools.count()
+
+    def push(split, positions):
+        state = (split, positions)
+        if state in seen:
+            return
+        seen.add(state)
+        result = evaluate(split, positions)
+        if result is not None:
+            heapq.heappush(heap, (-result["dps"], next(counter), state, result))
+
+    for split in _compositions(slots, len(group_keys)):
+        push(split, (0,) * len(group_keys))
+
+    best = []
+    while heap and len(best) < top_k:
+        _, _, (split, positions), result = heapq.heappop(heap)
+        best.append(result)
+        for g in range(len(positions)):
+            if split[g]:
+                push(split, positions[:g] + (positions[g] + 1,) + positions[g + 1:])
+    return best
+
+
+def _compositions(total, parts):
+    """All ways to split `total` slots across `parts` groups"""
+    if parts == 0:
+        if total == 0:
+            yield ()
+        return
+    for first in range(total + 1):
+        for rest in _compositions(total - first, parts - 1):
+            yield (first,) + rest
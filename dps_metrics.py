@@ -0,0 +1,180 @@
+# --- Instrumentation ---
+# Opt-in timers and counters for the app's hot paths.
+#
+#   with dps_metrics.timer("store.load"): ...
+#   @dps_metrics.timed("gui.apply_theme")
+#   dps_metrics.count("result_cache.hit")
+#
+# Recording is off unless switched on (DPS_METRICS=1, the GUI's F12 debug panel
+# or the CLI's --metrics option). While off, timer() hands out one shared
+# no-op context manager and every other call returns after a single flag
+# check, so instrumented code pays about one function call per site.
+
+import functools
+import json
+import os
+import sys
+import time
+from collections import deque
+
+WINDOW = 1024  # Most recent samples per timer kept for percentiles and the histogram
+BUCKET_BOUNDS_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)  # Upper bucket edges; the last bucket is open
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, -(-len(sorted_values) * percent // 100) - 1)]
+
+
+class RollingHistogram:
+    """Durations of one timer: lifetime count/total plus a window of recent samples"""
+    __slots__ = ("samples", "count", "total", "max")
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def buckets(self):
+        """Counts of the recent samples per BUCKET_BOUNDS_MS bucket (one extra for slower samples)"""
+        counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        for seconds in self.samples:
+            ms = seconds * 1000
+            index = 0
+            while index < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[index]:
+                index += 1
+            counts[index] += 1
+        return counts
+
+    def snapshot(self):
+        recent = sorted(self.samples)
+        to_ms = lambda seconds: round(seconds * 1000, 4) if seconds is not None else None
+        return {
+            "count": self.count,
+            "total_ms": to_ms(self.total),
+            "mean_ms": to_ms(self.total / self.count) if self.count else None,
+            "max_ms": to_ms(self.max),
+            "window": len(recent),
+            "p50_ms": to_ms(_percentile(recent, 50)),
+            "p90_ms": to_ms(_percentile(recent, 90)),
+            "p99_ms": to_ms(_percentile(recent, 99)),
+            "histogram": self.buckets(),
+        }
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Registry of named timers (RollingHistogram) and counters"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timers = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def timer(self, name):
+        """Context manager timing its block under `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of a function under `name`"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        """Add a duration measured elsewhere (always recorded; see observe)"""
+        histogram = self.timers.get(name)
+        if histogram is None:
+            histogram = self.timers[name] = RollingHistogram()
+        histogram.add(seconds)
+
+    def observe(self, name, seconds):
+        """Add a duration the caller measures anyway, if recording is on"""
+        if self.enabled:
+            self.record(name, seconds)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        self.timers.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "buckets_ms": list(BUCKET_BOUNDS_MS),
+            # Copies first: worker threads (live calculation, the service's batches) may add entries meanwhile
+            "timers": {name: histogram.snapshot() for name, histogram in sorted(list(self.timers.items()))},
+            "counters": dict(sorted(list(self.counters.items()))),
+        }
+
+    def dump(self, path):
+        """Write snapshot() as JSON to path ('-' for stderr)"""
+        if path == "-":
+            json.dump(self.snapshot(), sys.stderr, indent=4)
+            print(file=sys.stderr)
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+
+# Process-wide registry used by the module-level helpers
+metrics = Metrics(enabled=os.environ.get("DPS_METRICS", "") not in ("", "0"))
+timer = metrics.timer
+timed = metrics.timed
+observe = metrics.observe
+count = metrics.count
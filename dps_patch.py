@@ -0,0 +1,159 @@
+# --- Balance Patch Report ---
+# Compares every unit's tier list under an old and a new modification catalog,
+# recomputing only the units whose ranking or tiers can move.
+#
+# As in dps_decision, a modification's DPS is
+#     dmg / atk_speed * scale * (1 + min(c + cc_add, 1) * (m + cdmg_add - 1))
+# with scale = dmg_factor / cd_factor, so the order of a unit's list depends
+# on its crit chance c and crit damage m only. Units are grouped by that
+# crit profile and each profile is ranked once per catalog. A profile whose
+# order changes marks all of its units. Otherwise only the 0.01 tier
+# threshold still depends on s = dmg / atk_speed: neighbours a gap g apart
+# are in different tiers when s * g > 0.01, so a gap that a patch moves from
+# g_old to g_new can only move tiers for units with s between 0.01 / g_old
+# and 0.01 / g_new. The report uses these threshold tiers only: natural tiers
+# (dps_tiers) break k-means ties by rounding, so they can differ between two
+# units with the same profile.
+#
+# Marked units are recomputed with dps_engine.calculate under both catalogs,
+# so their rows are exactly what two full re-scores would show.
+
+import dps_catalog
+import dps_engine
+from dps_roster import UnitStats
+
+TIE_MARGIN = 1e-9     # Relative gap below which a changed mod counts as tied with its neighbour
+ROUNDING_SLACK = 1e-12  # Relative rounding error allowed for when testing the 0.01 threshold
+
+
+def diff_catalogs(old, new):
+    """Names of the modifications a patch touches: {"changed", "added", "removed"}
+
+    Only effects count; cost and rarity do not change any DPS.
+    """
+    old = dps_catalog.as_catalog(old)
+    new = dps_catalog.as_catalog(new)
+    old_effects = dict(zip(old.names, old.effects))
+    new_effects = dict(zip(new.names, new.effects))
+    return {
+        "changed": [name for name in new.names if name in old_effects and old_effects[name] != new_effects[name]],
+        "added": [name for name in new.names if name not in old_effects],
+        "removed": [name for name in old.names if name not in new_effects],
+    }
+
+
+def _columns(catalog):
+    """(scale, cc_add, cdmg_add) of every entry: the catalog's mods, then NO_MODIFICATION"""
+    scale = [dmg / cd for dmg, cd in zip(catalog.dmg_factor, catalog.cd_factor)] + [1.0]
+    return list(zip(scale, list(catalog.cc_add) + [0.0], list(catalog.cdmg_add) + [0.0]))
+
+
+def _screen_profile(old_columns, new_columns, changed, c, m):
+    """Which units with crit profile (c, m) can move: None, True (all) or a list of (low, high) ranges of dmg / atk_speed"""
+    # DPS divided by dmg / atk_speed; entries outside `changed` are the same under both catalogs
+    old_rel = [scale * (1 + min(c + cc_add, 1.0) * (m + cdmg_add - 1)) for scale, cc_add, cdmg_add in old_columns]
+    new_rel = list(old_rel)
+    for i in changed:
+        scale, cc_add, cdmg_add = new_columns[i]
+        new_rel[i] = scale * (1 + min(c + cc_add, 1.0) * (m + cdmg_add - 1))
+    # Stable, like the engine's sort: tied entries keep catalog order
+    order = sorted(range(len(old_rel)), key=old_rel.__getitem__, reverse=True)
+
+    ranges = []
+    for above, below in zip(order, order[1:]):
+        if above not in changed and below not in changed:
+            continue  # Same arithmetic under both catalogs, so the engine sees the same order and gap
+        old_gap = old_rel[above] - old_rel[below]
+        new_gap = new_rel[above] - new_rel[below]
+        # A swapped pair reorders the list; near ties may come out either way in the engine's own rounding
+        if old_gap <= TIE_MARGIN * abs(old_rel[above]) or new_gap <= TIE_MARGIN * abs(new_rel[above]):
+            return True
+        slack = ROUNDING_SLACK * max(abs(old_rel[above]), abs(new_rel[above]))
+        ranges.append((0.01 / (max(old_gap, new_gap) + slack), 0.01 / (min(old_gap, new_gap) - slack)))
+    return ranges or None
+
+
+def _moves(old_result, new_result, touched):
+    """Rows of one unit whose rank or tier moved, plus every touched mod (None if nothing moved)"""
+    old_rows = {res["name"]: (rank, res) for rank, res in enumerate(old_result["results"], start=1)}
+    new_rows = {res["name"]: (rank, res) for rank, res in enumerate(new_result["results"], start=1)}
+    names = list(new_rows) + [name for name in old_rows if name not in new_rows]
+    moves = []
+    moved = False
+    for name in names:
+        old_rank, old_res = old_rows.get(name, (None, None))
+        new_rank, new_res = new_rows.get(name, (None, None))
+        shifted = old_res is None or new_res is None or old_rank != new_rank or old_res["tier"] != new_res["tier"]
+        moved = moved or shifted
+        if shifted or name in touched:
+            moves.append({
+                "modification": name,
+                "old_rank": old_rank,
+                "new_rank": new_rank,
+                "old_tier": old_res["tier"] if old_res else None,
+                "new_tier": new_res["tier"] if new_res else None,
+                "old_dps": old_res["dps"] if old_res else None,
+                "new_dps": new_res["dps"] if new_res else None,
+            })
+    return moves if moved else None
+
+
+def patch_report(units, old, new):
+    """Tier moves and DPS changes of every unit between two modification catalogs
+
+    units is an iterable of (name, stats) with stats as a dict or UnitStats
+    (crit values in percent, already valid); old and new are catalogs in any
+    form accepted by dps_catalog.as_catalog.
+
+    Returns the diff_catalogs lists plus "units", "profiles" (distinct crit
+    profiles), "recomputed" and "moved": one {"name", "best_before",
+    "best_after", "best_change", "moves"} per unit whose ranking or tiers
+    changed, biggest change of the best DPS (percent) first. Units whose mod
+    list changed (mods added or removed, or the catalog reordered) are all
+    recomputed.
+    """
+    old = dps_catalog.as_catalog(old)
+    new = dps_catalog.as_catalog(new)
+    diff = diff_catalogs(old, new)
+    touched = set(diff["changed"] + diff["added"] + diff["removed"])
+    old_columns = _columns(old)
+    new_columns = _columns(new)
+    comparable = old.names == new.names
+    changed = {i for i, (a, b) in enumerate(zip(old_columns, new_columns)) if a != b} if comparable else None
+
+    profiles = {}
+    total = recomputed = 0
+    moved = []
+    for name, stats in units:
+        dmg, atk_speed, crit_chance, crit_dmg = stats = tuple(UnitStats.from_dict(stats))
+        total += 1
+        if comparable:
+            key = (crit_chance, crit_dmg)
+            screen = profiles.get(key, False)
+            if screen is False:
+                screen = profiles[key] = (_screen_profile(old_columns, new_columns, changed, crit_chance / 100.0,
+                                                          crit_dmg / 100.0) if changed else None)
+            if screen is None:
+                continue
+            if screen is not True:
+                s = dmg / atk_speed
+                if not any(low <= s <= high for low, high in screen):
+                    continue
+        recomputed += 1
+        old_result = dps_engine.calculate(*stats, old)
+        new_result = dps_engine.calculate(*stats, new)
+        moves = _moves(old_result, new_result, touched)
+        if moves is None:
+            continue
+        best_before = old_result["results"][0]
+        best_after = new_result["results"][0]
+        moved.append({
+            "name": name,
+            "best_before": best_before["name"],
+            "best_after": best_after["name"],
+            "best_change": (best_after["dps"] - best_before["dps"]) / best_before["dps"] * 100 if best_before["dps"] else 0.0,
+            "moves": moves,
+        })
+
+    moved.sort(key=lambda unit: (-abs(unit["best_change"]), -len(unit["moves"])))
+    return dict(diff, units=total, profiles=len(profiles), recomputed=recomputed, moved=moved)
@@ -0,0 +1,343 @@
+# --- Level Progression and Upgrade Planner ---
+# Per-unit stat tables by level, and a planner that spends a resource budget
+# on level-ups and modifications.
+#
+# A ProgressionTable keeps only the known levels (e.g. the saved "Medusa lvl 1"
+# and "Medusa lvl 25" snapshots) in compact columns, plus the cumulative
+# resource cost of reaching each of them. Stats and costs of the levels in
+# between are interpolated linearly; levels outside the table are rejected
+# rather than extrapolated.
+#
+# Planning a unit is two dynamic programs:
+#   * Target: the best (level, loadout) the budget buys. The loadouts of each
+#     level are reduced once to a cost frontier (the cheapest loadout for every
+#     DPS step), so the target is a scan over levels with a bisect into each
+#     frontier. Loadout DPS and frontiers are memoized per (table, level) in
+#     the Planner and shared by every snapshot of a unit and every budget, so
+#     planning a roster takes time linear in its size.
+#   * Order: level-ups form a chain and mods can go in at any point. A DP over
+#     (level-ups done, mods applied) picks the order with the largest area
+#     under the DPS vs. resources spent curve, i.e. the most DPS early on.
+
+import bisect
+import itertools
+import json
+import math
+import re
+from array import array
+
+import dps_catalog
+import dps_engine
+from dps_loadout import _as_table
+from dps_roster import STAT_KEYS, UnitStats
+
+LEVEL_PATTERN = re.compile(r"^(.*\S)\s+lvl\s*(\d+)$", re.IGNORECASE)
+COST_TOLERANCE = 1e-9  # Budget slack for float cost sums such as 0.1 + 0.2
+
+
+def split_unit_name(name):
+    """("Medusa", 25) for "Medusa lvl 25", or (name, None) if the name has no level"""
+    match = LEVEL_PATTERN.match(name)
+    if match is None:
+        return name, None
+    return match.group(1), int(match.group(2))
+
+
+class ProgressionTable:
+    """Known stats of one unit by level (parallel arrays), interpolated linearly in between
+
+    `cost` holds the cumulative resources needed to reach each known level from
+    the first one (default: one per level).
+    """
+    __slots__ = ("name", "levels", "dmg", "atk_speed", "crit_chance", "crit_dmg", "cost")
+
+    def __init__(self, name, rows):
+        """rows: (level, stats, cumulative cost or None) with stats as a dict or UnitStats"""
+        rows = sorted(rows, key=lambda row: row[0])
+        if not rows:
+            raise ValueError(f"Progression table '{name}' has no levels.")
+        self.name = name
+        self.levels = array("i")
+        self.dmg, self.atk_speed, self.crit_chance, self.crit_dmg, self.cost = (array("d") for _ in range(5))
+        given = [cost is not None for _, _, cost in rows]
+        if any(given) and not all(given):
+            raise ValueError(f"Progression table '{name}': give a cost for every level or for none.")
+        for level, stats, cost in rows:
+            if isinstance(level, bool) or not isinstance(level, int) or level < 1:
+                raise ValueError(f"Progression table '{name}': levels must be positive integers.")
+            if self.levels and level == self.levels[-1]:
+                raise ValueError(f"Progression table '{name}': level {level} is listed twice.")
+            stats = UnitStats.from_dict(stats)
+            try:
+                dps_engine.validate_stats(*stats)
+            except ValueError as e:
+                raise ValueError(f"Progression table '{name}', level {level}: {e}") from e
+            if cost is None:
+                cost = float(level - rows[0][0])
+            elif isinstance(cost, bool) or not isinstance(cost, (int, float)) or not math.isfinite(cost):
+                raise ValueError(f"Progression table '{name}': costs must be finite numbers.")
+            elif cost < (self.cost[-1] if self.cost else 0.0):
+                raise ValueError(f"Progression table '{name}': cumulative costs cannot decrease.")
+            self.levels.append(level)
+            for column, value in zip(self.columns(), stats):
+                column.append(value)
+            self.cost.append(float(cost))
+
+    @classmethod
+    def from_dict(cls, name, data):
+        """Build from the file layout: {"levels": [...], "dmg": [...], ..., "cost": [...] (optional)}"""
+        try:
+            levels = data["levels"]
+            columns = [data[key] for key in STAT_KEYS]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Progression table '{name}' needs 'levels' and {', '.join(STAT_KEYS)}.") from e
+        costs = data.get("cost") or [None] * len(levels)
+        if any(len(column) != len(levels) for column in columns + [costs]):
+            raise ValueError(f"Progression table '{name}': every column needs one value per level.")
+        return cls(name, [(level, UnitStats(*values), cost) for level, cost, *values in zip(levels, costs, *columns)])
+
+    def to_dict(self):
+        data = {"levels": list(self.levels)}
+        for key, column in zip(STAT_KEYS, self.columns()):
+            data[key] = list(column)
+        data["cost"] = list(self.cost)
+        return data
+
+    def columns(self):
+        return self.dmg, self.atk_speed, self.crit_chance, self.crit_dmg
+
+    @property
+    def min_level(self):
+        return self.levels[0]
+
+    @property
+    def max_level(self):
+        return self.levels[-1]
+
+    def _locate(self, level):
+        """(row, weight): level lies between rows row and row + 1, weight of row + 1"""
+        if not self.min_level <= level <= self.max_level:
+            raise ValueError(f"{self.name} has no stats for level {level} (known: {self.min_level}-{self.max_level}).")
+        row = bisect.bisect_right(self.levels, level) - 1
+        if self.levels[row] == level:
+            return row, 0.0
+        return row, (level - self.levels[row]) / (self.levels[row + 1] - self.levels[row])
+
+    def _interpolate(self, column, row, weight):
+        if not weight:
+            return column[row]
+        return column[row] + (column[row + 1] - column[row]) * weight
+
+    def stats(self, level):
+        row, weight = self._locate(level)
+        return UnitStats(*(self._interpolate(column, row, weight) for column in self.columns()))
+
+    def total_cost(self, level):
+        """Resources needed to reach level from the first level of the table"""
+        row, weight = self._locate(level)
+        return self._interpolate(self.cost, row, weight)
+
+
+def tables_from_units(units):
+    """{base name: ProgressionTable} from "NAME lvl N" snapshots (one resource per level)
+
+    Units without a level in their name are left out.
+    """
+    rows = {}
+    for name, stats in units:
+        base, level = split_unit_name(name)
+        if level is not None:
+            rows.setdefault(base, []).append((level, stats, None))
+    return {base: ProgressionTable(base, base_rows) for base, base_rows in rows.items()}
+
+
+def load_tables(path):
+    """Read a progression file ({unit name: table layout}); raises ValueError or OSError"""
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("A progression file must be a JSON object of unit tables.")
+    return {name: ProgressionTable.from_dict(name, table) for name, table in data.items()}
+
+
+def save_tables(path, tables):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({name: table.to_dict() for name, table in tables.items()}, f, indent=4)
+
+
+# --- Planner ---
+class Planner:
+    """Upgrade plans for many units, sharing memoized loadout DPS and cost frontiers
+
+    Loadouts are multisets of up to `slots` catalog mods, priced with the
+    catalog's "cost" (0 when not given).
+    """
+
+    def __init__(self, modifications=None, slots=1):
+        if slots < 0:
+            raise ValueError("Number of slots cannot be negative.")
+        catalog = dps_catalog.as_catalog(modifications)
+        table = _as_table(catalog)
+        self.names = catalog.names
+        self.mod_data = [table[name] for name in self.names]
+        self.mod_costs = list(catalog.cost)
+        self.slots = slots
+        self.loadouts = [combo for size in range(slots + 1)
+                         for combo in itertools.combinations_with_replacement(range(len(self.names)), size)]
+        self.loadout_costs = [sum(self.mod_costs[i] for i in loadout) for loadout in self.loadouts]
+        self._dps = {}        # (table, level, loadout) -> DPS
+        self._frontiers = {}  # (table, level) -> (costs, DPS values, loadouts), all increasing
+        self.evaluations = 0
+
+    def _evaluate(self, table, level, loadouts):
+        """Compute and remember the DPS of several loadouts at one level (stats are interpolated once)"""
+        dmg, atk_speed, crit_chance, crit_dmg = table.stats(level)
+        # Modified stats by loadout; a loadout extends its prefix by one mod (loadouts come shortest first)
+        applied = {(): (dmg, atk_speed, crit_chance / 100.0, crit_dmg / 100.0)}
+        for loadout in loadouts:
+            stats = applied.get(loadout)
+            if stats is None:
+                stats = applied.get(loadout[:-1])
+                if stats is None:
+                    stats = applied[()]
+                    for i in loadout[:-1]:
+                        stats = dps_engine.apply_mod_data(*stats, self.mod_data[i])
+                stats = applied[loadout] = dps_engine.apply_mod_data(*stats, self.mod_data[loadout[-1]])
+            self._dps[(table, level, loadout)] = dps_engine.dps_with_crit(*stats)
+        self.evaluations += len(loadouts)
+
+    def loadout_dps(self, table, level, loadout):
+        """DPS of the unit at level with the mods of loadout (sorted catalog indices)"""
+        key = (table, level, loadout)
+        if key not in self._dps:
+            self._evaluate(table, level, [loadout])
+        return self._dps[key]
+
+    def frontier(self, table, level):
+        """Loadouts that beat every cheaper one at level, cheapest first"""
+        key = (table, level)
+        frontier = self._frontiers.get(key)
+        if frontier is None:
+            self._evaluate(table, level, self.loadouts)
+            priced = sorted(((cost, -self._dps[(table, level, loadout)], loadout)
+                             for cost, loadout in zip(self.loadout_costs, self.loadouts)), key=lambda item: (item[0], item[1]))
+            costs, values, loadouts = [], [], []
+            for cost, negative_dps, loadout in priced:
+                if not values or -negative_dps > values[-1]:
+                    costs.append(cost)
+                    values.append(-negative_dps)
+                    loadouts.append(loadout)
+            frontier = self._frontiers[key] = (costs, values, loadouts)
+        return frontier
+
+    def _target(self, table, level, budget):
+        """(dps, spent, target level, loadout) with the highest DPS, then the lowest spend"""
+        best = None
+        start_cost = table.total_cost(level)
+        for target in range(level, table.max_level + 1):
+            level_cost = table.total_cost(target) - start_cost
+            if level_cost > budget + COST_TOLERANCE:
+                break  # Cumulative costs never decrease
+            costs, values, loadouts = self.frontier(table, target)
+            index = bisect.bisect_right(costs, budget - level_cost + COST_TOLERANCE) - 1
+            if index < 0:
+                continue
+            candidate = (values[index], level_cost + costs[index], target, loadouts[index])
+            if best is None or candidate[0] > best[0] or (candidate[0] == best[0] and candidate[1] < best[1]):
+                best = candidate
+        return best
+
+    def _order(self, table, level, target, loadout):
+        """Steps from (level, no mods) to (target, loadout) with the largest DPS-over-spend area"""
+        mods = list(loadout)
+        full = (1 << len(mods)) - 1
+        level_steps = [table.total_cost(lvl + 1) - table.total_cost(lvl) for lvl in range(level, target)]
+        ups = len(level_steps)
+
+        applied = [tuple(sorted(mods[i] for i in range(len(mods)) if mask >> i & 1)) for mask in range(full + 1)]
+
+        def state_dps(done, mask):
+            return self.loadout_dps(table, level + done, applied[mask])
+
+        # area[done][mask]: best area from that state on; choice: mod index to apply, or -1 for a level-up
+        area = [[0.0] * (full + 1) for _ in range(ups + 1)]
+        choice = [[None] * (full + 1) for _ in range(ups + 1)]
+        for done in range(ups, -1, -1):
+            for mask in range(full, -1, -1):
+                if done == ups and mask == full:
+                    continue
+                current = state_dps(done, mask)
+                best = None
+                for i in range(len(mods)):
+                    if not mask >> i & 1:
+                        value = current * self.mod_costs[mods[i]] + area[done][mask | 1 << i]
+                        if best is None or value > best:
+                            best, choice[done][mask] = value, i
+                if done < ups:
+                    value = current * level_steps[done] + area[done + 1][mask]
+                    if best is None or value > best:
+                        best, choice[done][mask] = value, -1
+                area[done][mask] = best
+
+        steps = []
+        done, mask = 0, 0
+        while choice[done][mask] is not None:
+            step = choice[done][mask]
+            if step < 0:
+                done += 1
+                steps.append({"action": "level", "level": level + done, "cost": level_steps[done - 1]})
+            else:
+                mask |= 1 << step
+                steps.append({"action": "mod", "modification": self.names[mods[step]], "cost": self.mod_costs[mods[step]]})
+            steps[-1]["dps"] = state_dps(done, mask)
+        return steps
+
+    def plan(self, table, level, budget, name=None):
+        """Best level and loadout for a unit at level within budget, with the order to buy them in
+
+        Returns {"name", "unit", "start_level", "level", "mods", "base_dps",
+        "dps", "spent", "steps": [{"action": "level"|"mod", "level" or
+        "modification", "cost", "dps"}]}.
+        """
+        if budget < 0:
+            raise ValueError("Budget cannot be negative.")
+        dps, spent, target, loadout = self._target(table, level, budget)
+        return {
+            "name": name if name is not None else f"{table.name} lvl {level}",
+            "unit": table.name,
+            "start_level": level,
+            "level": target,
+            "mods": [self.names[i] for i in loadout],
+            "base_dps": self.loadout_dps(table, level, ()),
+            "dps": dps,
+            "spent": spent,
+            "steps": self._order(table, level, target, loadout),
+        }
+
+
+def plan_roster(units, budget, tables=None, modifications=None, slots=1):
+    """Plan every "NAME lvl N" unit with the same budget
+
+    tables maps base names to ProgressionTables (default: built from the units
+    themselves). Returns (plans, skipped) with skipped as (name, reason) pairs.
+    """
+    units = list(units)
+    if tables is None:
+        tables = tables_from_units(units)
+    planner = Planner(modifications, slots)
+    plans, skipped = [], []
+    for name, _ in units:
+        base, level = split_unit_name(name)
+        if level is None:
+            skipped.append((name, "no level in the name (expected 'NAME lvl N')"))
+        elif base not in tables:
+            skipped.append((name, f"no progression table for '{base}'"))
+        else:
+            try:
+                plans.append(planner.plan(tables[base], level, budget, name))
+            except ValueError as e:
+                skipped.append((name, str(e)))
+    return plans, skipped
@@ -0,0 +1,89 @@
+# --- Roster Queries ---
+# Top-k, best-per-unit and Pareto-front queries over a dps_batch.score_matrix
+# result (units x modifications). Selection uses np.partition/argpartition,
+# so only the k selected pairs are ever sorted, never the whole matrix.
+
+import numpy as np
+
+
+def top_k(values, k):
+    """Indices of the k largest values of a 1-D array, largest first
+
+    Ties are broken by the lower index, so the result does not depend on how
+    np.partition happens to order equal values.
+    """
+    values = np.asarray(values).reshape(-1)
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        threshold = np.partition(values, n - k)[n - k]
+        above = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def top_pairs(matrix, k):
+    """The k best (unit, modification) pairs of a DPS matrix
+
+    Returns (unit_indices, mod_indices, dps) arrays, best pair first.
+    """
+    matrix = np.asarray(matrix)
+    flat = top_k(matrix.ravel(), k)
+    units, mods = np.divmod(flat, matrix.shape[1])
+    return units, mods, matrix.ravel()[flat]
+
+
+def best_per_unit(matrix, k=1):
+    """Each unit's k best modifications: (mod_indices, dps) arrays of shape (units, k), best first"""
+    matrix = np.asarray(matrix)
+    k = min(k, matrix.shape[1])
+    if k == 1:
+        mods = np.argmax(matrix, axis=1)[:, None]
+    else:
+        mods = np.argpartition(-matrix, k - 1, axis=1)[:, :k]
+        # Only the k selected columns per unit are sorted (ties keep the lower mod index)
+        mods.sort(axis=1)
+        order = np.argsort(-np.take_along_axis(matrix, mods, axis=1), axis=1, kind="stable")
+        mods = np.take_along_axis(mods, order, axis=1)
+    return mods, np.take_along_axis(matrix, mods, axis=1)
+
+
+def pareto_front(values, costs):
+    """Indices of the points not dominated in (higher value, lower cost), cheapest first
+
+    A point is kept only if every cheaper-or-equal point has a strictly lower
+    value; exact duplicates keep their first occurrence. O(n log n).
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    costs = np.asarray(costs, dtype=np.float64).reshape(-1)
+    if len(values) != len(costs):
+        raise ValueError("values and costs must have the same length.")
+    if not len(values):
+        return np.empty(0, dtype=np.intp)
+    order = np.lexsort((np.arange(len(values)), -values, costs))
+    ordered = values[order]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], ordered[:-1])))
+    return order[ordered > best_before]
+
+
+def pareto_pairs(matrix, mod_costs):
+    """Pareto front of (unit, modification) pairs over DPS vs. the modification's cost
+
+    All pairs of a modification share its cost, so only the best unit of each
+    modification can be on the front: one pass over the matrix reduces it to
+    a column maximum, and the front is computed over the modifications alone.
+    Returns (unit_indices, mod_indices, dps) arrays, cheapest first.
+    """
+    matrix = np.asarray(matrix)
+    if matrix.size == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0)
+    best_units = np.argmax(matrix, axis=0)
+    best_dps = matrix[best_units, np.arange(matrix.shape[1])]
+    mods = pareto_front(best_dps, mod_costs)
+    return best_units[mods], mods, best_dps[mods]
@@ -0,0 +1,418 @@
+# --- Local JSON Service ---
+# asyncio HTTP/JSON server for bots and spreadsheets; listens on the loopback
+# interface only.
+#
+#   POST /tierlist  {"dmg": 145, "atk_speed": 0.04, "crit_chance": 30, "crit_dmg": 175}
+#                   -> the same dict as dps_engine.calculate (what the GUI shows)
+#   POST /score     {"units": {"Medusa lvl 25": {"dmg": ..., ...}, ...}}
+#                   -> {"modifications": [...], "units": [{"name", "base_dps_with_crit", "best", "dps"}], "skipped": [...]}
+#   GET  /stats     request counts, p50/p99 latency, throughput and batch sizes
+#   GET  /metrics   dps_metrics timers and counters (with --metrics or DPS_METRICS=1)
+#   GET  /health
+#
+# Tier list requests that arrive together are scored as one dps_batch matrix:
+# the first request of a batch waits at most `batch_window` seconds for others.
+# The concurrency limit counts scoring jobs (a batch or a /score request), so
+# queued tier list requests can still fill a batch.
+
+import asyncio
+import collections
+import json
+import math
+import time
+
+import dps_batch
+import dps_catalog
+import dps_engine
+import dps_metrics
+from dps_roster import STAT_KEYS, UnitStats
+
+DEFAULT_PORT = 8765
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_HEADER_LINES = 100
+LATENCY_WINDOW = 10000  # Latencies kept for the percentiles
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(percent / 100.0 * len(sorted_values)) - 1)]
+
+
+def _parse_stats(data):
+    """UnitStats from a request object, raising _HTTPError(400) for anything unusable"""
+    if not isinstance(data, dict):
+        raise _HTTPError(400, "Unit stats must be a JSON object.")
+    values = []
+    for key in STAT_KEYS:
+        value = data.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise _HTTPError(400, f"'{key}' must be a finite number.")
+        values.append(value)
+    try:
+        dps_engine.validate_stats(*values)
+    except ValueError as e:
+        raise _HTTPError(400, str(e))
+    return UnitStats(*values)
+
+
+class ServiceStats:
+    """Request counters and a rolling window of latencies"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.units = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_batch = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds, ok, units=0):
+        self.requests += 1
+        self.errors += not ok
+        self.units += units
+        self.latencies.append(seconds)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+        self.max_batch = max(self.max_batch, size)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        to_ms = lambda value: value * 1000 if value is not None else None
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "errors": self.errors,
+            "units_scored": self.units,
+            "requests_per_s": self.requests / uptime if uptime > 0 else None,
+            "units_per_s": self.units / uptime if uptime > 0 else None,
+            "latency_p50_ms": to_ms(_percentile(latencies, 50)),
+            "latency_p99_ms": to_ms(_percentile(latencies, 99)),
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else None,
+            "max_batch_size": self.max_batch,
+        }
+
+
+@dps_metrics.timed("service.tier_lists")
+def tier_lists(stats_list, modifications=None):
+    """dps_engine.calculate results for many units, scored as one dps_batch matrix
+
+    dps_batch performs the engine's operations in the same order, and sorting
+    and tiering reuse the engine, so each result equals dps_engine.calculate.
+    """
+    columns = list(zip(*stats_list))
+    names, matrix = dps_batch.score_matrix(*columns, modifications)
+    no_crit, with_crit = dps_batch.base_dps(*columns)
+    results = []
+    for row, base_no_crit, base_with_crit in zip(matrix.tolist(), no_crit.tolist(), with_crit.tolist()):
+        entries = [{"name": name, "dps": dps} for name, dps in zip(names, row)]
+        entries.append({"name": dps_engine.NO_MODIFICATION, "dps": base_with_crit})
+        entries.sort(key=lambda x: x["dps"], reverse=True)
+        dps_engine.assign_tiers(entries, base_with_crit)
+        results.append({"base_dps_no_crit": base_no_crit, "base_dps_with_crit": base_with_crit, "results": entries})
+    return results
+
+
+class _Batcher:
+    """Collects concurrent tier list requests and scores them together in a worker thread"""
+
+    def __init__(self, catalog, stats, max_batch, window):
+        self.catalog = catalog
+        self.stats = stats
+        self.max_batch = max_batch
+        self.window = window
+        self.pending = []
+        self.timer = None
+        self.semaphore = None  # The service's scoring slots, set when it starts
+
+    def submit(self, unit):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((unit, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.semaphore:
+                self.stats.record_batch(len(batch))
+                results = await loop.run_in_executor(None, tier_lists, [unit for unit, _ in batch], self.catalog)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class DPSService:
+    """Local HTTP/JSON front end for the DPS engine
+
+    At most `max_concurrency` scoring jobs run at once; further jobs wait
+    for a free slot. Tier list requests are combined into batches of up to
+    `max_batch` units and each batch is one job, as is each /score request.
+    """
+
+    def __init__(self, modifications=None, max_batch=256, batch_window=0.002, max_concurrency=64):
+        self.catalog = dps_catalog.as_catalog(modifications)
+        self.stats = ServiceStats()
+        self.max_concurrency = max_concurrency
+        self.batcher = _Batcher(self.catalog, self.stats, max_batch, batch_window)
+        self.semaphore = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening (port 0 picks a free port); returns the asyncio server"""
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError(f"The service only listens on the loopback interface ({', '.join(LOOPBACK_HOSTS)}).")
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.batcher.semaphore = self.semaphore
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    # --- Endpoints ---
+    async def _tierlist(self, body):
+        unit = _parse_stats(body)
+        return await self.batcher.submit(unit), 1
+
+    async def _score(self, body):
+        units = body.get("units") if isinstance(body, dict) else None
+        if isinstance(units, dict):
+            units = list(units.items())
+        elif isinstance(units, list) and all(isinstance(u, dict) for u in units):
+            units = [(u.get("name", f"Unit {i + 1}"), u) for i, u in enumerate(units)]
+        else:
+            raise _HTTPError(400, "'units' must be an object of name -> stats or a list of stats objects.")
+
+        valid, skipped = [], []
+        for name, data in units:
+            try:
+                valid.append((str(name), _parse_stats(data)))
+            except _HTTPError as e:
+                skipped.append({"name": str(name), "error": str(e)})
+        if not valid:
+            return {"modifications": list(self.catalog.names), "units": [], "skipped": skipped}, 0
+
+        loop = asyncio.get_running_loop()
+        columns = list(zip(*(stats for _, stats in valid)))
+        async with self.semaphore:
+            with dps_metrics.timer("service.score"):
+                names, matrix = await loop.run_in_executor(None, dps_batch.score_matrix, *columns, self.catalog)
+        _, with_crit = dps_batch.base_dps(*columns)
+        best = matrix.argmax(axis=1).tolist()
+        return {
+            "modifications": names,
+            "units": [
+                {"name": name, "base_dps_with_crit": base, "best": names[b], "dps": row}
+                for (name, _), base, b, row in zip(valid, with_crit.tolist(), best, matrix.tolist())
+            ],
+            "skipped": skipped,
+        }, len(valid)
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            ("POST", "/tierlist"): self._tierlist,
+            ("POST", "/score"): self._score,
+        }
+        if method == "GET" and path == "/stats":
+            return 200, self.stats.snapshot(), False
+        if method == "GET" and path == "/metrics":
+            return 200, dps_metrics.metrics.snapshot(), False
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "catalog": self.catalog.version}, False
+        handler = routes.get((method, path))
+        if handler is None:
+            known = {p for _, p in routes} | {"/stats", "/metrics", "/health"}
+            raise _HTTPError(405 if path in known else 404, f"No route for {method} {path}.")
+        try:
+            payload = json.loads(body) if body else None
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise _HTTPError(400, f"Invalid JSON: {e}")
+        result, units = await handler(payload)
+        return 200, result, units
+
+    # --- HTTP ---
+    async def _read_request(self, reader):
+        """(method, path, headers, body) or None when the client closed the connection"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise _HTTPError(400, "Malformed request line.")
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise _HTTPError(400, "Too many headers.")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise _HTTPError(400, "Invalid Content-Length.")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise _HTTPError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method.upper(), target.split("?", 1)[0], keep_alive, body
+
+    @staticmethod
+    async def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _HTTPError as e:
+                    await self._write_response(writer, e.status, {"error": str(e)}, False)
+                    return
+                if request is None:
+                    return
+                method, path, keep_alive, body = request
+                start = time.perf_counter()
+                try:
+                    status, payload, units = await self._dispatch(method, path, body)
+                except _HTTPError as e:
+                    status, payload, units = e.status, {"error": str(e)}, 0
+                except Exception as e:
+                    status, payload, units = 500, {"error": f"{type(e).__name__}: {e}"}, 0
+                if method == "POST":
+                    self.stats.record(time.perf_counter() - start, status == 200, units or 0)
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Client went away, or the server is shutting down with the connection still open
+        finally:
+            writer.close()
+
+
+# --- Local Client ---
+class Client:
+    """Minimal keep-alive HTTP/JSON client for the service (used by the self-test)"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send one request; returns (status, decoded JSON body)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            header = await self.reader.readline()
+            if header in (b"\r\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.writer = None
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, log=None, **options):
+    """Run the service until cancelled"""
+    service = DPSService(**options)
+    await service.start(host, port)
+    if log is not None:
+        print(f"DPS service listening on http://{host}:{service.port} (Ctrl+C to stop)", file=log)
+    async with service.server:
+        await service.server.serve_forever()
+
+
+async def self_test(requests=2000, clients=64, **options):
+    """Start the service on a free loopback port, load it from local clients and return its /stats
+
+    Also checks that a served tier list matches dps_engine.calculate.
+    """
+    service = DPSService(**options)
+    await service.start("127.0.0.1", 0)
+    try:
+        probe = {"dmg": 145.0, "atk_speed": 0.04, "crit_chance": 30.0, "crit_dmg": 175.0}
+        client = Client("127.0.0.1", service.port)
+        status, served = await client.request("POST", "/tierlist", probe)
+        await client.close()
+        expected = json.loads(json.dumps(dps_engine.calculate(*UnitStats.from_dict(probe), service.catalog)))
+        if status != 200 or served != expected:
+            raise AssertionError("Served tier list differs from dps_engine.calculate.")
+
+        async def worker(index, count):
+            worker_client = Client("127.0.0.1", service.port)
+            try:
+                for i in range(count):
+                    unit = {"dmg": 50.0 + (index * 37 + i) % 300, "atk_speed": 0.04 + (i % 20) / 100.0,
+                            "crit_chance": float((index + i * 7) % 101), "crit_dmg": 100.0 + (i * 13) % 200}
+                    status, _ = await worker_client.request("POST", "/tierlist", unit)
+                    if status != 200:
+                        raise AssertionError(f"Request failed with status {status}.")
+            finally:
+                await worker_client.close()
+
+        per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+        await asyncio.gather(*(worker(i, count) for i, count in enumerate(per_client) if count))
+        return service.stats.snapshot()
+    finally:
+        await service.close()
@@ -0,0 +1,179 @@
+# --- Monte Carlo Combat Simulation ---
+# Samples crit outcomes to estimate the spread of DPS (burst) and the time
+# needed to kill a target, for every modification. DPS windows draw one
+# binomial crit count per window; fights draw crits attack by attack.
+#
+# Attack k of a fight lands at k * atk_speed seconds (k = 1, 2, ...), so the
+# long-run average matches dps_engine's expected DPS exactly.
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dps_engine
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+Z_95 = 1.959963984540054  # Two-sided 95% normal quantile
+CHUNK_ELEMENTS = 1 << 22  # Per-attack samples generated per RNG call (bounds memory use)
+MAX_HITS_TO_KILL = 10 ** 7
+
+
+class _RunningMoments:
+    """Streaming mean/variance (Chan et al. parallel update)"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, samples):
+        n_b = len(samples)
+        if n_b == 0:
+            return
+        mean_b = float(samples.mean())
+        m2_b = float(((samples - mean_b) ** 2).sum())
+        delta = mean_b - self.mean
+        total = self.n + n_b
+        self.mean += delta * n_b / total
+        self.m2 += m2_b + delta * delta * self.n * n_b / total
+        self.n = total
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def half_width(self, z=Z_95):
+        return z * self.std / math.sqrt(self.n) if self.n else math.inf
+
+
+def _sample_windows(rng, count, attacks, dmg, atk_speed, crit_chance, crit_multiplier):
+    """DPS of `count` windows of `attacks` attacks each
+
+    Only the number of crits in a window matters for its damage, so the per-attack
+    Bernoulli draws are summed by sampling their Binomial total directly.
+    """
+    crits = rng.binomial(attacks, crit_chance, size=count)
+    damage = dmg * (attacks + crits * (crit_multiplier - 1))
+    return damage / (attacks * atk_speed)
+
+
+def _sample_ttk(rng, count, hp, dmg, atk_speed, crit_chance, crit_multiplier):
+    """Time-to-kill samples for `count` fights"""
+    threshold = hp / dmg  # Needed damage in units of one normal hit
+    max_hits = math.ceil(threshold / min(1.0, crit_multiplier)) if threshold > 0 else 1
+    if max_hits > MAX_HITS_TO_KILL:
+        raise ValueError("Target HP is too large relative to the unit's damage to simulate.")
+    max_hits = max(max_hits, 1)
+
+    out = np.empty(count)
+    per_chunk = max(1, CHUNK_ELEMENTS // max_hits)
+    for start in range(0, count, per_chunk):
+        n = min(per_chunk, count - start)
+        crits = rng.random((n, max_hits)) < crit_chance
+        dealt = np.cumsum(1 + crits * (crit_multiplier - 1), axis=1)
+        # Small epsilon so floating-point sums that exactly reach the HP count as a kill
+        hits = np.argmax(dealt >= threshold * (1 - 1e-12), axis=1) + 1
+        out[start:start + n] = hits * atk_speed
+    return out
+
+
+def _simulate_one(task):
+    """Worker: simulate one modification until convergence (picklable for process pools)"""
+    (name, stats, seed_seq, hp, window_attacks, batch_size, max_samples,
+     rel_tol, min_samples) = task
+    dmg, atk_speed, crit_chance, crit_multiplier = stats
+    rng = np.random.Generator(np.random.PCG64(seed_seq))
+
+    dps_moments = _RunningMoments()
+    ttk_moments = _RunningMoments()
+    dps_batches = []
+    ttk_batches = []
+    converged = False
+
+    while dps_moments.n < max_samples:
+        count = min(batch_size, max_samples - dps_moments.n)
+        windows = _sample_windows(rng, count, window_attacks, dmg, atk_speed, crit_chance, crit_multiplier)
+        dps_moments.add(windows)
+        dps_batches.append(windows)
+
+        if hp is not None:
+            ttk = _sample_ttk(rng, count, hp, dmg, atk_speed, crit_chance, crit_multiplier)
+            ttk_moments.add(ttk)
+            ttk_batches.append(ttk)
+
+        if dps_moments.n >= min_samples:
+            converged = dps_moments.half_width() <= rel_tol * abs(dps_moments.mean)
+            if hp is not None:
+                converged = converged and ttk_moments.half_width() <= rel_tol * abs(ttk_moments.mean)
+            if converged:
+                break
+
+    dps_samples = np.concatenate(dps_batches)
+    result = {
+        "name": name,
+        "expected_dps": dps_engine.dps_with_crit(dmg, atk_speed, crit_chance, crit_multiplier),
+        "mean_dps": dps_moments.mean,
+        "std_dps": dps_moments.std,
+        "ci95_dps": dps_moments.half_width(),
+        "dps_percentiles": dict(zip(PERCENTILES, np.percentile(dps_samples, PERCENTILES).tolist())),
+        "samples": dps_moments.n,
+        "ttk_samples": ttk_moments.n,
+        "converged": converged,
+        "ttk": None,
+    }
+    if hp is not None:
+        ttk_samples = np.concatenate(ttk_batches)
+        result["ttk"] = {
+            "mean": ttk_moments.mean,
+            "std": ttk_moments.std,
+            "ci95": ttk_moments.half_width(),
+            "percentiles": dict(zip(PERCENTILES, np.percentile(ttk_samples, PERCENTILES).tolist())),
+        }
+    return result
+
+
+def simulate(dmg, atk_speed, crit_chance, crit_dmg, modifications=None, hp=None, window_attacks=100,
+             batch_size=20000, max_samples=1000000, rel_tol=0.001, min_samples=40000, seed=0, workers=1):
+    """Monte Carlo DPS and time-to-kill for a unit with each modification (crit values in percent)
+
+    Each sample is a window of `window_attacks` attacks (its DPS shows burst
+    variance); when `hp` is given each sample also plays a fight until the
+    target dies. Batches of `batch_size` samples are drawn until the 95%
+    confidence interval of the mean DPS (and TTK) is within `rel_tol` of the
+    mean, or `max_samples` is reached.
+
+    Every modification gets its own RNG stream derived from `seed`, so results
+    do not depend on `workers` (number of processes to spread modifications over).
+    Returns {"results": [...] sorted by mean DPS, "samples", "seconds",
+    "samples_per_s"}, counting DPS windows and fights as one sample each.
+    """
+    dps_engine.validate_stats(dmg, atk_speed, crit_chance, crit_dmg)
+    if hp is not None and hp <= 0: raise ValueError("Target HP must be positive.")
+    if window_attacks <= 0 or batch_size <= 0 or max_samples <= 0:
+        raise ValueError("Window, batch and sample sizes must be positive.")
+
+    base_stats = (dmg, atk_speed, crit_chance / 100.0, crit_dmg / 100.0)
+    entries = list(dps_engine.modified_stats(*base_stats, modifications)) + [(dps_engine.NO_MODIFICATION, base_stats)]
+    seeds = np.random.SeedSequence(seed).spawn(len(entries))
+    tasks = [
+        (name, stats, seeds[i], hp, window_attacks, batch_size, max_samples, rel_tol, min(min_samples, max_samples))
+        for i, (name, stats) in enumerate(entries)
+    ]
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_one, tasks))
+    else:
+        results = [_simulate_one(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    samples = sum(res["samples"] + res["ttk_samples"] for res in results)
+    return {
+        "results": sorted(results, key=lambda x: x["mean_dps"], reverse=True),
+        "samples": samples,
+        "seconds": elapsed,
+        "samples_per_s": samples / elapsed if elapsed > 0 else None,
+    }
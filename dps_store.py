@@ -0,0 +1,298 @@
+# --- Unit Store ---
+# Saved units live in an SQLite database (dps_units.db) so each save or delete
+# only writes the affected row. dps_units.json is still supported for import,
+# export and the command-line tools.
+
+import json
+import os
+import sqlite3
+from collections.abc import MutableMapping
+
+import dps_metrics
+from dps_roster import STAT_KEYS, MappedRoster, Roster, UnitStats, is_roster_file, write_roster_file
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def iter_units_json(path):
+    """Yield (name, stats) pairs from a dps_units.json file one unit at a time
+
+    The file is decoded incrementally, so memory use does not grow with the
+    roster size.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def expect(chars):
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] not in chars:
+                raise json.JSONDecodeError(f"Expected one of {chars!r}", buffer, pos)
+            pos += 1
+            return buffer[pos - 1]
+
+        def decode_value():
+            nonlocal pos
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A value ending exactly at the buffer edge may be a truncated number
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            return  # Empty file means no saved units
+        expect("{")
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == "}":
+            return
+        while True:
+            name = decode_value()
+            expect(":")
+            stats = decode_value()
+            yield name, stats
+            if expect(",}") == "}":
+                return
+
+
+# Compact once at least this many pages and this share of the file are free
+COMPACT_MIN_FREE_PAGES = 256
+COMPACT_MIN_FREE_RATIO = 0.25
+
+
+class UnitStore(MutableMapping):
+    """Dict-like unit store backed by SQLite: name -> UnitStats
+
+    Assignments and deletions are written immediately inside a transaction and
+    become durable on `commit()`; SQLite's journal keeps the file intact if
+    the process dies mid-write. Iteration follows insertion order like a dict.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS units ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, "
+                "dmg REAL, atk_speed REAL, crit_chance REAL, crit_dmg REAL)"
+            )
+            # Case-insensitive name index for prefix search in the unit selector
+            self.conn.execute("CREATE INDEX IF NOT EXISTS units_name_nocase ON units (name COLLATE NOCASE)")
+            self.conn.commit()
+        except sqlite3.DatabaseError:
+            self.conn.close()  # A damaged file must not stay open, or it cannot be moved aside
+            raise
+
+    def __getitem__(self, name):
+        row = self.conn.execute(
+            "SELECT dmg, atk_speed, crit_chance, crit_dmg FROM units WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return UnitStats(*row)
+
+    def __setitem__(self, name, stats):
+        stats = UnitStats.from_dict(stats)
+        self.conn.execute(
+            "INSERT INTO units (name, dmg, atk_speed, crit_chance, crit_dmg) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET dmg = excluded.dmg, atk_speed = excluded.atk_speed, "
+            "crit_chance = excluded.crit_chance, crit_dmg = excluded.crit_dmg",
+            (name,) + tuple(stats),
+        )
+
+    def __delitem__(self, name):
+        if self.conn.execute("DELETE FROM units WHERE name = ?", (name,)).rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return self.conn.execute("SELECT 1 FROM units WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for (name,) in self.conn.execute("SELECT name FROM units ORDER BY id"):
+            yield name
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+
+    def items(self):
+        """Iterate (name, stats) pairs with a single query"""
+        for row in self.conn.execute("SELECT name, dmg, atk_speed, crit_chance, crit_dmg FROM units ORDER BY id"):
+            yield row[0], UnitStats(*row[1:])
+
+    def load_roster(self):
+        """All units as a columnar Roster (stored order)"""
+        return Roster.from_items(self.items())
+
+    def _prefix_clause(self, prefix):
+        if not prefix:
+            return "", ()
+        # Range scan on the NOCASE index: every name starting with prefix sorts in [prefix, prefix + max char)
+        return ("WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE",
+                (prefix, prefix + "\U0010ffff"))
+
+    @dps_metrics.timed("store.search")
+    def search(self, prefix="", limit=50, offset=0):
+        """Names starting with prefix (case-insensitive), sorted by name, one page at a time"""
+        clause, params = self._prefix_clause(prefix)
+        rows = self.conn.execute(
+            f"SELECT name FROM units {clause} ORDER BY name COLLATE NOCASE LIMIT ? OFFSET ?",
+            params + (limit, offset),
+        )
+        return [name for (name,) in rows]
+
+    def count(self, prefix=""):
+        """Number of names starting with prefix"""
+        clause, params = self._prefix_clause(prefix)
+        return self.conn.execute(f"SELECT COUNT(*) FROM units {clause}", params).fetchone()[0]
+
+    def commit(self):
+        """Make all changes since the last commit durable, compacting the file when needed"""
+        self.conn.commit()
+        self.compact_if_needed()
+
+    def compact_if_needed(self):
+        free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        total_pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        if free_pages >= COMPACT_MIN_FREE_PAGES and free_pages >= COMPACT_MIN_FREE_RATIO * total_pages:
+            self.compact()
+
+    def compact(self):
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def import_json(self, path, skipped=None):
+        """Add or update every unit from a dps_units.json file in one transaction; returns the count
+
+        Entries with malformed stats (e.g. a legacy file with a number instead
+        of a stats object) are left out; their (name, error) pairs are
+        appended to `skipped` if given.
+        """
+        return self._import(iter_units_json(path), skipped)
+
+    def import_units(self, path, skipped=None):
+        """Like import_json, for any unit file iter_units can read; returns the count"""
+        return self._import(iter_units(path), skipped)
+
+    def _import(self, units, skipped):
+        count = 0
+        with self.conn:
+            for name, stats in units:
+                try:
+                    self[name] = stats
+                except (AttributeError, TypeError, ValueError) as e:
+                    if skipped is not None:
+                        skipped.append((name, str(e)))
+                    continue
+                count += 1
+        return count
+
+    def export_json(self, path):
+        """Write all units to a dps_units.json file, replacing it atomically"""
+        write_units_json(path, self.items())
+
+
+def write_units_json(path, items):
+    """Write (name, stats) pairs as a dps_units.json file, replacing it atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({name: UnitStats.from_dict(stats).to_dict() for name, stats in items}, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_units(path):
+    """Yield (name, UnitStats) from a dps_units.db store, a .roster file or a dps_units.json file
+
+    Malformed JSON entries (stats that are not an object) are passed through
+    unchanged so callers can report them per unit.
+    """
+    if path.endswith(".db"):
+        store = UnitStore(path)
+        try:
+            yield from store.items()
+        finally:
+            store.close()
+    elif is_roster_file(path):
+        with MappedRoster(path) as roster:
+            yield from roster.items()
+    else:
+        for name, stats in iter_units_json(path):
+            try:
+                yield name, UnitStats.from_dict(stats)
+            except (AttributeError, TypeError, ValueError):
+                yield name, stats
+
+
+@dps_metrics.timed("store.load_roster")
+def load_roster(path):
+    """Columnar roster of a unit file; .roster files are memory-mapped instead of read"""
+    if is_roster_file(path):
+        return MappedRoster(path)
+    return Roster.from_items(iter_units(path))
+
+
+def convert_units(src, dst):
+    """Convert between dps_units.json, dps_units.db and .roster files (by extension); returns the count
+
+    Stats are float64 in every format, so the conversion is lossless.
+    """
+    if dst.endswith(".db"):
+        store = UnitStore(dst)
+        try:
+            return store.import_units(src)
+        finally:
+            store.close()
+    if is_roster_file(dst):
+        roster = load_roster(src)
+        try:
+            write_roster_file(dst, roster)
+            count = len(roster)
+        finally:
+            if isinstance(roster, MappedRoster):
+                roster.close()
+        return count
+    count = 0
+
+    def counted():
+        nonlocal count
+        for item in iter_units(src):
+            count += 1
+            yield item
+    write_units_json(dst, counted())
+    return count
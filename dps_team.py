@@ -0,0 +1,532 @@
+# --- Team Modification Assignment ---
+# Hands out a limited pool of modifications to a squad so that the summed
+# (with-crit) DPS of all units is as high as possible.
+#
+# Mods with identical effects are interchangeable and are grouped into one
+# type with a count. With one slot per unit this is an assignment problem,
+# solved with the Hungarian algorithm: one column per usable copy of each mod
+# plus one "no modification" column per unit. With several slots the stacked
+# effects of a loadout do not add up, so the units are searched depth-first,
+# memoized on the remaining pool counts and pruned with a Lagrangian bound
+# (see _solve_search). The search is exponential in the worst case (many
+# distinct mod types, several slots), so every stage has a fixed budget:
+# loadouts per unit (OPTION_LIMIT, EXTEND_LIMIT), IMPROVE_SWEEPS of local
+# search and SEARCH_WORK_LIMIT steps of search. A run that hits a limit
+# returns the best team found, starting from a greedy and a price-rounded
+# team improved by local search, with "exact": False. The budgets count
+# work, not time, so the same input always gives the same team.
+# method="brute" tries every combination and is kept for verification.
+
+import itertools
+
+import dps_engine
+from dps_loadout import _as_table, _effect_key
+from dps_roster import UnitStats
+
+PRICE_ITERATIONS = 100  # Subgradient steps for the pruning bound
+OPTION_LIMIT = 512  # Loadouts of the largest size a unit keeps before cutting to the best per mod type
+EXTEND_LIMIT = 256  # The same for smaller sizes, whose loadouts are extended by another mod
+TYPE_OPTION_LIMIT = 8  # Best loadouts per mod type a cut keeps
+IMPROVE_SWEEPS = 20  # Passes over the squad in _improve's local search
+SEARCH_WORK_LIMIT = 100000  # Loadouts tried or scanned for bounds before settling for the best team found so far
+EXCHANGE_OPTIONS = 64  # Best loadouts per unit tried in _improve's two-unit exchanges
+
+
+def parse_pool(pool):
+    """{mod name: count} from a mapping, or from names where repeats add copies ("NAME=COUNT" allowed)"""
+    if hasattr(pool, "items"):
+        items = pool.items()
+    else:
+        items = []
+        for entry in pool:
+            name, sep, count = entry.rpartition("=")
+            items.append((name, int(count)) if sep and count.strip().isdigit() else (entry, 1))
+    counts = {}
+    for name, count in items:
+        if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+            raise ValueError(f"Pool count for '{name}' must be a non-negative integer.")
+        counts[name] = counts.get(name, 0) + count
+    return counts
+
+
+def _group_pool(pool, modifications):
+    """Group pool mods by effect: (list of name lists, counts)"""
+    groups = {}
+    for name, count in pool.items():
+        if name not in modifications:
+            raise ValueError(f"Unknown modification in pool: {name}")
+        if count:
+            group = groups.setdefault(_effect_key(modifications[name]), [])
+            group.extend([name] * count)
+    names = list(groups.values())
+    return names, [len(group) for group in names]
+
+
+def _best_per_type(entries, limit):
+    """The entries (sorted best first, mod types used last) that are among the `limit` best for some type they use"""
+    taken = {}
+    full = set()
+    chosen = []
+    for entry in entries:
+        types = entry[-1]
+        if not full.issuperset(types):
+            chosen.append(entry)
+            for t in types:
+                taken[t] = taken.get(t, 0) + 1
+                if taken[t] == limit:
+                    full.add(t)
+    return chosen
+
+
+def _options(stats, type_names, counts, slots, modifications, prices=None):
+    """(options, truncated): (dps, usage per type) of the loadouts of up to `slots` mods the pool can supply
+
+    A loadout is dropped when one that uses no more of any type scores at
+    least as much; giving those mods to other units is never worse. Large
+    pools make the number of loadouts explode, so a size with more than
+    EXTEND_LIMIT loadouts (OPTION_LIMIT for the largest size) keeps only the
+    TYPE_OPTION_LIMIT best containing each mod type, and only kept loadouts
+    are extended by another mod. Loadouts are ranked by DPS minus the price
+    of the mods they use, which keeps the cheap leftovers a weak unit ends
+    up with among its loadouts. truncated tells whether a cut dropped
+    anything.
+    """
+    if prices is None:
+        prices = [0.0] * len(counts)
+    entries = [modifications[names[0]] for names in type_names]
+    kept = []
+    best_within = {}  # usage -> best DPS of that loadout or any part of it
+    truncated = False
+    dmg, atk_speed, crit_chance, crit_dmg = stats
+    # usage -> (modified stats, price of the mods used, types used) for one loadout size
+    level = {(0,) * len(counts): ((dmg, atk_speed, crit_chance / 100.0, crit_dmg / 100.0), 0.0, ())}
+    for size in range(slots + 1):
+        scored = []
+        for usage, (modified, cost, types) in level.items():
+            try:
+                dps = dps_engine.dps_with_crit(*modified)
+            except ZeroDivisionError:
+                continue
+            scored.append((dps - cost, dps, usage, modified, cost, types))
+        if size and len(scored) > (OPTION_LIMIT if size == slots else EXTEND_LIMIT):
+            scored.sort(key=lambda entry: -entry[0])
+            scored = _best_per_type(scored, TYPE_OPTION_LIMIT)
+            truncated = True
+        for _, dps, usage, _, _, types in scored:
+            # Parts one mod smaller already know their own best part (cut parts are simply not compared)
+            parts = [best_within.get(usage[:t] + (usage[t] - 1,) + usage[t + 1:]) for t in types]
+            best_part = max((value for value in parts if value is not None), default=None)
+            if best_part is None or dps > best_part:
+                kept.append((dps, usage))
+                best_within[usage] = dps
+            else:
+                best_within[usage] = best_part
+        if size == slots:
+            break
+        # Any kept loadout can be extended, so a loadout is found if any part one mod smaller was kept
+        level = {}
+        for _, _, usage, modified, cost, types in scored:
+            for t, entry in enumerate(entries):
+                if usage[t] < counts[t]:
+                    grown = usage[:t] + (usage[t] + 1,) + usage[t + 1:]
+                    if grown not in level:
+                        level[grown] = (dps_engine.apply_mod_data(*modified, entry), cost + prices[t],
+                                        types if usage[t] else tuple(sorted(types + (t,))))
+    kept.sort(key=lambda option: -option[0])
+    return kept, truncated
+
+
+def hungarian(cost):
+    """Assignment of rows to distinct columns with the lowest total cost
+
+    cost is a list of rows with at least as many columns as rows. Returns the
+    column index chosen for every row. O(rows^2 * columns).
+    """
+    n, m = len(cost), len(cost[0]) if cost else 0
+    if n > m:
+        raise ValueError("Need at least as many columns as rows.")
+    inf = float("inf")
+    u = [0.0] * (n + 1)  # Row potentials (1-based, 0 is a sentinel)
+    v = [0.0] * (m + 1)  # Column potentials
+    owner = [0] * (m + 1)  # Row assigned to each column
+    way = [0] * (m + 1)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_slack = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while owner[column]:
+            used[column] = True
+            current = owner[column]
+            cost_row = cost[current - 1]
+            delta = inf
+            next_column = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    slack = cost_row[j - 1] - u[current] - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = column
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        next_column = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+
+def _solve_hungarian(all_options, counts):
+    """Loadout index per unit for one slot: columns are mod copies, then one empty column per unit"""
+    n = len(all_options)
+    columns = [t for t, count in enumerate(counts) for _ in range(min(count, n))]
+    cost = []
+    choices = []  # Per unit: option index for each column
+    for options in all_options:
+        by_type = {}
+        for index, (_, usage) in enumerate(options):
+            by_type[usage.index(1) if any(usage) else None] = index
+        # A mod pruned from a unit's options is no better than no mod at all
+        row = [by_type.get(t, by_type[None]) for t in columns] + [by_type[None]] * n
+        choices.append(row)
+        cost.append([-options[index][0] for index in row])
+    return [row[column] for row, column in zip(choices, hungarian(cost))]
+
+
+def _greedy(all_options, counts):
+    """Feasible start: each unit in turn takes its best loadout the pool can still supply"""
+    remaining = list(counts)
+    total, picks = 0.0, []
+    for options in all_options:
+        index = next(i for i, (_, usage) in enumerate(options)
+                     if all(used <= left for used, left in zip(usage, remaining)))
+        dps, usage = options[index]
+        total += dps
+        picks.append(index)
+        remaining = [left - used for left, used in zip(remaining, usage)]
+    return total, picks
+
+
+def _improve(all_options, counts, picks):
+    """Local search from a feasible team until no move helps, for at most IMPROVE_SWEEPS passes
+
+    Moves: one unit switches to its best loadout the rest of the team leaves
+    free, or a unit takes a better loadout held up by a single other unit,
+    which then picks its best loadout from what is left.
+    """
+    picks = list(picks)
+    n = len(all_options)
+    used = [sum(column) for column in zip(*(options[i][1] for options, i in zip(all_options, picks)))] if n else []
+
+    def fits(usage, free):
+        return all(a <= b for a, b in zip(usage, free))
+
+    def best_fit(unit, free):
+        # Options are sorted by DPS, so the first one that fits is the best
+        return next(i for i, (_, usage) in enumerate(all_options[unit]) if fits(usage, free))
+
+    improved = True
+    sweeps = 0
+    while improved and sweeps < IMPROVE_SWEEPS:
+        improved = False
+        sweeps += 1
+        for unit, options in enumerate(all_options):
+            current_dps, current_usage = options[picks[unit]]
+            free = [c - u + own for c, u, own in zip(counts, used, current_usage)]
+            index = best_fit(unit, free)
+            if options[index][0] > current_dps:
+                picks[unit] = index
+                used = [u - own + new for u, own, new in zip(used, current_usage, options[index][1])]
+                improved = True
+                continue
+            for index in range(min(picks[unit], EXCHANGE_OPTIONS)):
+                dps, usage = options[index]
+                short = [t for t, (need, left) in enumerate(zip(usage, free)) if need > left]
+                holders = {other for other in range(n) if other != unit
+                           and any(all_options[other][picks[other]][1][t] for t in short)}
+                if len(holders) != 1:
+                    continue
+                other = holders.pop()
+                other_dps, other_usage = all_options[other][picks[other]]
+                other_free = [f + own - need for f, own, need in zip(free, other_usage, usage)]
+                if min(other_free) < 0:
+                    continue
+                other_index = best_fit(other, other_free)
+                gain = dps + all_options[other][other_index][0] - current_dps - other_dps
+                if gain > 1e-12 * (current_dps + other_dps):  # Rounding noise alone could swap back and forth
+                    used = [u - own - old + new + new_other for u, own, old, new, new_other
+                            in zip(used, current_usage, other_usage, usage, all_options[other][other_index][1])]
+                    picks[unit], picks[other] = index, other_index
+                    improved = True
+                    break
+    return sum(options[i][0] for options, i in zip(all_options, picks)), picks
+
+
+def _rounded(ranked, counts):
+    """Feasible team from the Lagrangian prices: units with the most price-adjusted DPS choose first"""
+    remaining = list(counts)
+    picks = [None] * len(ranked)
+    for unit in sorted(range(len(ranked)), key=lambda u: -ranked[u][0][0]):
+        for _, _, usage, index in ranked[unit]:
+            if all(used <= left for used, left in zip(usage, remaining)):
+                picks[unit] = index
+                remaining = [left - used for left, used in zip(remaining, usage)]
+                break
+    return picks
+
+
+def _prices(all_options, counts, lower, start=None):
+    """Per-type prices for the Lagrangian bound, tuned by subgradient descent
+
+    For any prices p >= 0, sum over units of max(dps - p . usage) plus
+    p . counts bounds the best team DPS from above; the descent lowers that
+    bound towards the optimum so the search can prune early. start are
+    prices to begin the descent from (default all zero).
+    """
+    # Each type index repeated once per copy used, so the price of a loadout is one sum over a map
+    sparse = [[(dps, [t for t, used in enumerate(usage) for _ in range(used)], usage) for dps, usage in options]
+              for options in all_options]
+    prices = list(start) if start is not None else [0.0] * len(counts)
+    best_bound, best_prices = float("inf"), prices
+    step_scale = 1.0
+    stalled = 0
+    for _ in range(PRICE_ITERATIONS):
+        bound = sum(p * c for p, c in zip(prices, counts))
+        used = [0] * len(counts)
+        for options in sparse:
+            value, usage = float("-inf"), None
+            price = prices.__getitem__
+            for dps, copies, option_usage in options:
+                if dps <= value:
+                    break  # Options are sorted by DPS and prices are non-negative: no later one can win
+                reduced = dps - sum(map(price, copies))
+                if reduced > value:
+                    value, usage = reduced, option_usage
+            bound += value
+            used = [a + b for a, b in zip(used, usage)]
+        if bound < best_bound:
+            best_bound, best_prices, stalled = bound, prices, 0
+        else:
+            stalled += 1
+            if stalled >= 10:
+                step_scale /= 2
+                stalled = 0
+        gradient = [c - u for c, u in zip(counts, used)]
+        norm = sum(g * g for g in gradient)
+        if norm == 0 or step_scale < 1e-4 or best_bound <= lower:
+            break
+        step = step_scale * (bound - lower) / norm
+        prices = [max(0.0, p - step * g) for p, g in zip(prices, gradient)]
+    return best_prices
+
+
+class _SearchLimit(Exception):
+    pass
+
+
+def _priced_options(unit_stats, type_names, counts, slots, modifications):
+    """(options per unit, prices, truncated) for _solve_search
+
+    Prices come from loadouts ranked by DPS alone. If a unit had more
+    loadouts than its limits keep, the options are rebuilt ranked by DPS
+    minus those prices, so each unit also keeps what the others leave over.
+    """
+    all_options, truncated = [], False
+    for _, stats in unit_stats:
+        options, cut = _options(stats, type_names, counts, slots, modifications)
+        all_options.append(options)
+        truncated = truncated or cut
+    prices = _prices(all_options, counts, _greedy(all_options, counts)[0])
+    if truncated:
+        all_options = [_options(stats, type_names, counts, slots, modifications, prices)[0] for _, stats in unit_stats]
+    return all_options, prices, truncated
+
+
+def _solve_search(all_options, counts, prices, work_limit=SEARCH_WORK_LIMIT):
+    """(loadout index per unit, exact) maximizing total DPS (any number of slots)
+
+    Depth-first over units, trying loadouts in order of price-adjusted DPS.
+    Branches are cut when the Lagrangian bound of the remaining units cannot
+    beat the best team found so far. Bounds and the best DPS reached are
+    memoized per (unit, remaining pool counts), and counts are clamped to
+    what the remaining units can still use, so equal states meet.
+
+    prices (per mod type, from _priced_options) are refined here first;
+    any non-negative prices give a valid bound. The search starts from the
+    better of a greedy and a price-rounded team, both polished by _improve.
+    Many distinct mod types can make the search exponential, so after
+    work_limit steps (loadouts tried, plus loadouts scanned for new bounds)
+    it stops and returns the best team found so far with exact=False.
+    """
+    n = len(all_options)
+    usable = [[0] * len(counts)]  # usable[k][t]: copies of type t the last k units could take
+    for options in reversed(all_options):
+        most = [max(usage[t] for _, usage in options) for t in range(len(counts))]
+        usable.append([a + b for a, b in zip(usable[-1], most)])
+    usable.reverse()
+
+    best_total, best_picks = _improve(all_options, counts, _greedy(all_options, counts)[1])
+    prices = _prices(all_options, counts, best_total, prices)
+    ranked = [
+        sorted(((dps - sum(p * u for p, u in zip(prices, usage)), dps, usage, index)
+                for index, (dps, usage) in enumerate(options)), key=lambda option: -option[0])
+        for options in all_options
+    ]
+    rounded_total, rounded_picks = _improve(all_options, counts, _rounded(ranked, counts))
+    if rounded_total > best_total:
+        best_total, best_picks = rounded_total, rounded_picks
+
+    # Unconstrained best price-adjusted DPS of the last k units, for cutting the loadout loop short
+    tail = [0.0]
+    for options in reversed(ranked):
+        tail.append(tail[-1] + options[0][0])
+    tail.reverse()
+
+    bounds = {}
+    reached = {}
+    picks = []
+    work = 0
+
+    def clamp(unit, remaining):
+        return tuple(min(left, cap) for left, cap in zip(remaining, usable[unit]))
+
+    def bound(unit, remaining):
+        nonlocal work
+        key = (unit, remaining)
+        value = bounds.get(key)
+        if value is None:
+            value = sum(p * left for p, left in zip(prices, remaining))
+            for options in ranked[unit:]:
+                for scanned, (reduced, _, usage, _) in enumerate(options, 1):
+                    if all(used <= left for used, left in zip(usage, remaining)):
+                        break
+                value += reduced
+                work += scanned  # A single unit can try hundreds of loadouts, each needing a fresh bound
+            if work > work_limit:
+                raise _SearchLimit
+            bounds[key] = value
+        return value
+
+    def search(unit, remaining, total):
+        nonlocal best_total, best_picks, work
+        work += 1
+        if work > work_limit:
+            raise _SearchLimit
+        if unit == n:
+            if total > best_total:
+                best_total, best_picks = total, list(picks)
+            return
+        key = (unit, remaining)
+        if reached.get(key, float("-inf")) >= total:
+            return
+        reached[key] = total
+        priced = sum(p * left for p, left in zip(prices, remaining))
+        for reduced, dps, usage, index in ranked[unit]:
+            if total + reduced + priced + tail[unit + 1] <= best_total:
+                break  # Loadouts are sorted by price-adjusted DPS, so no later one can do better
+            work += 1
+            if any(used > left for used, left in zip(usage, remaining)):
+                continue
+            rest = clamp(unit + 1, [left - used for left, used in zip(remaining, usage)])
+            if total + dps + bound(unit + 1, rest) <= best_total:
+                continue
+            picks.append(index)
+            search(unit + 1, rest, total + dps)
+            picks.pop()
+
+    try:
+        search(0, clamp(0, counts), 0.0)
+    except _SearchLimit:
+        return best_picks, False
+    return best_picks, True
+
+
+def _solve_brute(all_options, counts):
+    best_total, best_picks = None, None
+    for picks in itertools.product(*(range(len(options)) for options in all_options)):
+        used = [sum(column) for column in zip(*(options[i][1] for options, i in zip(all_options, picks)))]
+        if any(u > c for u, c in zip(used, counts)):
+            continue
+        total = sum(options[i][0] for options, i in zip(all_options, picks))
+        if best_total is None or total > best_total:
+            best_total, best_picks = total, list(picks)
+    return best_picks
+
+
+def assign_team(units, pool, slots=1, modifications=None, method="auto"):
+    """Assign pool mods to units to maximize summed DPS
+
+    units is a list of (name, stats) with stats as a dict or UnitStats (crit
+    values in percent); pool maps mod names to the number of copies. Each
+    unit gets up to `slots` mods. method is "auto" (Hungarian for one slot,
+    search otherwise), "hungarian", "search" or "brute".
+
+    Returns {"team_dps", "base_team_dps", "units": [{"name", "mods", "dps",
+    "base_dps"}], "unused": {name: count}, "exact"}. "exact" is False when a
+    unit had more loadouts than _options keeps or the search hit
+    SEARCH_WORK_LIMIT; the team is then the best found within those limits.
+    """
+    if method not in ("auto", "hungarian", "search", "brute"):
+        raise ValueError(f"Unknown assignment method: {method}")
+    if slots < 0:
+        raise ValueError("Number of slots cannot be negative.")
+    if method == "hungarian" and slots != 1:
+        raise ValueError("The Hungarian method assigns exactly one slot per unit.")
+    modifications = _as_table(modifications)
+    type_names, counts = _group_pool(parse_pool(pool), modifications)
+
+    unit_stats = []
+    for name, stats in units:
+        stats = tuple(UnitStats.from_dict(stats))
+        dps_engine.validate_stats(*stats)
+        unit_stats.append((name, stats))
+    if method == "search" or (method == "auto" and slots != 1):
+        all_options, prices, truncated = _priced_options(unit_stats, type_names, counts, slots, modifications)
+        picks, exact = _solve_search(all_options, counts, prices) if unit_stats else ([], True)
+        exact = exact and not truncated
+    else:
+        all_options, exact = [], True
+        for _, stats in unit_stats:
+            options, truncated = _options(stats, type_names, counts, slots, modifications)
+            all_options.append(options)
+            exact = exact and not truncated
+        if method == "brute":
+            picks = _solve_brute(all_options, counts)
+        else:
+            picks = _solve_hungarian(all_options, counts) if unit_stats else []
+
+    # Hand out concrete mod names from each type's copies
+    left = [list(names) for names in type_names]
+    result_units = []
+    for (name, stats), options, index in zip(unit_stats, all_options, picks):
+        dps, usage = options[index]
+        mods = []
+        for t, used in enumerate(usage):
+            mods.extend(left[t][:used])
+            del left[t][:used]
+        base = dps_engine.dps_with_crit(stats[0], stats[1], stats[2] / 100.0, stats[3] / 100.0)
+        result_units.append({"name": name, "mods": mods, "dps": dps, "base_dps": base})
+    unused = {}
+    for names in left:
+        for name in names:
+            unused[name] = unused.get(name, 0) + 1
+    return {
+        "team_dps": sum(unit["dps"] for unit in result_units),
+        "base_team_dps": sum(unit["base_dps"] for unit in result_units),
+        "units": result_units,
+        "unused": unused,
+        "exact": exact,
+    }
@@ -0,0 +1,102 @@
+# --- Natural Tiers ---
+# Splits a DPS list into a chosen number of tiers with exact 1-D k-means:
+# the split minimizes the summed squared distance of every DPS value to its
+# tier's mean.
+#
+# In sorted order every optimal tier is a contiguous run, so the optimum is a
+# DP over split points:
+#     cost[j][i] = min over m < i of cost[j-1][m] + sse(m, i)
+# The best m never moves left as i grows, which lets each layer be solved by
+# divide and conquer in O(n log n), O(k n log n) overall. Equal DPS values
+# are clustered as one weighted point, so ties always share a tier.
+
+
+def _distinct_descending(values):
+    """Distinct values (highest first) and how often each occurs"""
+    distinct, weights = [], []
+    for value in sorted(values, reverse=True):
+        if distinct and value == distinct[-1]:
+            weights[-1] += 1
+        else:
+            distinct.append(value)
+            weights.append(1)
+    return distinct, weights
+
+
+def _layer(previous, sums, n, tiers, first):
+    """DP layer for `tiers` tiers: best[i] and split[i] for prefixes of length first..n"""
+    s_w, s_x, s_xx = sums
+    inf = float("inf")
+    best = [inf] * (n + 1)
+    split = [0] * (n + 1)
+    # (lo, hi, opt_lo, opt_hi): solve prefixes lo..hi knowing their split lies in opt_lo..opt_hi
+    stack = [(first, n, tiers - 1, n - 1)]
+    while stack:
+        lo, hi, opt_lo, opt_hi = stack.pop()
+        if lo > hi:
+            continue
+        mid = (lo + hi) // 2
+        w_mid, x_mid, xx_mid = s_w[mid], s_x[mid], s_xx[mid]
+        best_value, best_m = inf, opt_lo
+        for m in range(opt_lo, min(mid - 1, opt_hi) + 1):
+            # previous[m] plus the squared error of distinct values m..mid-1 (inlined: this is the hot loop)
+            x = x_mid - s_x[m]
+            value = previous[m] + (xx_mid - s_xx[m]) - x * x / (w_mid - s_w[m])
+            if value < best_value:
+                best_value, best_m = value, m
+        best[mid] = best_value
+        split[mid] = best_m
+        stack.append((lo, mid - 1, opt_lo, best_m))
+        stack.append((mid + 1, hi, best_m, opt_hi))
+    return best, split
+
+
+def natural_breaks(values, k):
+    """Tier index (0 = highest) for each value, from an exact k-means split into at most k tiers
+
+    Values may be in any order; the result follows the input order.
+    """
+    if k < 1:
+        raise ValueError("Tier count must be at least 1.")
+    if not values:
+        return []
+    distinct, weights = _distinct_descending(values)
+    n = len(distinct)
+    k = min(k, n)
+
+    # Weighted prefix sums of centered values (centering keeps the squared sums accurate)
+    center = sum(v * w for v, w in zip(distinct, weights)) / sum(weights)
+    s_w, s_x, s_xx = [0.0], [0.0], [0.0]
+    for v, w in zip(distinct, weights):
+        x = v - center
+        s_w.append(s_w[-1] + w)
+        s_x.append(s_x[-1] + w * x)
+        s_xx.append(s_xx[-1] + w * x * x)
+
+    def sse(a, b):
+        """Squared error of distinct values a..b-1 around their weighted mean"""
+        total = s_x[b] - s_x[a]
+        return max(0.0, (s_xx[b] - s_xx[a]) - total * total / (s_w[b] - s_w[a]))
+
+    cost = [sse(0, i) if i else 0.0 for i in range(n + 1)]
+    splits = []
+    for j in range(2, k + 1):
+        # The last layer only needs the full list
+        cost, split = _layer(cost, (s_w, s_x, s_xx), n, j, n if j == k else j)
+        splits.append(split)
+
+    # Walk the splits back from the full list to find where each tier starts
+    starts = []
+    end = n
+    for split in reversed(splits):
+        end = split[end]
+        starts.append(end)
+    starts.reverse()
+
+    tier_of = {}
+    tier = 0
+    for index, value in enumerate(distinct):
+        while tier < len(starts) and index >= starts[tier]:
+            tier += 1
+        tier_of[value] = tier
+    return [tier_of[value] for value in values]
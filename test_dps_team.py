@@ -0,0 +1,47 @@
+import random
+
+import dps_engine
+import dps_team
+
+
+def _random_units(rng, count):
+    return [(f"U{i}", {"dmg": rng.uniform(10, 400), "atk_speed": rng.uniform(0.05, 2),
+                       "crit_chance": rng.uniform(0, 100), "crit_dmg": rng.uniform(100, 300)})
+            for i in range(count)]
+
+
+def _distinct_mods(rng, count):
+    mods = {}
+    for i in range(count):
+        mod_type = rng.choice(["DMG", "CD", "CC", "CDMG"])
+        mods[f"M{i}"] = {"type": mod_type, "value": round(rng.uniform(0.05, 0.4 if mod_type == "CD" else 0.6), 3)}
+    return mods
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(5)
+    names = list(dps_engine.DEFAULT_MODIFICATIONS)
+    for _ in range(60):
+        units = _random_units(rng, rng.randint(1, 3))
+        pool = {}
+        for _ in range(rng.randint(0, 5)):
+            name = rng.choice(names)
+            pool[name] = pool.get(name, 0) + 1
+        slots = rng.randint(1, 3)
+        brute = dps_team.assign_team(units, pool, slots, method="brute")
+        search = dps_team.assign_team(units, pool, slots, method="search")
+        assert search["exact"]
+        assert abs(search["team_dps"] - brute["team_dps"]) <= 1e-9 * brute["team_dps"]
+
+
+def test_limited_search_is_repeatable_and_feasible():
+    rng = random.Random(1)
+    mods = _distinct_mods(rng, 30)
+    units = _random_units(rng, 10)
+    pool = {name: 1 for name in mods}
+    first = dps_team.assign_team(units, pool, 3, mods)
+    assert not first["exact"]
+    assert dps_team.assign_team(units, pool, 3, mods) == first
+    handed_out = [mod for unit in first["units"] for mod in unit["mods"]]
+    assert len(handed_out) == len(set(handed_out))
+    assert all(len(unit["mods"]) <= 3 for unit in first["units"])